@@ -0,0 +1,194 @@
+"""Benchmark Suite.
+
+This module times each phase of a model run, from loading market data to exporting the solution, across horizon lengths
+from one day up to the full market data, and writes the results to JSON so they can be compared between commits.
+
+Market data is taken from either the raw market data files, or synthetic prices with daily cycles and noise written in
+the same CSV format. Each benchmark case runs in a fresh process, so its peak RSS is not inflated by previous cases.
+Peak RSS is the high-water mark of the process at the end of each phase, so it never decreases from one phase to the
+next. Finer-grained timings within each phase are taken from `Model.stats`.
+
+Run from the command line, e.g.:
+    ```
+    python -m chronos.lite.benchmark --horizons 1D 7D --sources synthetic --output benchmark.json
+    ```
+"""
+import argparse
+import json
+import multiprocessing
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from chronos.lite.data import load_battery_config, load_market_data
+from chronos.lite.sparse import BUILDERS
+
+#: Raw data files
+RAW_DATA_DIR = Path(__file__).parents[2] / "data" / "raw"
+BATTERY_CONFIG_CSV = RAW_DATA_DIR / "battery_parameters.csv"
+HALF_HOURLY_CSV = RAW_DATA_DIR / "half-hourly-market.csv"
+HOURLY_CSV = RAW_DATA_DIR / "hourly-market.csv"
+
+#: Default horizon lengths, up to the full market data (None)
+HORIZONS = ["1D", "7D", "30D", "365D", None]
+
+#: Market data sources
+SOURCES = ["raw", "synthetic"]
+
+#: Start of the raw market data, also used as the start of the synthetic market data
+START = pd.Timestamp("2018-01-01")
+
+
+def write_synthetic_market_data(directory: str | Path, periods: int, seed: int = 0) -> tuple[Path, Path]:
+    """Write synthetic half-hourly and hourly market data CSV files, in the same format as the raw data.
+
+    :param directory: Directory to write the CSV files to.
+    :param periods: Number of half-hourly timesteps. Must be even.
+    :param seed: Random seed for price noise.
+    :returns: Paths to the half-hourly and hourly CSV files.
+    """
+    rng = np.random.default_rng(seed)
+    time = pd.date_range(START, periods=periods, freq="30min")
+    daily_cycle = 50.0 + 20.0 * np.sin(2 * np.pi * np.arange(periods) / 48)
+    half_hourly_csv = Path(directory) / "half-hourly-market.csv"
+    hourly_csv = Path(directory) / "hourly-market.csv"
+    pd.DataFrame(
+        {"Market 1 Price [£/MWh]": (daily_cycle + rng.normal(0, 5, periods)).round(2)},
+        index=time.strftime("%d/%m/%Y %H:%M"),
+    ).to_csv(half_hourly_csv)
+    pd.DataFrame(
+        {"Market 2 Price [£/MWh]": (daily_cycle[::2] + rng.normal(0, 5, periods // 2)).round(2)},
+        index=time[::2].strftime("%d/%m/%Y %H:%M"),
+    ).to_csv(hourly_csv)
+    return half_hourly_csv, hourly_csv
+
+
+def run_benchmark(
+    horizons: list[str | None] | None = None,
+    sources: list[str] | None = None,
+    builder: str = "linopy",
+    **solver_options,
+) -> dict:
+    """Run each benchmark case in a fresh process.
+
+    :param horizons: Horizon lengths, as Pandas timedelta strings, or None for the full market data. Defaults to
+        `HORIZONS`.
+    :param sources: Market data sources, from `SOURCES`. Defaults to all sources.
+    :param builder: Model builder, from `BUILDERS`.
+    :param solver_options: Keyword arguments passed to `Model.solve()`, or HiGHS options for the sparse builder.
+    :returns: Benchmark results, with the environment they were run in.
+    """
+    horizons = HORIZONS if horizons is None else horizons
+    sources = SOURCES if sources is None else sources
+    if unknown_sources := set(sources) - set(SOURCES):
+        raise ValueError(f"Unknown market data sources: {sorted(unknown_sources)}")
+    if builder not in BUILDERS:
+        raise ValueError(f"Unknown model builder: {builder}")
+
+    cases = []
+    with tempfile.TemporaryDirectory() as synthetic_data_dir:
+        if "synthetic" in sources:
+            write_synthetic_market_data(synthetic_data_dir, periods=len(pd.read_csv(HALF_HOURLY_CSV)))
+        for source in sources:
+            data_dir = RAW_DATA_DIR if source == "raw" else Path(synthetic_data_dir)
+            for horizon in horizons:
+                # Spawn a fresh process for each case, so peak RSS only covers that case
+                with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as executor:
+                    case = executor.submit(_run_case, data_dir, horizon, builder, **solver_options).result()
+                cases.append({"source": source, **case})
+
+    return {
+        "commit": _git_commit(),
+        "timestamp": pd.Timestamp.now(tz="UTC").isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "builder": builder,
+        "solver_options": solver_options,
+        "cases": cases,
+    }
+
+
+def _run_case(data_dir: Path, horizon: str | None, builder: str, **solver_options) -> dict:
+    phases = {}
+    end = None if horizon is None else START + pd.Timedelta(horizon)
+    battery_config = load_battery_config(BATTERY_CONFIG_CSV)
+    market_data = _measure(
+        phases, "load_market_data", load_market_data,
+        data_dir / "half-hourly-market.csv", data_dir / "hourly-market.csv", end=end,
+    )
+    model_class = BUILDERS[builder]
+    model = _measure(phases, f"{model_class.__name__}.__init__", model_class, battery_config, market_data)
+    _measure(phases, "solve", model.solve, **solver_options)
+    _measure(phases, "solution_to_dataframe", model.solution_to_dataframe)
+    _measure(phases, "financial_summary", model.financial_summary)
+    with tempfile.TemporaryDirectory() as output_dir:
+        _measure(phases, "solution_to_excel", model.solution_to_excel, Path(output_dir) / "solution.xlsx")
+
+    stats = model.stats.to_dict()
+    return {
+        "horizon": horizon,
+        "timesteps": len(market_data),
+        "termination_condition": model.termination_condition,
+        "objective": model.objective.value if builder == "linopy" else model.objective_value,
+        "model_phases": stats.pop("timings"),
+        "matrix": stats,
+        "phases": phases,
+    }
+
+
+def _measure(phases: dict, name: str, func, *args, **kwargs):
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    phases[name] = {"wall_time_s": time.perf_counter() - start, "peak_rss_mb": _peak_rss_mb()}
+    return result
+
+
+def _peak_rss_mb() -> float:
+    # ru_maxrss is in kilobytes on Linux, but bytes on macOS
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return max_rss / 1024 ** (2 if sys.platform == "darwin" else 1)
+
+
+def _git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], cwd=Path(__file__).parent, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(argv: list[str] | None = None):
+    """Run the benchmark suite from the command line."""
+    parser = argparse.ArgumentParser(description=(__doc__ or "").partition("\n")[0])
+    parser.add_argument(
+        "--horizons", nargs="+", default=HORIZONS,
+        type=lambda horizon: None if horizon == "full" else horizon,
+        help="Horizon lengths, as Pandas timedelta strings, or 'full' for the full market data.",
+    )
+    parser.add_argument("--sources", nargs="+", default=SOURCES, choices=SOURCES, help="Market data sources.")
+    parser.add_argument("--builder", default="linopy", choices=list(BUILDERS), help="Model builder.")
+    parser.add_argument("--time-limit", type=float, help="Time limit of each solve (s).")
+    parser.add_argument("--output", type=Path, default=Path("benchmark.json"), help="Path to write JSON results to.")
+    args = parser.parse_args(argv)
+
+    solver_options = {"output_flag": False} if args.builder == "sparse" else {"progress": False, "output_flag": False}
+    if args.time_limit is not None:
+        solver_options["time_limit"] = args.time_limit
+    results = run_benchmark(args.horizons, args.sources, args.builder, **solver_options)
+    args.output.write_text(json.dumps(results, indent=2))
+    for case in results["cases"]:
+        timings = ", ".join(f"{name} {phase['wall_time_s']:.3f}s" for name, phase in case["phases"].items())
+        print(f"{case['source']} {case['horizon'] or 'full'} ({case['timesteps']} timesteps): {timings}")
+
+
+if __name__ == "__main__":
+    main()
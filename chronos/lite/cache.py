@@ -0,0 +1,255 @@
+"""Run Cache.
+
+This module provides an opt-in on-disk cache of solved runs, keyed by a SHA-256 hash of the battery configuration, the
+market data prices, the model options and the solver options, so that repeated runs are loaded rather than re-solved.
+
+Each run is stored as a single compressed NumPy archive, with one array per solution column, and the financial summary
+as JSON. Archives are written to a temporary file and atomically renamed into place, so concurrent writers never expose
+a partially written run. Once the cache exceeds its size limit, runs are evicted least recently used first, by
+modification time, which is refreshed whenever a run is loaded.
+
+Archives which can't be read, e.g. truncated by a full disk, are treated as cache misses and deleted, and eviction also
+deletes temporary files left behind by writers which were interrupted.
+"""
+import hashlib
+import json
+import os
+import tempfile
+import time
+import zipfile
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from chronos.lite.model import INITIAL_STORED_ENERGY, Model, solution_to_excel
+from chronos.lite.plot import MAX_POINTS, plot_solution
+
+#: Version of cached runs, to be incremented whenever the model formulation or solution format changes
+CACHE_VERSION = 1
+
+#: Default maximum total size of cached runs (bytes)
+MAX_CACHE_BYTES = 1 << 30
+
+#: Solver options which do not affect the solution, so are excluded from cache keys
+IGNORED_SOLVER_OPTIONS = {"progress", "progress_callback", "output_flag", "log_to_console"}
+
+#: Age after which a temporary file is assumed to be left behind by an interrupted writer, and deleted on eviction (s)
+STALE_TEMPORARY_FILE_AGE = 60 * 60
+
+
+class CachedRun:
+    """Solution of a run, either loaded from the cache or freshly solved."""
+    def __init__(self, battery_config: dict, solution_df: pd.DataFrame, summary: pd.Series, hit: bool):
+        """Setup class.
+
+        :param battery_config: Battery configuration dictionary.
+        :param solution_df: Solution dataframe, with the same columns as `Model.solution_to_dataframe()`.
+        :param summary: Financial summary, as returned by `Model.financial_summary()`.
+        :param hit: Whether the run was loaded from the cache.
+        """
+        self.battery_config = battery_config
+        self.solution_df = solution_df
+        self.summary = summary
+        self.hit = hit
+
+    @property
+    def objective(self) -> float:
+        """Objective value of the solution, comparable with `Model.objective.value`."""
+        return (self.solution_df["Export revenue"] - self.solution_df["Import cost"]).sum()
+
+    def plot_solution(self, max_points: int | None = MAX_POINTS):
+        """Plot the solution.
+
+        :param max_points: Maximum number of points plotted per trace. If None, every timestep is plotted.
+        """
+        plot_solution(self.solution_df, max_points=max_points)
+
+    def solution_to_dataframe(self) -> pd.DataFrame:
+        """Output the solution as a Pandas DataFrame."""
+        return self.solution_df
+
+    def financial_summary(self) -> pd.Series:
+        """Return the financial summary of the solution."""
+        return self.summary
+
+    def solution_to_excel(self, path: os.PathLike):
+        """Output the solution to an Excel file."""
+        solution_to_excel(path, self.solution_df, self.battery_config, self.summary)
+
+
+class RunCache:
+    """On-disk cache of solved runs, with size-based least recently used eviction."""
+    def __init__(self, cache_dir: os.PathLike, max_bytes: int = MAX_CACHE_BYTES):
+        """Setup class.
+
+        :param cache_dir: Directory in which to cache runs, created if it doesn't exist.
+        :param max_bytes: Maximum total size of cached runs (bytes).
+        """
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+
+    def path(self, key: str) -> Path:
+        """Return the path of the archive of a cached run."""
+        return self.cache_dir / f"run-{key}.npz"
+
+    def get(self, key: str) -> tuple[pd.DataFrame, pd.Series] | None:
+        """Load a cached run, returning its solution dataframe and financial summary, or None if not cached.
+
+        An archive which can't be read is deleted and treated as not cached.
+
+        :param key: Cache key, as returned by `run_key()`.
+        """
+        path = self.path(key)
+        try:
+            with np.load(path, allow_pickle=False) as archive:
+                metadata = json.loads(archive["metadata"].item())
+                index = pd.DatetimeIndex(archive["index"].view("datetime64[ns]"), name=metadata["index_name"])
+                solution_df = pd.DataFrame(
+                    {column: archive[f"column_{i}"] for i, column in enumerate(metadata["columns"])}, index=index
+                )
+            summary = pd.Series({name: _decode(value) for name, value in metadata["summary"].items()}, dtype=object)
+            # Refresh modification time, which orders eviction
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        except (OSError, EOFError, ValueError, KeyError, zipfile.BadZipFile):
+            path.unlink(missing_ok=True)
+            return None
+        return solution_df, summary
+
+    def put(self, key: str, solution_df: pd.DataFrame, summary: pd.Series):
+        """Cache a run, then evict least recently used runs until the cache is within its size limit.
+
+        :param key: Cache key, as returned by `run_key()`.
+        :param solution_df: Solution dataframe.
+        :param summary: Financial summary.
+        """
+        metadata = {
+            "version": CACHE_VERSION,
+            "index_name": solution_df.index.name,
+            "columns": list(solution_df.columns),
+            "summary": {name: _encode(value) for name, value in summary.items()},
+        }
+        arrays = {f"column_{i}": solution_df[column].to_numpy() for i, column in enumerate(solution_df.columns)}
+        with tempfile.NamedTemporaryFile(dir=self.cache_dir, suffix=".tmp", delete=False) as f:
+            np.savez_compressed(
+                f, metadata=np.array(json.dumps(metadata)), index=pd.DatetimeIndex(solution_df.index).asi8, **arrays
+            )
+        os.replace(f.name, self.path(key))
+        self.evict(keep=key)
+
+    def evict(self, keep: str | None = None):
+        """Evict least recently used runs until the cache is within its size limit, and delete stale temporary files.
+
+        :param keep: Key of a run which is never evicted, e.g. the run just cached.
+        """
+        now = time.time()
+        for path in self.cache_dir.glob("*.tmp"):
+            try:
+                if now - path.stat().st_mtime > STALE_TEMPORARY_FILE_AGE:
+                    path.unlink(missing_ok=True)
+            except FileNotFoundError:
+                # Renamed into place by its writer
+                continue
+
+        entries = []
+        for path in self.cache_dir.glob("run-*.npz"):
+            try:
+                entries.append((path.stat(), path))
+            except FileNotFoundError:
+                # Evicted by another process
+                continue
+        total_bytes = sum(stat.st_size for stat, _ in entries)
+        for stat, path in sorted(entries, key=lambda entry: entry[0].st_mtime_ns):
+            if total_bytes <= self.max_bytes:
+                break
+            if keep is not None and path == self.path(keep):
+                continue
+            path.unlink(missing_ok=True)
+            total_bytes -= stat.st_size
+
+
+def run_key(battery_config: dict, market_data: pd.DataFrame, model_options: dict, solver_options: dict) -> str:
+    """Return a stable hash of everything which determines the solution of a run.
+
+    :param battery_config: Battery configuration dictionary.
+    :param market_data: Market data dataframe.
+    :param model_options: Keyword arguments passed to `Model()`, other than the battery configuration and market data.
+    :param solver_options: Keyword arguments passed to `Model.solve()`. Options in `IGNORED_SOLVER_OPTIONS` are
+        excluded.
+    """
+    digest = hashlib.sha256()
+    digest.update(json.dumps({
+        "version": CACHE_VERSION,
+        "battery_config": battery_config,
+        "model_options": {k: v for k, v in model_options.items() if k != "binary_mask"},
+        "solver_options": {k: v for k, v in solver_options.items() if k not in IGNORED_SOLVER_OPTIONS},
+        "columns": list(market_data.columns),
+    }, sort_keys=True, default=str).encode())
+    digest.update(pd.DatetimeIndex(market_data.index).asi8.tobytes())
+    for column in market_data.columns:
+        digest.update(np.ascontiguousarray(market_data[column].to_numpy(dtype=float)).tobytes())
+    if model_options.get("binary_mask") is not None:
+        digest.update(np.asarray(model_options["binary_mask"], dtype=bool).tobytes())
+    return digest.hexdigest()
+
+
+def solve_cached(
+    battery_config: dict,
+    market_data: pd.DataFrame,
+    cache_dir: os.PathLike,
+    max_bytes: int = MAX_CACHE_BYTES,
+    initial_stored_energy: float = INITIAL_STORED_ENERGY,
+    terminal_stored_energy: float | None = None,
+    binary_mask: pd.Series | None = None,
+    **solver_options,
+) -> CachedRun:
+    """Load a run from the cache, or solve and cache it if it is not already cached.
+
+    Only optimal solutions are cached.
+
+    :param battery_config: Battery configuration dictionary.
+    :param market_data: Market data dataframe.
+    :param cache_dir: Directory in which to cache runs.
+    :param max_bytes: Maximum total size of cached runs (bytes).
+    :param initial_stored_energy: Stored energy in the battery at the start of the first timestep (MWh).
+    :param terminal_stored_energy: If given, stored energy in the battery at the end of the last timestep (MWh).
+    :param binary_mask: Boolean series over time, True where "is charging"/"is discharging" binaries are declared.
+    :param solver_options: Keyword arguments passed to `Model.solve()`.
+    """
+    model_options = {
+        "initial_stored_energy": initial_stored_energy,
+        "terminal_stored_energy": terminal_stored_energy,
+        "binary_mask": binary_mask,
+    }
+    cache = RunCache(cache_dir, max_bytes)
+    key = run_key(battery_config, market_data, model_options, solver_options)
+    cached = cache.get(key)
+    if cached is not None:
+        return CachedRun(battery_config, *cached, hit=True)
+
+    model = Model(battery_config, market_data, **model_options)
+    model.solve(**solver_options)
+    if model.status != "ok":
+        raise RuntimeError(f"Optimisation failed: {model.termination_condition}")
+    solution_df = model.solution_to_dataframe()
+    summary = model.financial_summary()
+    if model.termination_condition == "optimal":
+        cache.put(key, solution_df, summary)
+    return CachedRun(battery_config, solution_df, summary, hit=False)
+
+
+def _encode(value):
+    if isinstance(value, pd.Timestamp):
+        return {"timestamp": value.isoformat()}
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+
+def _decode(value):
+    if isinstance(value, dict):
+        return pd.Timestamp(value["timestamp"])
+    return value
@@ -2,11 +2,42 @@
 
 This module provides utility functions for loading battery configuration and market data files.
 
+Market data holds the prices of any number of markets, each with its own settlement interval. Every timestep takes the
+price of the settlement period of each market that it falls in.
+
+Market data can optionally be cached in a directory (e.g. `data/processed`) as memory-mapped NumPy arrays of int64
+timestamps and float64 prices. The cache is ingested once from the CSV files, and re-ingested only when the contents of
+a CSV file change, as detected from its modification time and SHA-256 hash.
 """
+import hashlib
+import json
 import os
+import tempfile
+from collections.abc import Mapping
+from pathlib import Path
 
+import numpy as np
 import pandas as pd
 
+#: Default markets, by name, with the settlement interval over which the price and rates of each market are fixed
+MARKETS = {"30": pd.Timedelta("30min"), "60": pd.Timedelta("1h")}
+
+
+def price_column(market: str) -> str:
+    """Return the market data column name of the prices of a market.
+
+    market: Market name, by convention its settlement interval in minutes.
+    """
+    return f"Price {market} min (£/MWh)"
+
+
+def solution_markets(solution_df: pd.DataFrame) -> list[str]:
+    """Return the names of the markets of a solution dataframe, from its charge rate columns.
+
+    solution_df: Solution dataframe, as returned by `Model.solution_to_dataframe()`.
+    """
+    return [column.removeprefix("charge rate ") for column in solution_df.columns if column.startswith("charge rate ")]
+
 
 def load_battery_config(path: os.PathLike) -> dict:
     """Load battery config from CSV file.
@@ -16,13 +47,32 @@ def load_battery_config(path: os.PathLike) -> dict:
     return pd.read_csv(path, index_col=0)["Values"].to_dict()
 
 
-def load_market_data(half_hourly_csv: os.PathLike, hourly_csv: os.PathLike, nrows: int | None = None) -> pd.DataFrame:
+def load_market_data(
+    half_hourly_csv: os.PathLike | None = None,
+    hourly_csv: os.PathLike | None = None,
+    nrows: int | None = None,
+    start: str | pd.Timestamp | None = None,
+    end: str | pd.Timestamp | None = None,
+    cache_dir: os.PathLike | None = None,
+    csvs: Mapping[str, os.PathLike] | None = None,
+    markets: Mapping[str, str | pd.Timedelta] = MARKETS,
+) -> pd.DataFrame:
     """Load market data from CSV file.
 
-    half_hourly_csv: Path to CSV file containing half-hourly price data.
-    hourly_csv: Path to CSV file containing hourly price data.
-   
-    CSV files should both be of the format:
+    half_hourly_csv: Path to CSV file containing half-hourly price data, of the "30" market.
+    hourly_csv: Path to CSV file containing hourly price data, of the "60" market.
+    nrows: If given, only load this many rows of the market with the shortest settlement interval, counted from `start`
+        if given. Must be a whole number of settlement periods of every market.
+    start: If given, only load data from this time onwards (inclusive).
+    end: If given, only load data before this time (exclusive).
+    cache_dir: If given, load data via a memory-mapped cache in this directory, ingesting the CSV files into it first
+        if they are not already cached. Prices loaded from the cache are read-only views of the cache files.
+    csvs: Paths to CSV files containing price data, by market name. Alternative to `half_hourly_csv` and `hourly_csv`.
+    markets: Settlement interval of each market, by market name.
+
+    Timesteps are those of the market with the shortest settlement interval.
+
+    CSV files should all be of the format:
         ```
         Datetime, Price (£/MWh)
         dd/mm/YYYY HH:MM, #.#
@@ -38,35 +88,178 @@ def load_market_data(half_hourly_csv: os.PathLike, hourly_csv: os.PathLike, nrow
         18/09/2018 03:00, 51.6
         ```
     """
-    if nrows is not None and nrows % 2 != 0:
-        raise ValueError("nrows must be even")
-
-    half_hourly_market_series = pd.read_csv(
-        half_hourly_csv,
-        index_col=0,
-        skiprows=1,
-        nrows=nrows,
-        names=["Price 30 min (£/MWh)"],
-    ).iloc[:, 0]
-    half_hourly_market_series.index = pd.to_datetime(half_hourly_market_series.index, format="%d/%m/%Y %H:%M")
-    hourly_market_series = pd.read_csv(  # ty: ignore [no-matching-overload]
-        hourly_csv,
-        index_col=0,
-        skiprows=1,
-        nrows=(nrows/2 if nrows is not None else None),
-        names=["Price 60 min (£/MWh)"],
-    ).iloc[:, 0]
-    hourly_market_series.index = pd.to_datetime(hourly_market_series.index, format="%d/%m/%Y %H:%M")
-
-    aligned_hourly_market_series = pd.concat([
-        hourly_market_series,
-        hourly_market_series.set_axis(hourly_market_series.index + pd.to_timedelta(30, unit='m')),
-    ]).sort_index()
-
-    index = half_hourly_market_series.index
+    csvs = _market_csvs(half_hourly_csv, hourly_csv, csvs)
+    intervals = _settlement_intervals(csvs, markets)
+    if nrows is not None and any(nrows * min(intervals.values()) % interval for interval in intervals.values()):
+        raise ValueError("nrows must be a whole number of settlement periods of every market")
+
+    if cache_dir is None:
+        df = _read_market_data_csvs(csvs, intervals, nrows=(nrows if start is None and end is None else None))
+        if start is not None:
+            df = df[df.index >= pd.Timestamp(start)]
+        if end is not None:
+            df = df[df.index < pd.Timestamp(end)]
+        return df if nrows is None else df.iloc[:nrows]
+
+    cache_path = ingest_market_data(csvs, cache_dir, markets=markets)
+    return load_market_data_arrays(cache_path, nrows=nrows, start=start, end=end)
+
+
+def _market_csvs(
+    half_hourly_csv: os.PathLike | None,
+    hourly_csv: os.PathLike | None,
+    csvs: Mapping[str, os.PathLike] | None,
+) -> dict[str, os.PathLike]:
+    if csvs is None:
+        if half_hourly_csv is None or hourly_csv is None:
+            raise ValueError("Either csvs, or both half_hourly_csv and hourly_csv, must be given")
+        return {"30": half_hourly_csv, "60": hourly_csv}
+    if half_hourly_csv is not None or hourly_csv is not None:
+        raise ValueError("csvs cannot be given with half_hourly_csv or hourly_csv")
+    return dict(csvs)
+
+
+def _settlement_intervals(
+    csvs: Mapping[str, os.PathLike], markets: Mapping[str, str | pd.Timedelta]
+) -> dict[str, pd.Timedelta]:
+    missing = set(csvs) - set(markets)
+    if missing:
+        raise ValueError(f"No settlement interval given for markets: {sorted(missing)}")
+    return {market: pd.Timedelta(markets[market]) for market in csvs}
+
+
+def save_market_data_arrays(market_data: pd.DataFrame, path: os.PathLike):
+    """Save market data as NumPy arrays of int64 timestamps and float64 prices, which can be memory-mapped.
+
+    market_data: Market data dataframe, with rows at the finest market's settlement interval.
+    path: Directory in which to save the arrays.
+    """
+    path = Path(path)
+    path.mkdir(parents=True, exist_ok=True)
+    _save_atomic(path / "time.npy", pd.DatetimeIndex(market_data.index).asi8)
+    _save_atomic(path / "prices.npy", np.ascontiguousarray(market_data.to_numpy(dtype=float).T))
+    _write_atomic(path / "columns.json", json.dumps(list(market_data.columns)).encode())
+
+
+def load_market_data_arrays(
+    path: os.PathLike,
+    nrows: int | None = None,
+    start: str | pd.Timestamp | None = None,
+    end: str | pd.Timestamp | None = None,
+) -> pd.DataFrame:
+    """Load market data saved by `save_market_data_arrays()`, memory-mapped and without copying.
+
+    path: Directory containing the arrays.
+    nrows: If given, only load this many rows at the finest market's settlement interval, counted from `start` if
+        given.
+    start: If given, only load data from this time onwards (inclusive).
+    end: If given, only load data before this time (exclusive).
+    """
+    path = Path(path)
+    time = np.load(path / "time.npy", mmap_mode="r")
+    prices = np.load(path / "prices.npy", mmap_mode="r")
+    columns = json.loads((path / "columns.json").read_text())
+    first = 0 if start is None else np.searchsorted(time, pd.Timestamp(start).value, side="left")
+    last = len(time) if end is None else np.searchsorted(time, pd.Timestamp(end).value, side="left")
+    if nrows is not None:
+        last = min(last, first + nrows)
+
+    # Prices are stored one market per row, so the transposed slice is a single column-major block, which pandas
+    # wraps without copying
+    index = pd.DatetimeIndex(time[first:last].view("datetime64[ns]"), name="time")
+    return pd.DataFrame(prices[:, first:last].T, index=index, columns=columns, copy=False)
+
+
+def ingest_market_data(
+    csvs: Mapping[str, os.PathLike],
+    cache_dir: os.PathLike,
+    markets: Mapping[str, str | pd.Timedelta] = MARKETS,
+) -> Path:
+    """Ingest market data CSV files into a memory-mapped cache, unless already cached and up to date.
+
+    csvs: Paths to CSV files containing price data, by market name.
+    cache_dir: Directory in which to cache market data.
+    markets: Settlement interval of each market, by market name.
+
+    Returns the path of the cache for this set of CSV files.
+    """
+    intervals = _settlement_intervals(csvs, markets)
+    sources = [Path(csv).resolve() for csv in csvs.values()]
+    cache_key = hashlib.sha256("\n".join(
+        f"{market} {intervals[market].value} {source}" for market, source in zip(csvs, sources)
+    ).encode()).hexdigest()[:16]
+    cache_path = Path(cache_dir) / f"market-data-{cache_key}"
+    manifest_path = cache_path / "manifest.json"
+
+    # Cheap check on modification time and size, falling back to the content hash if either has changed
+    manifest = json.loads(manifest_path.read_text()) if manifest_path.exists() else None
+    if manifest is not None:
+        stats = [source.stat() for source in sources]
+        if all(
+            entry["mtime_ns"] == stat.st_mtime_ns and entry["size"] == stat.st_size
+            for entry, stat in zip(manifest["sources"], stats)
+        ):
+            return cache_path
+        if all(entry["sha256"] == _file_sha256(source) for entry, source in zip(manifest["sources"], sources)):
+            manifest["sources"] = [_source_entry(source) for source in sources]
+            _write_atomic(manifest_path, json.dumps(manifest, indent=2).encode())
+            return cache_path
+
+    save_market_data_arrays(_read_market_data_csvs(dict(zip(csvs, sources)), intervals), cache_path)
+    # Manifest is written last, so an interrupted ingest is retried by the next load
+    manifest = {"sources": [_source_entry(source) for source in sources]}
+    _write_atomic(manifest_path, json.dumps(manifest, indent=2).encode())
+    return cache_path
+
+
+def _read_market_data_csvs(
+    csvs: Mapping[str, os.PathLike], intervals: Mapping[str, pd.Timedelta], nrows: int | None = None
+) -> pd.DataFrame:
+    finest = min(intervals, key=intervals.get)
+    market_series = {}
+    for market, csv in csvs.items():
+        series = pd.read_csv(  # ty: ignore [no-matching-overload]
+            csv,
+            index_col=0,
+            skiprows=1,
+            nrows=(nrows * intervals[finest] // intervals[market] if nrows is not None else None),
+            names=[price_column(market)],
+        ).iloc[:, 0]
+        series.index = pd.to_datetime(series.index, format="%d/%m/%Y %H:%M")
+        market_series[market] = series
+
+    index = market_series[finest].index
     index.name = "time"
 
+    # Each timestep takes the price of the settlement period of each market that it falls in
     return pd.DataFrame({
-        "Price 30 min (£/MWh)": half_hourly_market_series,
-        "Price 60 min (£/MWh)": aligned_hourly_market_series,
+        price_column(market): (
+            series if market == finest else series.reindex(index.floor(intervals[market])).to_numpy()
+        )
+        for market, series in market_series.items()
     }, index=index)
+
+
+def _source_entry(source: Path) -> dict:
+    stat = source.stat()
+    return {"path": str(source), "mtime_ns": stat.st_mtime_ns, "size": stat.st_size, "sha256": _file_sha256(source)}
+
+
+def _file_sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _save_atomic(path: Path, array: np.ndarray):
+    with tempfile.NamedTemporaryFile(dir=path.parent, suffix=".npy", delete=False) as f:
+        np.save(f, array)
+    os.replace(f.name, path)
+
+
+def _write_atomic(path: Path, content: bytes):
+    with tempfile.NamedTemporaryFile(dir=path.parent, delete=False) as f:
+        f.write(content)
+    os.replace(f.name, path)
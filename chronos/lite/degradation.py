@@ -0,0 +1,210 @@
+"""Cycle Counting and Battery Degradation.
+
+This module counts the charge/discharge cycles of a solution, and simulates a battery over its lifetime as its storage
+volume degrades with use.
+
+Cycles are counted as equivalent full cycles, from the energy throughput of the stored energy profile: one cycle is
+charging and discharging the max storage volume, in any number of steps. Degradation is linear in cycles, so counting
+throughput gives the same degradation as depth-weighted rainflow counting, without extracting the cycles themselves.
+
+The lifetime simulation solves the market data period by period, e.g. month by month. After each period, the max storage
+volume is lowered by the cycles counted so far, and the stored energy left at the end of the period seeds the next
+period. The simulation stops at end of life, when the battery has run through its lifetime in cycles or in years.
+"""
+from collections.abc import Mapping
+
+import numpy as np
+import pandas as pd
+
+from chronos.lite.data import MARKETS
+from chronos.lite.model import INITIAL_STORED_ENERGY, financial_summary
+from chronos.lite.plot import MAX_POINTS, plot_solution
+from chronos.lite.rolling import final_stored_energy
+from chronos.lite.sparse import BUILDERS
+
+
+def throughput_cycles(stored_energy: np.ndarray, max_storage_volume: float) -> np.ndarray:
+    """Return the equivalent full cycles of each timestep of stored energy profiles.
+
+    :param stored_energy: Stored energy at the start of each timestep and at the end of the last timestep, along the
+        last axis (MWh). Any leading axes are separate profiles, e.g. scenarios or grid points.
+    :param max_storage_volume: Max storage volume which one cycle charges and discharges (MWh).
+    :returns: Cycles of each timestep, along the last axis, which is one shorter than `stored_energy`.
+    """
+    return np.abs(np.diff(stored_energy, axis=-1)) / (2 * max_storage_volume)
+
+
+def count_cycles(
+    solution_df: pd.DataFrame, battery_config: dict, markets: Mapping[str, str | pd.Timedelta] = MARKETS
+) -> pd.Series:
+    """Return the equivalent full cycles of each timestep of a solution.
+
+    :param solution_df: Solution dataframe, as returned by `Model.solution_to_dataframe()`.
+    :param battery_config: Battery configuration dictionary, with the max storage volume one cycle charges and
+        discharges, e.g. the original max storage volume over a lifetime simulation.
+    :param markets: Settlement interval of each market the solution was optimised with, by market name.
+    """
+    stored_energy = np.append(
+        solution_df["stored energy"].to_numpy(), final_stored_energy(solution_df, battery_config, markets)
+    )
+    return pd.Series(
+        throughput_cycles(stored_energy, battery_config["Max storage volume"]), index=solution_df.index, name="cycles"
+    )
+
+
+def degraded_storage_volume(battery_config: dict, cycles: float) -> float:
+    """Return the max storage volume left after a number of cycles.
+
+    :param battery_config: Battery configuration dictionary, with the original max storage volume.
+    :param cycles: Cycles run through so far.
+    """
+    degradation = battery_config["Storage volume degradation rate"] / 100 * cycles
+    return float(battery_config["Max storage volume"] * max(1 - degradation, 0.0))
+
+
+class LifetimeSolution:
+    """Solution stitched together from the periods of a lifetime simulation."""
+    def __init__(
+        self, battery_config: dict, solution_df: pd.DataFrame, periods: pd.DataFrame, end_of_life: pd.Timestamp | None
+    ):
+        """Setup class.
+
+        :param battery_config: Battery configuration dictionary, with the original max storage volume.
+        :param solution_df: Stitched solution dataframe, with the same columns as `Model.solution_to_dataframe()`.
+        :param periods: Max storage volume, cycles and profit of each period, indexed by period start.
+        :param end_of_life: Timestep during which the battery reached end of life, if it did within the market data.
+        """
+        self.battery_config = battery_config
+        self.solution_df = solution_df
+        self.periods = periods
+        self.end_of_life = end_of_life
+
+    @property
+    def objective(self) -> float:
+        """Objective value of the stitched solution, comparable with `Model.objective.value`."""
+        return (self.solution_df["Export revenue"] - self.solution_df["Import cost"]).sum()
+
+    @property
+    def cycles(self) -> float:
+        """Cycles run through over the whole simulation."""
+        return self.periods["Cycles"].sum()
+
+    def plot_solution(self, max_points: int | None = MAX_POINTS):
+        """Plot the stitched solution.
+
+        :param max_points: Maximum number of points plotted per trace. If None, every timestep is plotted.
+        """
+        plot_solution(self.solution_to_dataframe(), max_points=max_points)
+
+    def solution_to_dataframe(self) -> pd.DataFrame:
+        """Output the stitched solution as a Pandas DataFrame."""
+        return self.solution_df
+
+    def financial_summary(self) -> pd.Series:
+        """Return a financial summary of the stitched solution as a Pandas Series, with cycles and end of life."""
+        summary = financial_summary(self.solution_df, self.battery_config)
+        summary["Cycles"] = self.cycles
+        summary["Final storage volume"] = degraded_storage_volume(self.battery_config, self.cycles)
+        summary["End of life"] = self.end_of_life
+        return summary
+
+
+def simulate_lifetime(
+    battery_config: dict,
+    market_data: pd.DataFrame,
+    period: str = "MS",
+    builder: str = "linopy",
+    initial_stored_energy: float = INITIAL_STORED_ENERGY,
+    markets: Mapping[str, str | pd.Timedelta] = MARKETS,
+    **solver_options,
+) -> LifetimeSolution:
+    """Solve the battery optimisation period by period, degrading the max storage volume by the cycles run through.
+
+    :param battery_config: Battery configuration dictionary, with the original max storage volume.
+    :param market_data: Market data dataframe.
+    :param period: Frequency of period starts, as a Pandas offset alias, e.g. "MS" for months. Periods must start on
+        the hour.
+    :param builder: Model builder, from `BUILDERS`.
+    :param initial_stored_energy: Stored energy in the battery at the start of the first timestep (MWh).
+    :param markets: Settlement interval of each market, by market name.
+    :param solver_options: Keyword arguments passed to `Model.solve()`, or HiGHS options for the sparse builder.
+    """
+    if builder not in BUILDERS:
+        raise ValueError(f"Unknown builder {builder!r}, expected one of {list(BUILDERS)}")
+    if market_data.empty:
+        raise ValueError("Market data is empty")
+
+    # Calendar end of life, after the lifetime in years
+    time = market_data.index
+    lifetime_end = time[0] + pd.Timedelta(days=365.25 * battery_config["Lifetime (1)"])
+    end_of_life = lifetime_end if time[-1] >= lifetime_end else None
+    market_data = market_data[time < lifetime_end]
+    time = market_data.index
+    if market_data.empty:
+        raise ValueError("Battery reached calendar end of life before the start of the market data")
+
+    starts = pd.DatetimeIndex([time[0]]).union(pd.date_range(time[0], time[-1], freq=period))
+    if (starts != starts.floor("h")).any():
+        raise ValueError("Periods must start on the hour")
+    bounds = [*time.searchsorted(starts), len(time)]
+
+    period_dfs, periods = [], []
+    cycles = 0.0
+    stored_energy = initial_stored_energy
+    for start, stop in zip(bounds[:-1], bounds[1:]):
+        period_config = {**battery_config, "Max storage volume": degraded_storage_volume(battery_config, cycles)}
+        if period_config["Max storage volume"] <= 0:
+            end_of_life = time[start]
+            break
+        period_df = _solve_period(
+            BUILDERS[builder],
+            period_config,
+            market_data.iloc[start:stop],
+            min(stored_energy, period_config["Max storage volume"]),
+            markets,
+            **solver_options,
+        )
+        # Cycles are counted against the original max storage volume, as in `LifetimeSolution.financial_summary()`
+        period_cycles = count_cycles(period_df, battery_config, markets)
+
+        # Cycle end of life part way through the period: keep timesteps up to the one reaching the lifetime in cycles
+        cumulative_cycles = cycles + period_cycles.cumsum().to_numpy()
+        if cumulative_cycles[-1] >= battery_config["Lifetime (2)"]:
+            stop = int(np.searchsorted(cumulative_cycles, battery_config["Lifetime (2)"])) + 1
+            period_df, period_cycles = period_df.iloc[:stop], period_cycles.iloc[:stop]
+            end_of_life = period_df.index[-1]
+
+        period_dfs.append(period_df)
+        periods.append({
+            "Start": period_df.index[0],
+            "Max storage volume": period_config["Max storage volume"],
+            "Cycles": period_cycles.sum(),
+            "Profit": (period_df["Export revenue"] - period_df["Import cost"]).sum(),
+        })
+        cycles += period_cycles.sum()
+        stored_energy = final_stored_energy(period_df, period_config, markets)
+        if end_of_life is not None and end_of_life <= period_df.index[-1]:
+            break
+
+    if not period_dfs:
+        raise ValueError(f"Battery reached end of life at {end_of_life}, before any market data was solved")
+    solution_df = pd.concat(period_dfs)
+    solution_df.index.name = time.name
+    return LifetimeSolution(battery_config, solution_df, pd.DataFrame(periods).set_index("Start"), end_of_life)
+
+
+def _solve_period(
+    model_class: type,
+    battery_config: dict,
+    market_data: pd.DataFrame,
+    initial_stored_energy: float,
+    markets: Mapping[str, str | pd.Timedelta],
+    **solver_options,
+) -> pd.DataFrame:
+    model = model_class(battery_config, market_data, initial_stored_energy=initial_stored_energy, markets=markets)
+    model.solve(**solver_options)
+    if model.termination_condition != "optimal":
+        raise RuntimeError(
+            f"Optimisation of period starting {market_data.index.min()} failed: {model.termination_condition}"
+        )
+    return model.solution_to_dataframe()
@@ -0,0 +1,254 @@
+"""Dynamic Programming Model.
+
+This module provides an approximate alternative to the `Model` MILP, which solves the same battery arbitrage problem
+by backward induction over a discretised stored energy grid, using NumPy only.
+
+Each half-hourly timestep moves the battery between stored energy grid points. The rate committed to the hourly market
+is chosen from a discretised grid at the first timestep of each hour and carried in the state for the rest of the
+hour, which enforces the full-hour commitment. The half-hourly market rate is continuous: it makes up whatever
+difference remains between the hourly market flow and the stored energy transition.
+
+Every grid transition is feasible for `Model`, so the dynamic programming objective is a lower bound on the MILP
+optimum, converging on it as the grid is refined. Runtime is linear in the number of timesteps.
+"""
+import os
+
+import numpy as np
+import pandas as pd
+
+from chronos.lite.model import (
+    INITIAL_STORED_ENERGY,
+    TIMESTEP_DURATION,
+    Model,
+    add_financial_columns,
+    financial_summary,
+    solution_to_excel,
+)
+from chronos.lite.plot import MAX_POINTS, plot_solution
+
+#: Tolerance when checking feasibility of grid transitions
+FEASIBILITY_TOLERANCE = 1e-9
+
+
+class DynamicProgrammingModel:
+    """Dynamic programming model class, with the same inputs and solution outputs as `Model`."""
+    def __init__(
+        self,
+        battery_config: dict,
+        market_data: pd.DataFrame,
+        soc_resolution: int = 41,
+        rate_resolution: int = 11,
+        initial_stored_energy: float = INITIAL_STORED_ENERGY,
+    ):
+        """Setup class.
+
+        :param battery_config: Battery configuration dictionary.
+        :param market_data: Market data dataframe.
+        :param soc_resolution: Number of stored energy grid points, evenly spaced between 0 and max storage volume.
+            The initial stored energy is added as a grid point if it falls between them.
+        :param rate_resolution: Number of hourly market rate grid points in each of the charging and discharging
+            directions, including zero.
+        :param initial_stored_energy: Stored energy in the battery at the start of the first timestep (MWh).
+        """
+        if soc_resolution < 2 or rate_resolution < 2:
+            raise ValueError("soc_resolution and rate_resolution must be at least 2")
+        if not 0 <= initial_stored_energy <= battery_config["Max storage volume"]:
+            raise ValueError("initial_stored_energy must be between 0 and max storage volume")
+
+        # Internalise source data and configuration
+        self.time = market_data.index
+        self.battery_config = battery_config
+        self.market_data = market_data
+        self.initial_stored_energy = initial_stored_energy
+        self.solution = None
+        self.objective_value = None
+        self._solution_df = None
+
+        # Set up grids. The initial stored energy is an exact grid point, so the schedule starts from the same state
+        # as `Model` and every transition stays feasible for it.
+        self.stored_energy_grid = np.union1d(
+            np.linspace(0, battery_config["Max storage volume"], soc_resolution), [initial_stored_energy]
+        )
+        # Signed hourly market rate: positive for charging, negative for discharging
+        self.hourly_rate_grid = np.concatenate([
+            -battery_config["Max discharging rate"] * np.linspace(1, 0, rate_resolution)[:-1],
+            battery_config["Max charging rate"] * np.linspace(0, 1, rate_resolution),
+        ])
+
+        # Set up transition rewards
+        self._init_transitions()
+
+    def _init_transitions(self):
+        # Rates and market coefficients for every (stored energy, next stored energy, hourly rate) transition
+        rates = self._transition_rates(
+            self.stored_energy_grid[:, None, None],
+            self.stored_energy_grid[None, :, None],
+            self.hourly_rate_grid[None, None, :],
+        )
+        charge_30, discharge_30, charge_60, discharge_60 = rates
+        charge = charge_30 + charge_60
+        discharge = discharge_30 + discharge_60
+        stored_energy = self.stored_energy_grid[:, None, None]
+
+        # Transitions must respect the same constraints as `Model`
+        feasible = (
+            ((charge <= FEASIBILITY_TOLERANCE) | (discharge <= FEASIBILITY_TOLERANCE))
+            & (charge <= self.battery_config["Max charging rate"] + FEASIBILITY_TOLERANCE)
+            & (discharge <= self.battery_config["Max discharging rate"] + FEASIBILITY_TOLERANCE)
+            & (TIMESTEP_DURATION * discharge <= stored_energy + FEASIBILITY_TOLERANCE)
+            & (TIMESTEP_DURATION * charge
+               <= self.battery_config["Max storage volume"] - stored_energy + FEASIBILITY_TOLERANCE)
+        )
+
+        # Profit of a transition = price 30 * coefficient 30 + price 60 * coefficient 60, as in `Model` objective
+        discharge_efficiency = 1 - self.battery_config["Battery discharging loss"]
+        charge_efficiency = 1 - self.battery_config["Battery charging loss"]
+        self._coefficient_30 = np.where(
+            feasible, discharge_30 * discharge_efficiency - charge_30 / charge_efficiency, 0
+        )
+        self._coefficient_60 = (discharge_60 * discharge_efficiency - charge_60 / charge_efficiency)[0, 0, :]
+        self._penalty = np.where(feasible, 0, -np.inf)
+
+    def _transition_rates(self, stored_energy, next_stored_energy, hourly_rate):
+        """Return the charge/discharge rates in each market which move stored energy between two values."""
+        charge_efficiency = 1 - self.battery_config["Battery charging loss"]
+        charge_60 = np.maximum(hourly_rate, 0)
+        discharge_60 = np.maximum(-hourly_rate, 0)
+        remaining_energy_flow = (
+            next_stored_energy - stored_energy
+            - TIMESTEP_DURATION * (charge_60 * charge_efficiency - discharge_60)
+        )
+        charge_30 = np.maximum(remaining_energy_flow, 0) / (TIMESTEP_DURATION * charge_efficiency)
+        discharge_30 = np.maximum(-remaining_energy_flow, 0) / TIMESTEP_DURATION
+        return np.broadcast_arrays(charge_30, discharge_30, charge_60, discharge_60)
+
+    def solve(self) -> tuple[str, str]:
+        """Solve the model by backward induction, then recover the optimal schedule by a forward pass.
+
+        The schedule is optimal over the grids, not proven optimal for `Model`, so the termination condition is
+        "approximate".
+        """
+        n_stored_energy = len(self.stored_energy_grid)
+        n_rate = len(self.hourly_rate_grid)
+        price_30 = self.market_data["Price 30 min (£/MWh)"].to_numpy(dtype=float)
+        price_60 = self.market_data["Price 60 min (£/MWh)"].to_numpy(dtype=float)
+
+        # The hourly market rate is carried over from the previous timestep within the same hour
+        hour = self.time.floor("h")
+        continues_hour = np.zeros(len(self.time), dtype=bool)
+        continues_hour[1:] = hour[1:] == hour[:-1]
+
+        # Backward induction. `value` is indexed by (stored energy, hourly rate in force).
+        value = np.zeros((n_stored_energy, n_rate))
+        policy_dtype = np.int16 if n_stored_energy * n_rate < np.iinfo(np.int16).max else np.int32
+        continuing_policy = np.empty((continues_hour.sum(), n_stored_energy, n_rate), dtype=policy_dtype)
+        starting_policy = np.empty(((~continues_hour).sum(), n_stored_energy), dtype=policy_dtype)
+        i_continuing, i_starting = len(continuing_policy), len(starting_policy)
+        for t in range(len(self.time) - 1, -1, -1):
+            q = (
+                price_30[t] * self._coefficient_30
+                + (price_60[t] * self._coefficient_60 + value)[None, :, :]
+                + self._penalty
+            )
+            if continues_hour[t]:
+                # Choose next stored energy only, for each hourly rate already committed
+                i_continuing -= 1
+                best = q.argmax(axis=1)
+                continuing_policy[i_continuing] = best
+                value = np.take_along_axis(q, best[:, None, :], axis=1)[:, 0, :]
+            else:
+                # Choose next stored energy and the hourly rate for the hour
+                i_starting -= 1
+                q = q.reshape(n_stored_energy, -1)
+                best = q.argmax(axis=1)
+                starting_policy[i_starting] = best
+                value = np.repeat(q[np.arange(n_stored_energy), best][:, None], n_rate, axis=1)
+
+        # Forward pass
+        i_stored_energy = np.zeros(len(self.time) + 1, dtype=int)
+        i_stored_energy[0] = np.searchsorted(self.stored_energy_grid, self.initial_stored_energy)
+        i_rate = np.zeros(len(self.time), dtype=int)
+        for t in range(len(self.time)):
+            if continues_hour[t]:
+                i_rate[t] = i_rate[t - 1]
+                i_stored_energy[t + 1] = continuing_policy[i_continuing][i_stored_energy[t], i_rate[t]]
+                i_continuing += 1
+            else:
+                i_stored_energy[t + 1], i_rate[t] = divmod(
+                    int(starting_policy[i_starting][i_stored_energy[t]]), n_rate
+                )
+                i_starting += 1
+        self.objective_value = float(value[i_stored_energy[0], 0])
+        self._solution_df = None
+
+        stored_energy = self.stored_energy_grid[i_stored_energy]
+        charge_30, discharge_30, charge_60, discharge_60 = self._transition_rates(
+            stored_energy[:-1], stored_energy[1:], self.hourly_rate_grid[i_rate]
+        )
+        self.solution = pd.DataFrame(
+            {
+                "is charging": (charge_30 + charge_60 > FEASIBILITY_TOLERANCE).astype(float),
+                "is discharging": (discharge_30 + discharge_60 > FEASIBILITY_TOLERANCE).astype(float),
+                "charge rate 30": charge_30,
+                "discharge rate 30": discharge_30,
+                "charge rate 60": charge_60,
+                "discharge rate 60": discharge_60,
+                "stored energy": stored_energy[:-1],
+            },
+            index=self.time,
+        )
+        return "ok", "approximate"
+
+    def mip_gap_bound(self, **solver_options) -> pd.Series:
+        """Bound the gap between the dynamic programming objective and the optimum of `Model`.
+
+        The MILP optimum lies between the dynamic programming objective and the optimum of the LP relaxation of
+        `Model`, which is solved here.
+
+        :param solver_options: Keyword arguments passed to `Model.solve()`.
+        """
+        if self.solution is None:
+            raise RuntimeError("Optimisation hasn't been run. Need to run .solve() method.")
+        model = Model(self.battery_config, self.market_data, initial_stored_energy=self.initial_stored_energy)
+        model.solve(solve_relaxation=True, **solver_options)
+        if model.termination_condition != "optimal":
+            raise RuntimeError(f"LP relaxation failed: {model.termination_condition}")
+
+        bound = pd.Series({
+            "Dynamic programming objective": self.objective_value,
+            "LP relaxation bound": model.objective.value,
+        })
+        bound["Absolute gap bound"] = bound["LP relaxation bound"] - bound["Dynamic programming objective"]
+        bound["Relative gap bound"] = bound["Absolute gap bound"] / abs(bound["LP relaxation bound"])
+        return bound
+
+    def plot_solution(self, max_points: int | None = MAX_POINTS):
+        """Plot the solution of the model.
+
+        :param max_points: Maximum number of points plotted per trace. If None, every timestep is plotted.
+        """
+        if self.solution is None:
+            raise RuntimeError("Optimisation hasn't been run. Need to run .solve() method.")
+        plot_solution(self.solution_to_dataframe(), max_points=max_points)
+
+    def solution_to_dataframe(self) -> pd.DataFrame:
+        """Output the solution as a Pandas DataFrame.
+
+        The dataframe is computed once per solve and cached, so should not be modified in place.
+        """
+        if self.solution is None:
+            raise RuntimeError("Optimisation hasn't been run. Need to run .solve() method.")
+        if self._solution_df is None:
+            df = pd.concat([self.market_data, self.solution], axis=1)
+            self._solution_df = add_financial_columns(df, self.battery_config)
+        return self._solution_df
+
+    def financial_summary(self) -> pd.Series:
+        """Return a financial summary of the model solution as a Pandas Series."""
+        return financial_summary(self.solution_to_dataframe(), self.battery_config)
+
+    def solution_to_excel(self, path: os.PathLike):
+        """Output the solution to an Excel file."""
+        if self.solution is None:
+            raise RuntimeError("Optimisation hasn't been run. Need to run .solve() method.")
+        solution_to_excel(path, self.solution_to_dataframe(), self.battery_config)
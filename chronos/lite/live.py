@@ -0,0 +1,187 @@
+"""Receding-horizon Live Optimisation.
+
+This module re-optimises a battery schedule as new market prices arrive and timesteps are executed. Executed timesteps
+are fixed at their realised dispatch and move into the history, and only a look-ahead window of the remaining prices is
+optimised, starting from the stored energy left after the executed timesteps.
+
+The window model is reused between updates whenever its timesteps fall into settlement periods in the same pattern,
+e.g. when the window advances by whole hours and has the same length: new prices and the new initial stored energy are
+swapped into the existing model, which is re-solved warm-started from the previous solution. Otherwise the window model
+is rebuilt. Either way, the work per update depends on the window length, not on how much history has built up.
+"""
+from collections.abc import Mapping
+
+import pandas as pd
+
+from chronos.lite.data import MARKETS
+from chronos.lite.model import (
+    INITIAL_STORED_ENERGY,
+    Model,
+    add_financial_columns,
+    financial_summary,
+    rate_columns,
+    settlement_starts,
+    timestep_duration,
+    total_rates,
+)
+from chronos.lite.plot import MAX_POINTS, plot_solution
+from chronos.lite.rolling import final_stored_energy
+
+
+class LiveModel:
+    """Receding-horizon model, re-optimised over a look-ahead window as prices arrive and timesteps are executed."""
+    def __init__(
+        self,
+        battery_config: dict,
+        market_data: pd.DataFrame,
+        window: str | pd.Timedelta = "1D",
+        initial_stored_energy: float = INITIAL_STORED_ENERGY,
+        markets: Mapping[str, str | pd.Timedelta] = MARKETS,
+        **solver_options,
+    ):
+        """Setup class.
+
+        :param battery_config: Battery configuration dictionary.
+        :param market_data: Market data dataframe of prices known so far.
+        :param window: Length of the look-ahead window optimised by each solve. Must be a whole number of the
+            longest settlement interval of the markets.
+        :param initial_stored_energy: Stored energy in the battery at the start of the first timestep (MWh).
+        :param markets: Settlement interval of each market, by market name.
+        :param solver_options: Keyword arguments passed to `Model.solve()` and `Model.resolve()`.
+        """
+        self.markets = {market: pd.Timedelta(interval) for market, interval in markets.items()}
+        longest_interval = max(self.markets.values())
+        self.window = pd.Timedelta(window)
+        if self.window <= pd.Timedelta(0) or self.window % longest_interval:
+            raise ValueError(f"window must be a positive whole number of {longest_interval}")
+        self.battery_config = battery_config
+        self.market_data = market_data
+        self.stored_energy = initial_stored_energy
+        self.timestep_duration = timestep_duration(self.markets)
+        self.solver_options = solver_options
+        self.model = None
+        self.model_builds = 0
+        self._executed = []
+        self._schedule = None
+
+    def append_market_data(self, market_data: pd.DataFrame):
+        """Append newly arrived prices, which must all be later than the prices known so far.
+
+        :param market_data: Market data dataframe of new prices.
+        """
+        if len(self.market_data) and len(market_data) and market_data.index.min() <= self.market_data.index.max():
+            raise ValueError("New market data must be later than the market data known so far")
+        self.market_data = pd.concat([self.market_data, market_data])
+        self._schedule = None
+
+    def solve(self) -> tuple[str, str]:
+        """Optimise the schedule over the look-ahead window of remaining prices."""
+        if not len(self.market_data):
+            raise RuntimeError("No market data remaining to optimise")
+        time = self.market_data.index
+        window_market_data = self.market_data[time < time[0] + self.window]
+        window_time = window_market_data.index
+
+        if self._can_reuse_model(window_time):
+            # Swap new prices and stored energy into the existing model, keeping its own time labels
+            self.model.update_market_data(window_market_data.set_axis(self.model.time))
+            self.model.update_initial_stored_energy(self.stored_energy)
+            status = self.model.resolve(**self.solver_options)
+        else:
+            self.model = Model(
+                self.battery_config, window_market_data, initial_stored_energy=self.stored_energy, markets=self.markets
+            )
+            self.model_builds += 1
+            status = self.model.solve(**self.solver_options)
+
+        self._schedule = None
+        if self.model.status == "ok":
+            self._schedule = self.model.solution_to_dataframe().set_axis(window_time)
+            self._schedule.index.name = time.name
+        return status
+
+    def _can_reuse_model(self, window_time: pd.DatetimeIndex) -> bool:
+        if self.model is None or self.model.status != "ok" or len(window_time) != len(self.model.time):
+            return False
+        # Timesteps must fall into settlement periods in the same pattern, so committed rates cover the same timesteps
+        window_starts = settlement_starts(window_time, self.markets).values
+        return bool((window_starts == settlement_starts(self.model.time, self.markets).values).all())
+
+    def schedule(self) -> pd.DataFrame:
+        """Return the optimised schedule over the current look-ahead window."""
+        if self._schedule is None:
+            raise RuntimeError("Optimisation hasn't been run. Need to run .solve() method.")
+        return self._schedule
+
+    def execute(
+        self,
+        until: str | pd.Timestamp,
+        realised: pd.DataFrame | None = None,
+        stored_energy: float | None = None,
+    ):
+        """Fix the timesteps before `until` as executed, moving them from the remaining prices into the history.
+
+        :param until: End of the executed timesteps (exclusive). Must be at the start of a settlement period of every
+            market, since rates are committed for the whole settlement period.
+        :param realised: If given, realised charge/discharge rates of the executed timesteps. Defaults to the
+            optimised schedule.
+        :param stored_energy: If given, measured stored energy at `until` (MWh). Defaults to the stored energy implied
+            by the executed rates.
+        """
+        until = pd.Timestamp(until)
+        if any(until != until.floor(interval) for interval in self.markets.values()):
+            raise ValueError("Timesteps can only be executed up to the start of a settlement period of every market")
+        executed_market_data = self.market_data[self.market_data.index < until]
+        if realised is None:
+            schedule = self.schedule()
+            if executed_market_data.index.difference(schedule.index).size:
+                raise ValueError("Executed timesteps must be within the optimised schedule, unless realised is given")
+            executed = schedule[schedule.index < until].copy()
+        else:
+            executed = self._executed_dataframe(
+                executed_market_data, realised.loc[executed_market_data.index, rate_columns(self.markets)]
+            )
+
+        self._executed.append(executed)
+        self.stored_energy = (
+            stored_energy if stored_energy is not None
+            else final_stored_energy(executed, self.battery_config, self.markets) if len(executed)
+            else self.stored_energy
+        )
+        self.market_data = self.market_data[self.market_data.index >= until]
+        self._schedule = None
+
+    def _executed_dataframe(self, market_data: pd.DataFrame, rates: pd.DataFrame) -> pd.DataFrame:
+        charge, discharge = total_rates(rates)
+        net_energy_flow = self.timestep_duration * (
+            charge * (1 - self.battery_config["Battery charging loss"]) - discharge
+        )
+        df = pd.concat([market_data, rates], axis=1)
+        df.insert(len(market_data.columns), "is charging", (charge > 0).astype(float))
+        df.insert(len(market_data.columns) + 1, "is discharging", (discharge > 0).astype(float))
+        df["stored energy"] = self.stored_energy + net_energy_flow.cumsum().shift(fill_value=0.0)
+        return add_financial_columns(df, self.battery_config)
+
+    def history(self) -> pd.DataFrame:
+        """Return the executed timesteps as a solution dataframe."""
+        if not self._executed:
+            raise RuntimeError("No timesteps have been executed. Need to run .execute() method.")
+        return pd.concat(self._executed)
+
+    def solution_to_dataframe(self) -> pd.DataFrame:
+        """Output the executed timesteps followed by the optimised schedule as a Pandas DataFrame."""
+        frames = [*self._executed, *([self._schedule] if self._schedule is not None else [])]
+        if not frames:
+            raise RuntimeError("Optimisation hasn't been run. Need to run .solve() method.")
+        return pd.concat(frames)
+
+    def financial_summary(self) -> pd.Series:
+        """Return a financial summary of the executed timesteps as a Pandas Series."""
+        return financial_summary(self.history(), self.battery_config)
+
+    def plot_solution(self, max_points: int | None = MAX_POINTS):
+        """Plot the executed timesteps followed by the optimised schedule.
+
+        :param max_points: Maximum number of points plotted per trace. If None, every timestep is plotted.
+        """
+        plot_solution(self.solution_to_dataframe(), max_points=max_points)
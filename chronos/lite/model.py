@@ -1,188 +1,715 @@
 """Optimisation Model."""
 
+import functools
+import logging
+import operator
 import os
+import time
+from collections.abc import Callable, Iterable, Iterator, Mapping
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
 
+import highspy
 import linopy
+import numpy as np
 import pandas as pd
+import xarray as xr
+import xlsxwriter
 
-from chronos.lite.plot import plot_solution
+from chronos.lite.data import MARKETS, price_column, solution_markets
+from chronos.lite.plot import MAX_POINTS, plot_solution
 
-#: Assumed minimum duration of a timestep in hours
+logger = logging.getLogger(__name__)
+
+#: Duration of a timestep in hours with the default markets, the shortest settlement interval
 TIMESTEP_DURATION = 0.5
 
 #: Assume initial stored energy in the battery is 0.0 MWh
 INITIAL_STORED_ENERGY = 0.0
 
+#: Rates below this threshold (MW) are treated as zero when detecting simultaneous charging and discharging
+RATE_TOLERANCE = 1e-6
+
+#: Constraints with coefficients or RHS values taken from each battery configuration value
+BATTERY_CONFIG_CONSTRAINTS = {
+    "Max charging rate": ["max charge rate"],
+    "Max discharging rate": ["max discharge rate"],
+    "Max storage volume": ["available storage capacity"],
+    "Battery charging loss": ["energy balance", "terminal stored energy"],
+}
+
+#: Charge/discharge rate variables, each declared per market as "{name} {market}" over its settlement periods
+RATE_VARIABLES = ["charge rate", "discharge rate"]
+
+#: HiGHS options which make repeated solves of the same model reproducible
+DETERMINISTIC_SOLVER_OPTIONS = {"random_seed": 0, "threads": 1, "parallel": "off"}
+
+
+@dataclass
+class ModelStats:
+    """Phase timings and problem size of a `Model`.
+
+    Timings (s) are recorded under the name of each phase as it completes: "init_variables", "init_constraints",
+    "init_objective", "to_highspy" (only when solving with the "direct" io_api), "solve" (including matrix export),
+    "highs_run" (time spent inside HiGHS) and "solution_to_dataframe". Repeated phases overwrite previous timings.
+    """
+    timings: dict[str, float] = field(default_factory=dict)
+    variables: int = 0
+    constraints: int = 0
+    nonzeros: int = 0
+    binaries: int = 0
+
+    def to_dict(self) -> dict:
+        """Return the stats as a dictionary, e.g. for emitting as metrics."""
+        return asdict(self)
+
 
 class Model(linopy.Model):
     """Optimisation Model class, subclassing `linopy.Model`."""
-    def __init__(self, battery_config: dict, market_data: pd.DataFrame):
+    def __init__(
+        self,
+        battery_config: dict,
+        market_data: pd.DataFrame,
+        initial_stored_energy: float = INITIAL_STORED_ENERGY,
+        terminal_stored_energy: float | None = None,
+        binary_mask: pd.Series | None = None,
+        stats_hook: Callable[[str, ModelStats], None] | None = None,
+        markets: Mapping[str, str | pd.Timedelta] = MARKETS,
+    ):
         """Setup class.
 
         :param battery_config: Battery configuration dictionary.
-        :param market_data: Market data dataframe.
+        :param market_data: Market data dataframe, with a price column of every market, and timesteps of the shortest
+            settlement interval.
+        :param initial_stored_energy: Stored energy in the battery at the start of the first timestep (MWh).
+        :param terminal_stored_energy: If given, stored energy in the battery at the end of the last timestep (MWh).
+        :param binary_mask: Boolean series over time, True where "is charging"/"is discharging" binaries are declared.
+            Timesteps without binaries are only subject to the max charge/discharge rates, so charging and
+            discharging are not mutually exclusive there. Defaults to binaries at every timestep.
+        :param stats_hook: If given, called with the name of each phase and `.stats` as each phase completes.
+        :param markets: Settlement interval of each market, by market name. Rates into each market are declared once
+            per settlement period, which commits them to the whole period.
         """
         # Call linopy.Model.__init__() method
         super().__init__(force_dim_names=True)
 
         # Internalise source data and configuration
         self.time = market_data.index
+        self.markets = {market: pd.Timedelta(interval) for market, interval in markets.items()}
+        self.market = pd.Index(list(self.markets), name="market")
+        missing = [price_column(market) for market in self.market if price_column(market) not in market_data.columns]
+        if missing:
+            raise ValueError(f"Market data is missing price columns: {missing}")
+        check_timestep_spacing(self.time, self.markets)
+        self.settlement_period = settlement_periods(self.time, self.markets)
+        self.timestep_duration = timestep_duration(self.markets)
         self.battery_config = battery_config
         self.market_data = market_data
+        self.initial_stored_energy = initial_stored_energy
+        self.terminal_stored_energy = terminal_stored_energy
+        self.binary_mask = pd.Series(True if binary_mask is None else binary_mask, index=self.time, dtype=bool)
+
+        # Warm start state for `.resolve()`
+        self._warmstart_values = None
+        self._warmstart_basis = None
+        self._resolved = False
+
+        # Progress callback for `.solve()`
+        self._progress_callback = None
+
+        # Solution dataframe, cached until the model is re-solved
+        self._solution_df = None
+
+        # Phase timings and problem size
+        self.stats = ModelStats()
+        self.stats_hook = stats_hook
 
         # Set up model
-        self._init_variables()
-        self._init_constraints()
-        self._init_objective()
+        with self._timed("init_variables"):
+            self._init_variables()
+        with self._timed("init_constraints"):
+            self._init_constraints()
+        with self._timed("init_objective"):
+            self._init_objective()
+        self._update_stats_size()
 
 
+    @contextmanager
+    def _timed(self, phase: str) -> Iterator[None]:
+        start = time.perf_counter()
+        yield
+        self._record_timing(phase, time.perf_counter() - start)
+
+    def _record_timing(self, phase: str, seconds: float):
+        self.stats.timings[phase] = seconds
+        logger.debug("Model phase %s took %.3fs", phase, seconds)
+        if self.stats_hook is not None:
+            self.stats_hook(phase, self.stats)
+
+    def _update_stats_size(self):
+        self.stats.variables = self.nvars
+        self.stats.constraints = self.ncons
+        # Masked rows keep their terms, so only count terms of rows which are passed to the solver
+        self.stats.nonzeros = sum(
+            int(((constraint.vars != -1) & (constraint.labels != -1)).sum())
+            for _, constraint in self.constraints.items()
+        )
+        self.stats.binaries = self.binaries.nvars
+
+    def _coords(self, *indexes: pd.Index) -> list[pd.Index]:
+        """Return the coordinates of variables indexed by `indexes`, e.g. the market and time indexes."""
+        return list(indexes)
+
     def _init_variables(self):
         # Declare boolean decision variables - constraints will ensure charging and discharging are mutually exclusive
-        self.add_variables(binary=True, coords=[self.time], name="is charging")
-        self.add_variables(binary=True, coords=[self.time], name="is discharging")
+        self.add_variables(binary=True, coords=self._coords(self.time), name="is charging", mask=self.binary_mask)
+        self.add_variables(binary=True, coords=self._coords(self.time), name="is discharging",
+                           mask=self.binary_mask)
 
-        # Declare continuous variables for charging and discharging rates, into half-hourly and hourly markets
+        # Declare continuous variables for charging and discharging rates into each market
         # These are all bounded between 0 and the maximum charging/discharging rate
-        self.add_variables(lower=0, upper=self.battery_config["Max charging rate"], coords=[self.time],
-                           name="charge rate 30")
-        self.add_variables(lower=0, upper=self.battery_config["Max discharging rate"], coords=[self.time],
-                           name="discharge rate 30")
-        self.add_variables(lower=0, upper=self.battery_config["Max charging rate"], coords=[self.time],
-                           name="charge rate 60")
-        self.add_variables(lower=0, upper=self.battery_config["Max discharging rate"], coords=[self.time],
-                           name="discharge rate 60")
+        # Rates are declared once per settlement period of their market, which commits them to the full period
+        max_rates = {"charge rate": "Max charging rate", "discharge rate": "Max discharging rate"}
+        for market in self.market:
+            for name in RATE_VARIABLES:
+                self.add_variables(lower=0, upper=self.battery_config[max_rates[name]],
+                                   coords=self._coords(self.settlement_period[market]), name=f"{name} {market}")
+
+        # Broadcast each market's rates onto the timesteps, aligned by the settlement period each timestep falls in
+        self.rates = {
+            name: {market: self._broadcast(self.variables[f"{name} {market}"], market) for market in self.market}
+            for name in RATE_VARIABLES
+        }
+
+        # Total charging and discharging rates across all markets
+        self.charge_rate = functools.reduce(operator.add, self.rates["charge rate"].values())
+        self.discharge_rate = functools.reduce(operator.add, self.rates["discharge rate"].values())
+
+        # Declare stored energy (state of charge) at the start of each timestep, bounded by the storage volume
+        self.add_variables(lower=0, upper=self.battery_config["Max storage volume"],
+                           coords=self._coords(self.time), name="stored energy")
 
     def _init_constraints(self):
-        # Calculate stored energy as an expression which will be useful later
-        self.stored_energy = (
-            INITIAL_STORED_ENERGY +
-            TIMESTEP_DURATION * (
-                (self.variables["charge rate 30"] + self.variables["charge rate 60"])
-                * (1 - self.battery_config["Battery charging loss"])
-                -
-                (self.variables["discharge rate 30"] + self.variables["discharge rate 60"])
-            ).shift(time=1).cumsum()
-        )
+        # Stored energy is an explicit state-of-charge variable, so each constraint row only refers to one timestep
+        self.stored_energy = self.variables["stored energy"]
 
         # Charging cannot occur at the same time as discharging
         self.add_constraints(
             self.variables["is charging"] + self.variables["is discharging"] <= 1,
-            name="charge/discharge exclusive"
+            name="charge/discharge exclusive",
+            mask=self.binary_mask,
         )
 
-        # Combined charging rate across both markets cannot exceed max charging rate
-        # Also charging cannot occur at the same time as discharging, due to "is charging" decision variable
+        # Cannot discharge more in a given timestep than the remaining available stored energy
         self.add_constraints(
-            self.variables["charge rate 30"] + self.variables["charge rate 60"]
-            <= self.variables["is charging"] * self.battery_config["Max charging rate"],
-            name="max charge rate"
+            self.timestep_duration * self.discharge_rate <= self.stored_energy,
+            name="available stored energy"
         )
 
-        # Combined discharging rate across both markets cannot exceed max discharging rate
-        # Also charging cannot occur at the same time as discharging, due to "is discharging" decision variable
-        self.add_constraints(
-            self.variables["discharge rate 30"] + self.variables["discharge rate 60"]
-            <= self.variables["is discharging"] * self.battery_config["Max discharging rate"],
-            name="max discharge rate"
-        )
+        # Constraints with coefficients or RHS values taken from the battery configuration
+        for name, constraint in self._battery_config_constraints().items():
+            self.add_constraints(constraint, name=name)
 
-        # Cannot discharge more in a given timestep than the remaining available stored energy
-        self.add_constraints(
-            TIMESTEP_DURATION * (self.variables["discharge rate 30"] + self.variables["discharge rate 60"])
-            <= self.stored_energy,
-            name="available stored energy"
+    def _battery_config_constraints(self, names: set[str] | None = None) -> dict:
+        """Build the constraints which depend on the battery configuration, optionally only those named."""
+        constraints = {}
+
+        # Energy balance: stored energy at the start of each timestep is the stored energy at the start of the previous
+        # timestep plus the net energy flow during it. The shifted terms are missing for the first timestep, so that
+        # row pins the stored energy to its initial value.
+        net_energy_flow = self.timestep_duration * (
+            self.charge_rate * (1 - self.battery_config["Battery charging loss"]) - self.discharge_rate
         )
+        if names is None or "energy balance" in names:
+            initial_stored_energy = pd.Series(0.0, index=self.time)
+            initial_stored_energy.iloc[0] = self.initial_stored_energy
+            constraints["energy balance"] = (
+                self.stored_energy - self.stored_energy.shift(time=1) - net_energy_flow.shift(time=1)
+                == initial_stored_energy
+            )
+
+        # Optionally pin the stored energy left in the battery at the end of the horizon
+        if self.terminal_stored_energy is not None and (names is None or "terminal stored energy" in names):
+            constraints["terminal stored energy"] = (
+                (self.stored_energy + net_energy_flow).isel(time=[-1]) == self.terminal_stored_energy
+            )
+
+        # Combined charging rate across both markets cannot exceed max charging rate
+        # Also charging cannot occur at the same time as discharging, due to "is charging" decision variable
+        # Where binaries are masked out, their terms are missing and the constant term bounds the rate instead
+        if names is None or "max charge rate" in names:
+            constraints["max charge rate"] = (
+                self.charge_rate
+                <= self.variables["is charging"] * self.battery_config["Max charging rate"]
+                + ~self.binary_mask * self.battery_config["Max charging rate"]
+            )
+
+        # Combined discharging rate across both markets cannot exceed max discharging rate
+        # Also charging cannot occur at the same time as discharging, due to "is discharging" decision variable
+        if names is None or "max discharge rate" in names:
+            constraints["max discharge rate"] = (
+                self.discharge_rate
+                <= self.variables["is discharging"] * self.battery_config["Max discharging rate"]
+                + ~self.binary_mask * self.battery_config["Max discharging rate"]
+            )
 
         # Cannot charge more in a given timestep than the remaining available storage capacity
-        self.add_constraints(
-            TIMESTEP_DURATION * (self.variables["charge rate 30"] + self.variables["charge rate 60"])
-            <= self.battery_config["Max storage volume"] - self.stored_energy,
-            name="available storage capacity"
-        )
+        if names is None or "available storage capacity" in names:
+            constraints["available storage capacity"] = (
+                self.timestep_duration * self.charge_rate
+                <= self.battery_config["Max storage volume"] - self.stored_energy
+            )
 
-        # Charging/discharging with hourly market commits to the full hour
-        # TODO this is broken if the first half-hourly datapoint isn't aligned to the first half-hour, e.g. 00:00
-        self.add_constraints(
-            lhs=self.variables["charge rate 60"][::2],
-            sign="=",
-            rhs=self.variables["charge rate 60"][1::2],
-            name="60 min charge full hour"
-        )
-        self.add_constraints(
-            lhs=self.variables["discharge rate 60"][::2],
-            sign="=",
-            rhs=self.variables["discharge rate 60"][1::2],
-            name="60 min discharge full hour"
-        )
+        return constraints
 
     def _init_objective(self):
-        # Declare our objective: to maximise profit.
+        # Declare our objective: to maximise profit, summed over every market.
         # Profit for a given market =
         #   (market price) * ( (discharge rate * discharge efficiency) - (charge rate / charge efficiency) )
-        self.add_objective(
-            (
-                self.market_data["Price 30 min (£/MWh)"] * (
-                    self.variables["discharge rate 30"] * (1 - self.battery_config["Battery discharging loss"])
-                    - self.variables["charge rate 30"] / (1 - self.battery_config["Battery charging loss"])
-                ) +
-                self.market_data["Price 60 min (£/MWh)"] * (
-                    self.variables["discharge rate 60"] * (1 - self.battery_config["Battery discharging loss"])
-                    - self.variables["charge rate 60"] / (1 - self.battery_config["Battery charging loss"])
-                )
-            ),
-            sense="max",
+        prices = self._prices()
+        profits = [
+            prices.sel(market=market, drop=True) * (
+                self.rates["discharge rate"][market] * (1 - self.battery_config["Battery discharging loss"])
+                - self.rates["charge rate"][market] / (1 - self.battery_config["Battery charging loss"])
+            )
+            for market in self.market
+        ]
+        self.add_objective(functools.reduce(operator.add, profits), sense="max", overwrite=True)
+
+    def _broadcast(self, rates, market: str):
+        """Broadcast rates indexed by the settlement periods of a market onto the timesteps, by timestamp."""
+        period = self.settlement_period[market]
+        return rates.sel({period.name: xr.DataArray(self.time.floor(self.markets[market]), coords=[self.time])})
+
+    def _prices(self) -> xr.DataArray:
+        """Return the prices of each market, by market and time, as weighted in the objective."""
+        return xr.DataArray(
+            self.market_data[[price_column(market) for market in self.market]].to_numpy().T,
+            coords=[self.market, self.time],
         )
 
-    def plot_solution(self):
-        """Plot the solution of the model."""
+    def update_market_data(self, market_data: pd.DataFrame):
+        """Swap the market prices of the model in place, ready to be re-solved with `.resolve()`.
+
+        :param market_data: Market data dataframe, with the same index as the current market data.
+        """
+        if not market_data.index.equals(self.time):
+            raise ValueError("Market data index must match the model time index")
+        self.market_data = market_data
+        self._init_objective()
+
+    def update_initial_stored_energy(self, initial_stored_energy: float):
+        """Change the initial stored energy of the model in place, ready to be re-solved with `.resolve()`.
+
+        :param initial_stored_energy: Stored energy in the battery at the start of the first timestep (MWh).
+        """
+        self.initial_stored_energy = initial_stored_energy
+        self.constraints["energy balance"].rhs = self._battery_config_constraints({"energy balance"})[
+            "energy balance"
+        ].rhs
+
+    def update_battery_config(self, changes: dict):
+        """Change battery configuration values of the model in place, ready to be re-solved with `.resolve()`.
+
+        Only the variable bounds, constraint coefficients and RHS values, and objective coefficients which depend on the
+        changed values are updated. Constraint and variable labels are unchanged, so a previous solution remains a
+        valid warm start.
+
+        :param changes: Battery configuration values to change, by key.
+        """
+        self.battery_config = {**self.battery_config, **changes}
+
+        # Variable bounds
+        for market in self.market:
+            if "Max charging rate" in changes:
+                self.variables[f"charge rate {market}"].upper = self.battery_config["Max charging rate"]
+            if "Max discharging rate" in changes:
+                self.variables[f"discharge rate {market}"].upper = self.battery_config["Max discharging rate"]
+        if "Max storage volume" in changes:
+            self.variables["stored energy"].upper = self.battery_config["Max storage volume"]
+
+        # Constraint coefficients and RHS values
+        names = {
+            name
+            for key, key_names in BATTERY_CONFIG_CONSTRAINTS.items() if key in changes
+            for name in key_names
+        }
+        for name, constraint in self._battery_config_constraints(names).items():
+            self.constraints[name].lhs = constraint.lhs
+            self.constraints[name].rhs = constraint.rhs
+
+        # Objective coefficients
+        if "Battery charging loss" in changes or "Battery discharging loss" in changes:
+            self._init_objective()
+
+    def solve(
+        self,
+        *args,
+        time_limit: float | None = None,
+        mip_rel_gap: float | None = None,
+        threads: int | None = None,
+        deterministic: bool = False,
+        progress_callback: Callable[[dict], None] | None = None,
+        **kwargs,
+    ) -> tuple[str, str]:
+        """Solve the model, optionally trading solution quality for latency.
+
+        If the time limit is reached, the best solution found so far is kept, with status "ok" and termination
+        condition "time_limit". The final gap is available from `.mip_gap` and `.financial_summary()`.
+
+        :param time_limit: Maximum solve time (s).
+        :param mip_rel_gap: Relative gap between the best solution and the bound at which to stop.
+        :param threads: Number of threads used by HiGHS.
+        :param deterministic: If True, solve single-threaded with a fixed random seed, so repeated solves return the
+            same solution. Overrides `threads`.
+        :param progress_callback: Called while HiGHS runs, with a dictionary of the "Running time" (s), best
+            "Objective" so far, "Bound" on the objective and relative "Gap" between them. Requires the "direct" io_api,
+            which is used by default when given.
+        :param args: Positional arguments passed to `linopy.Model.solve()`.
+        :param kwargs: Keyword arguments passed to `linopy.Model.solve()`, including other HiGHS options.
+        """
+        settings = {"time_limit": time_limit, "mip_rel_gap": mip_rel_gap, "threads": threads}
+        kwargs.update({k: v for k, v in settings.items() if v is not None})
+        if deterministic:
+            kwargs.update(DETERMINISTIC_SOLVER_OPTIONS)
+        if progress_callback is not None and len(args) < 2:
+            kwargs.setdefault("io_api", "direct")
+        self._progress_callback = progress_callback
+        self._solution_df = None
+        self._update_stats_size()
+        try:
+            with self._timed("solve"):
+                status = super().solve(*args, **kwargs)
+        finally:
+            self._progress_callback = None
+        # Only HiGHS reports the run time of the solver itself
+        if isinstance(self.solver_model, highspy.Highs):
+            self._record_timing("highs_run", self.solver_model.getRunTime())
+        return status
+
+    @property
+    def mip_gap(self) -> float:
+        """Relative gap between the objective and the bound proven by HiGHS, zero for an optimal LP.
+
+        NaN if the model was not solved by HiGHS, which is the only solver reporting its gap.
+        """
+        if self.status == "initialized":
+            raise RuntimeError("Optimisation hasn't been run. Need to run .solve() method.")
+        if not isinstance(self.solver_model, highspy.Highs):
+            return float("nan")
+        info = self.solver_model.getInfo()
+        # No branch-and-bound nodes are run when solving an LP, or the LP relaxation of a MILP
+        if info.mip_node_count < 0 and self.termination_condition == "optimal":
+            return 0.0
+        return info.mip_gap
+
+    def resolve(self, **solver_options) -> tuple[str, str]:
+        """Re-solve the model after in-place updates, warm-started from the previous solution.
+
+        The previous solution is passed to HiGHS as a starting incumbent, and for an LP solved by a previous
+        `.resolve()`, the previous basis is also reused.
+
+        :param solver_options: Keyword arguments passed to `.solve()`.
+        """
+        if self.status != "ok":
+            raise RuntimeError("Optimisation hasn't been run. Need to run .solve() method.")
+        # Previous column values, indexed by variable label
+        warmstart_values = np.full(
+            max(variable.labels.max().item() for _, variable in self.variables.items()) + 1, np.nan
+        )
+        for _, variable in self.variables.items():
+            labels = variable.labels.values.ravel()
+            warmstart_values[labels[labels >= 0]] = variable.solution.values.ravel()[labels >= 0]
+        self._warmstart_values = warmstart_values
+        self._warmstart_basis = self.solver_model.getBasis() if self._resolved else None
+        try:
+            status = self.solve(io_api="direct", **solver_options)
+        finally:
+            self._warmstart_values = self._warmstart_basis = None
+        self._resolved = True
+        return status
+
+    def to_highspy(self, *args, **kwargs):
+        """Export the model to HiGHS, setting any warm start from `.resolve()` and progress callback from `.solve()`."""
+        with self._timed("to_highspy"):
+            h = super().to_highspy(*args, **kwargs)
+        if self._progress_callback is not None:
+            _set_progress_callback(h, self._progress_callback)
+        if self._warmstart_values is not None:
+            solution = highspy.HighsSolution()
+            solution.col_value = np.nan_to_num(self._warmstart_values[self.matrices.vlabels]).tolist()
+            solution.value_valid = True
+            h.setSolution(solution)
+            if self._warmstart_basis is not None and self._warmstart_basis.valid and _is_lp(h):
+                h.setBasis(self._warmstart_basis)
+        return h
+
+    def plot_solution(self, max_points: int | None = MAX_POINTS):
+        """Plot the solution of the model.
+
+        :param max_points: Maximum number of points plotted per trace. If None, every timestep is plotted.
+        """
         if self.solution is None:
             raise RuntimeError("Optimisation hasn't been run. Need to run .solve() method.")
-        plot_solution(self.solution_to_dataframe())
+        plot_solution(self.solution_to_dataframe(), max_points=max_points)
 
     def solution_to_dataframe(self) -> pd.DataFrame:
-        """Output the solution as a Pandas DataFrame."""
+        """Output the solution as a Pandas DataFrame.
+
+        The dataframe is computed once per solve and cached, so should not be modified in place.
+        """
         if self.solution is None:
             raise RuntimeError("Optimisation hasn't been run. Need to run .solve() method.")
-        model_solution_df = self.solution.to_dataframe()
-        stored_energy_df = self.stored_energy.solution.to_dataframe()
-        stored_energy_df.columns = ["stored energy"]
-        df = pd.concat([self.market_data, model_solution_df, stored_energy_df], axis=1)
-        df["Export revenue"] = (
-            df["Price 30 min (£/MWh)"] * df["discharge rate 30"] * (
-                1 - self.battery_config["Battery discharging loss"])
-            +
-            df["Price 60 min (£/MWh)"] * df["discharge rate 60"] * (
-                    1 - self.battery_config["Battery discharging loss"])
-        )
-        df["Import cost"] = (
-            df["Price 30 min (£/MWh)"] * df["charge rate 30"] / (1 - self.battery_config["Battery charging loss"])
-            +
-            df["Price 60 min (£/MWh)"] * df["charge rate 60"] / (1 - self.battery_config["Battery charging loss"])
-        )
-        return df
-
-    def financial_summary(self) -> pd.DataFrame:
-        """Return a financial summary of the model solution as a Pandas DataFrame."""
-        df = self.solution_to_dataframe()
-        financial_df = df[["Export revenue", "Import cost"]].sum()
-        financial_df["Capex"] = self.battery_config["Capex"]
-        nanoseconds_per_year = 365.25 * 24 * 3600 * 10 ** 9
-        financial_df["Opex"] = (
-            self.battery_config["Fixed Operational Costs"]
-            * (self.time.max() - self.time.min()).value / nanoseconds_per_year
+        if self._solution_df is None:
+            with self._timed("solution_to_dataframe"):
+                self._solution_df = self._build_solution_dataframe()
+        return self._solution_df
+
+    def _build_solution_dataframe(self) -> pd.DataFrame:
+        columns = {column: self.market_data[column].to_numpy() for column in self.market_data.columns}
+        columns.update(self._solution_columns())
+        return add_financial_columns(pd.DataFrame(columns, index=self.time), self.battery_config)
+
+    def _solution_columns(self) -> dict[str, np.ndarray]:
+        """Return flattened solution values by solution dataframe column, with rates broadcast onto the timesteps."""
+        columns = {name: self.solution[name].values.ravel() for name in ["is charging", "is discharging"]}
+        for market in self.market:
+            for name in RATE_VARIABLES:
+                columns[f"{name} {market}"] = self._broadcast(self.solution[f"{name} {market}"], market).values.ravel()
+        columns["stored energy"] = self.solution["stored energy"].values.ravel()
+
+        # Timesteps without binaries report whether the battery charged or discharged
+        charging = sum(columns[f"charge rate {market}"] for market in self.market) > RATE_TOLERANCE
+        discharging = sum(columns[f"discharge rate {market}"] for market in self.market) > RATE_TOLERANCE
+        columns["is charging"] = np.where(np.isnan(columns["is charging"]), charging, columns["is charging"])
+        columns["is discharging"] = np.where(
+            np.isnan(columns["is discharging"]), discharging, columns["is discharging"]
         )
-        financial_df["Total Profit"] = financial_df["Export revenue"] - (
-                financial_df["Import cost"] + financial_df["Opex"] + financial_df["Capex"])
-        financial_df["Start"] = self.time.min()
-        financial_df["End"] = self.time.max()
-        return financial_df
+        return columns
+
+    def financial_summary(self) -> pd.Series:
+        """Return a financial summary of the model solution as a Pandas Series, with the solve status and gap."""
+        summary = financial_summary(self.solution_to_dataframe(), self.battery_config)
+        summary["Termination condition"] = self.termination_condition
+        summary["MIP gap"] = self.mip_gap
+        return summary
 
     def solution_to_excel(self, path: os.PathLike):
         """Output the solution to an Excel file."""
         if self.solution is None:
             raise RuntimeError("Optimisation hasn't been run. Need to run .solve() method.")
-        df = self.solution_to_dataframe()
-        with pd.ExcelWriter(path, engine="xlsxwriter") as writer:
-            pd.Series(self.battery_config).to_excel(writer, sheet_name="Battery Configuration")
-            df.to_excel(writer, sheet_name="Run Data")
-            self.financial_summary().to_excel(writer, sheet_name="Financial Summary")
+        solution_to_excel(path, self.solution_to_dataframe(), self.battery_config, self.financial_summary())
+
+
+def _is_lp(h: highspy.Highs) -> bool:
+    return all(integrality == highspy.HighsVarType.kContinuous for integrality in h.getLp().integrality_)
+
+
+def _set_progress_callback(h: highspy.Highs, progress_callback: Callable[[dict], None]):
+    def callback(callback_type, message, data_out, data_in, user_data):
+        progress_callback({
+            "Running time": data_out.running_time,
+            "Objective": data_out.mip_primal_bound,
+            "Bound": data_out.mip_dual_bound,
+            "Gap": data_out.mip_gap,
+        })
+
+    h.setCallback(callback, None)
+    h.startCallback(highspy.cb.HighsCallbackType.kCallbackMipImprovingSolution)
+    h.startCallback(highspy.cb.HighsCallbackType.kCallbackMipInterrupt)
+
+
+def settlement_starts(time: pd.DatetimeIndex, markets: Mapping[str, pd.Timedelta]) -> xr.DataArray:
+    """Return whether each timestep starts a settlement period of each market, by market and time.
+
+    The first timestep always starts a settlement period, even if it falls part way through one.
+
+    :param time: Date-time index of the timesteps.
+    :param markets: Settlement interval of each market, by market name.
+    """
+    starts = np.ones((len(markets), len(time)), dtype=bool)
+    for i, interval in enumerate(markets.values()):
+        period = time.to_series().dt.floor(interval).to_numpy()
+        starts[i, 1:] = period[1:] != period[:-1]
+    return xr.DataArray(starts, coords=[pd.Index(list(markets), name="market"), time])
+
+
+def settlement_periods(time: pd.DatetimeIndex, markets: Mapping[str, pd.Timedelta]) -> dict[str, pd.Index]:
+    """Return the start of every settlement period of each market which the timesteps fall in, by market.
+
+    Settlement periods are aligned to the clock by timestamp, so the first period starts before the first timestep
+    when that falls part way through a period.
+
+    :param time: Date-time index of the timesteps.
+    :param markets: Settlement interval of each market, by market name.
+    """
+    return {
+        market: pd.Index(time.to_series().dt.floor(interval).unique(), name=f"period {market}")
+        for market, interval in markets.items()
+    }
+
+
+def timestep_duration(markets: Mapping[str, str | pd.Timedelta]) -> float:
+    """Return the duration of a timestep in hours, which is the shortest settlement interval of the markets.
+
+    :param markets: Settlement interval of each market, by market name.
+    """
+    return min(pd.Timedelta(interval) for interval in markets.values()) / pd.Timedelta("1h")
+
+
+def check_timestep_spacing(time: pd.DatetimeIndex, markets: Mapping[str, pd.Timedelta]):
+    """Raise a ValueError unless the timesteps are spaced at the shortest settlement interval of the markets.
+
+    :param time: Date-time index of the timesteps.
+    :param markets: Settlement interval of each market, by market name.
+    """
+    interval = min(pd.Timedelta(interval) for interval in markets.values())
+    if (np.diff(time.to_numpy()) != interval.to_timedelta64()).any():
+        raise ValueError(f"Market data timesteps must be {interval} apart, the shortest settlement interval")
+
+
+def rate_columns(markets: Iterable[str]) -> list[str]:
+    """Return the solution dataframe columns of the charge/discharge rates into each market.
+
+    :param markets: Market names.
+    """
+    return [f"{name} {market}" for market in markets for name in RATE_VARIABLES]
+
+
+def total_rates(solution_df: pd.DataFrame) -> tuple[pd.Series, pd.Series]:
+    """Return the total charge and discharge rates across all markets of a solution dataframe.
+
+    :param solution_df: Solution dataframe, as returned by `Model.solution_to_dataframe()`.
+    """
+    markets = solution_markets(solution_df)
+    return (
+        solution_df[[f"charge rate {market}" for market in markets]].sum(axis=1),
+        solution_df[[f"discharge rate {market}" for market in markets]].sum(axis=1),
+    )
+
+
+def simultaneous_charge_discharge(solution_df: pd.DataFrame) -> pd.Series:
+    """Return a boolean series over time, True where a solution charges and discharges at the same time.
+
+    :param solution_df: Solution dataframe, as returned by `Model.solution_to_dataframe()`.
+    """
+    charge_rate, discharge_rate = total_rates(solution_df)
+    return (charge_rate > RATE_TOLERANCE) & (discharge_rate > RATE_TOLERANCE)
+
+
+def solve_lazy_binaries(
+    battery_config: dict,
+    market_data: pd.DataFrame,
+    window: int = 0,
+    **solver_options,
+) -> Model:
+    """Solve the model as an LP, adding binaries only at timesteps where they turn out to matter.
+
+    Starts from the continuous LP without any "is charging"/"is discharging" binaries. Whenever the solution charges
+    and discharges at the same time, binaries are added at those timesteps, and `window` timesteps either side, and the
+    model is re-solved. Each model is a relaxation of the full MILP, so the first solution which never charges and
+    discharges at the same time is feasible for, and therefore optimal for, the full MILP.
+
+    :param battery_config: Battery configuration dictionary.
+    :param market_data: Market data dataframe.
+    :param window: Number of timesteps either side of each simultaneous charge/discharge to also add binaries to.
+    :param solver_options: Keyword arguments passed to `Model.solve()`.
+    :returns: Solved model, with binaries only where needed.
+    """
+    binary_mask = pd.Series(False, index=market_data.index)
+    while True:
+        model = Model(battery_config, market_data, binary_mask=binary_mask)
+        model.solve(**solver_options)
+        if model.termination_condition != "optimal":
+            raise RuntimeError(f"Optimisation failed: {model.termination_condition}")
+
+        simultaneous = simultaneous_charge_discharge(model.solution_to_dataframe())
+        if not simultaneous.any():
+            return model
+        binary_mask = binary_mask | simultaneous.rolling(2 * window + 1, center=True, min_periods=1).max().astype(bool)
+
+
+def add_financial_columns(solution_df: pd.DataFrame, battery_config: dict) -> pd.DataFrame:
+    """Add export revenue and import cost columns to a solution dataframe, in place.
+
+    :param solution_df: Dataframe of market prices and charge/discharge rates into each market.
+    :param battery_config: Battery configuration dictionary.
+    """
+    df = solution_df
+    markets = solution_markets(df)
+    df["Export revenue"] = sum(
+        df[price_column(market)] * df[f"discharge rate {market}"] * (1 - battery_config["Battery discharging loss"])
+        for market in markets
+    )
+    df["Import cost"] = sum(
+        df[price_column(market)] * df[f"charge rate {market}"] / (1 - battery_config["Battery charging loss"])
+        for market in markets
+    )
+    return df
+
+
+def solution_to_excel(
+    path: os.PathLike,
+    solution_df: pd.DataFrame,
+    battery_config: dict,
+    summary: pd.Series | None = None,
+    chunksize: int = 10_000,
+):
+    """Output a solution to an Excel file, streaming rows to disk.
+
+    Rows are written in xlsxwriter's constant memory mode, which flushes each row to disk once written, so exporting a
+    long solution does not hold a copy of every cell in memory.
+
+    :param path: Path to the Excel file.
+    :param solution_df: Solution dataframe, as returned by `Model.solution_to_dataframe()`.
+    :param battery_config: Battery configuration dictionary.
+    :param summary: Financial summary. Defaults to `financial_summary()` of the solution.
+    :param chunksize: Number of solution rows converted from the dataframe at a time.
+    """
+    if summary is None:
+        summary = financial_summary(solution_df, battery_config)
+    options = {
+        "constant_memory": True,
+        "nan_inf_to_errors": True,
+        "remove_timezone": True,
+        "default_date_format": "yyyy-mm-dd hh:mm:ss",
+    }
+    with xlsxwriter.Workbook(path, options) as workbook:
+        header_format = workbook.add_format({"bold": True})
+        _write_series(workbook.add_worksheet("Battery Configuration"), pd.Series(battery_config), header_format)
+
+        worksheet = workbook.add_worksheet("Run Data")
+        worksheet.write_row(0, 0, [solution_df.index.name, *solution_df.columns], header_format)
+        for start in range(0, len(solution_df), chunksize):
+            chunk = solution_df.iloc[start:start + chunksize]
+            for row, values in enumerate(chunk.itertuples(name=None), start=start + 1):
+                worksheet.write_row(row, 0, values)
+
+        _write_series(workbook.add_worksheet("Financial Summary"), summary, header_format)
+
+
+def _write_series(worksheet, series: pd.Series, header_format):
+    worksheet.write_row(0, 0, [series.index.name, series.name if series.name is not None else 0], header_format)
+    for row, (key, value) in enumerate(series.items(), start=1):
+        worksheet.write_row(row, 0, [key, value])
+
+
+def financial_summary(solution_df: pd.DataFrame, battery_config: dict) -> pd.Series:
+    """Return a financial summary of a solution as a Pandas Series.
+
+    :param solution_df: Solution dataframe, as returned by `Model.solution_to_dataframe()`.
+    :param battery_config: Battery configuration dictionary.
+    """
+    time = solution_df.index
+    financial_df = solution_df[["Export revenue", "Import cost"]].sum()
+    financial_df["Capex"] = battery_config["Capex"]
+    nanoseconds_per_year = 365.25 * 24 * 3600 * 10 ** 9
+    financial_df["Opex"] = (
+        battery_config["Fixed Operational Costs"]
+        * (time.max() - time.min()).value / nanoseconds_per_year
+    )
+    financial_df["Total Profit"] = financial_df["Export revenue"] - (
+            financial_df["Import cost"] + financial_df["Opex"] + financial_df["Capex"])
+    financial_df["Start"] = time.min()
+    financial_df["End"] = time.max()
+    return financial_df
@@ -1,67 +1,100 @@
 """Utility functions to plot data."""
+import numpy as np
 import pandas as pd
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 
+from chronos.lite.data import price_column, solution_markets
+
+#: Default maximum number of points plotted per trace, above which traces are decimated and rendered with WebGL
+MAX_POINTS = 4000
+
+#: Colours of the price traces of each market, in order
+PRICE_COLOURS = ["orange", "purple", "brown", "teal"]
+
+
+def minmax_decimate(y: np.ndarray, max_points: int) -> np.ndarray:
+    """Return indices of a shape-preserving subset of at most roughly `max_points` points of a series.
+
+    The series is split into `max_points // 2` equal buckets, and the minimum and maximum of each bucket are kept, as
+    well as the first and last points, so peaks and troughs survive decimation.
+
+    :param y: Series values. NaN values are only kept if a whole bucket is NaN.
+    :param max_points: Maximum number of points to keep, excluding the first and last points.
+    :returns: Sorted indices of the points to keep.
+    """
+    n = len(y)
+    if n <= max_points:
+        return np.arange(n)
+    n_buckets = max(max_points // 2, 1)
+    bucket_size = -(-n // n_buckets)
+    buckets = np.full(n_buckets * bucket_size, np.nan)
+    buckets[:n] = y
+    buckets = buckets.reshape(n_buckets, bucket_size)
+    offsets = np.arange(n_buckets) * bucket_size
+    i_min = np.where(np.isnan(buckets), np.inf, buckets).argmin(axis=1)
+    i_max = np.where(np.isnan(buckets), -np.inf, buckets).argmax(axis=1)
+    indices = np.unique(np.concatenate([offsets + i_min, offsets + i_max, [0, n - 1]]))
+    return indices[indices < n]
+
 
 def plot_solution(
     solution_df: pd.DataFrame,
+    max_points: int | None = MAX_POINTS,
 ) -> go.Figure:
     """Generate a Plotly figure showing key data from battery optimisation solution.
 
-    Includes four axes:
-    - Market prices (half-hourly and hourly)
+    Includes two axes, then an axis per market:
+    - Market prices of every market
     - Stored energy in the battery
-    - Charge/discharge flow with the half-hourly market
-    - Charge/discharge flow with the hourly market
+    - Charge/discharge flow with each market
+
+    Solutions longer than `max_points` timesteps are plotted with WebGL traces, each decimated to the minimum and
+    maximum of equal time buckets by `minmax_decimate()`, so long horizons render quickly with bounded memory.
+
+    :param solution_df: Solution dataframe, as returned by `Model.solution_to_dataframe()`.
+    :param max_points: Maximum number of points plotted per trace. If None, every timestep is plotted.
     """
+    max_points = len(solution_df) if max_points is None else max_points
+    decimate = len(solution_df) > max_points
+    scatter = go.Scattergl if decimate else go.Scatter
 
-    fig = make_subplots(rows=4, cols=1, shared_xaxes=True, vertical_spacing=0.01)
-    fig.add_trace(
-        go.Scatter(x=solution_df.index, y=solution_df["Price 30 min (£/MWh)"], marker_color="orange",
-                   name="Price 30 min",
-                   line_shape="hv"),
-        row=1, col=1,
-    )
-    fig.add_trace(
-        go.Scatter(x=solution_df.index, y=solution_df["Price 60 min (£/MWh)"], marker=dict(color="purple"),
-                   name="Price 60 min",
-                   line_shape="hv"),
-        row=1, col=1,
-    )
+    def trace(y: pd.Series, **kwargs) -> go.Scatter | go.Scattergl:
+        if decimate:
+            y = y.iloc[minmax_decimate(y.to_numpy(dtype=float), max_points)]
+        return scatter(x=y.index, y=y, **kwargs)
+
+    markets = solution_markets(solution_df)
+    rows = 2 + len(markets)
+    fig = make_subplots(rows=rows, cols=1, shared_xaxes=True, vertical_spacing=0.01)
+    for i, market in enumerate(markets):
+        fig.add_trace(
+            trace(solution_df[price_column(market)], marker_color=PRICE_COLOURS[i % len(PRICE_COLOURS)],
+                  name=f"Price {market} min",
+                  line_shape="hv"),
+            row=1, col=1,
+        )
     fig.add_trace(
-        go.Scatter(x=solution_df.index, y=solution_df["stored energy"], marker_color="blue", fill="tozeroy",
-                   name="Stored Energy"),
+        trace(solution_df["stored energy"], marker_color="blue", fill="tozeroy",
+              name="Stored Energy"),
         row=2, col=1,
     )
-    fig.add_trace(
-        go.Scatter(x=solution_df.index, y=solution_df["charge rate 30"], marker_color="green", fill="tozeroy",
-                   name="Charge rate (30min)",
-                   line_shape="hv"),
-        row=3, col=1,
-    )
-    fig.add_trace(
-        go.Scatter(x=solution_df.index, y=-solution_df["discharge rate 30"], marker_color="red", fill="tozeroy",
-                   name="Discharge rate (30 min)", line_shape="hv"),
-        row=3, col=1,
-    )
-    fig.add_trace(
-        go.Scatter(x=solution_df.index, y=solution_df["charge rate 60"], marker_color="green", fill="tozeroy",
-                   name="Charge rate (60min)",
-                   line_shape="hv"),
-        row=4, col=1,
-    )
-    fig.add_trace(
-        go.Scatter(x=solution_df.index, y=-solution_df["discharge rate 60"], marker_color="red", fill="tozeroy",
-                   name="Discharge rate (60 min)", line_shape="hv"),
-        row=4, col=1,
-    )
-    fig.add_hline(y=0, row=3, col=1)
-    fig.add_hline(y=0, row=4, col=1)
+    for row, market in enumerate(markets, start=3):
+        fig.add_trace(
+            trace(solution_df[f"charge rate {market}"], marker_color="green", fill="tozeroy",
+                  name=f"Charge rate ({market} min)",
+                  line_shape="hv"),
+            row=row, col=1,
+        )
+        fig.add_trace(
+            trace(-solution_df[f"discharge rate {market}"], marker_color="red", fill="tozeroy",
+                  name=f"Discharge rate ({market} min)", line_shape="hv"),
+            row=row, col=1,
+        )
+        fig.add_hline(y=0, row=row, col=1)
+        fig.update_yaxes(title_text=f"Charge/Discharge<br>Power<br>{market}min market<br>(MW)", row=row, col=1)
     fig.update_yaxes(title_text="Price (£/MWh)", row=1, col=1)
     fig.update_yaxes(title_text="Stored Energy<br>(MWh)", row=2, col=1)
-    fig.update_yaxes(title_text="Charge/Discharge<br>Power<br>30min market<br>(MW)", row=3, col=1)
-    fig.update_yaxes(title_text="Charge/Discharge<br>Power<br>60min market<br> (MW)", row=4, col=1)
-    fig.update_layout(autosize=False, width=1200, height=600, margin={"r": 0, "t": 0, "l": 0, "b": 0})
+    fig.update_layout(autosize=False, width=1200, height=150 * rows, margin={"r": 0, "t": 0, "l": 0, "b": 0})
     fig.show()
     return fig
@@ -0,0 +1,158 @@
+"""Rule-based Dispatch Policies.
+
+This module backtests simple operational policies, e.g. price thresholds, daily charge/discharge windows or percentile
+bands, without solving an optimisation model. A policy is a signal over time, from -1 (discharge at the max
+discharging rate) to 1 (charge at the max charging rate), which trades into a single market.
+
+The signal at the start of each settlement period of the market sets the rate committed for the whole period. Rates
+are then limited to those feasible for `Model`: within the max charging/discharging rates, without charging beyond the
+storage volume or discharging beyond the stored energy at any timestep of the period. The stored energy at the start of
+each period depends on the previous period, so that recursion runs period by period; everything else is computed with
+NumPy array operations across the whole horizon.
+
+Dispatch is output with the same columns as `Model.solution_to_dataframe()`, so it can be summarised, plotted and
+compared with the optimum in the same way.
+"""
+from collections.abc import Iterable, Mapping
+
+import numpy as np
+import pandas as pd
+
+from chronos.lite.data import MARKETS
+from chronos.lite.model import (
+    INITIAL_STORED_ENERGY,
+    RATE_TOLERANCE,
+    add_financial_columns,
+    rate_columns,
+    settlement_starts,
+    timestep_duration,
+)
+
+
+def threshold_signal(
+    prices: pd.Series, charge_below: float | np.ndarray, discharge_above: float | np.ndarray
+) -> pd.Series:
+    """Return a signal which charges when prices are below one threshold and discharges when above another.
+
+    :param prices: Prices over time (£/MWh).
+    :param charge_below: Price below which to charge at the max charging rate, or an array of prices over time
+        (£/MWh).
+    :param discharge_above: Price above which to discharge at the max discharging rate, or an array of prices over
+        time (£/MWh).
+    """
+    return pd.Series(
+        np.where(prices < charge_below, 1.0, 0.0) - np.where(prices > discharge_above, 1.0, 0.0), index=prices.index
+    )
+
+
+def time_of_day_signal(
+    time: pd.DatetimeIndex, charge_hours: Iterable[int], discharge_hours: Iterable[int]
+) -> pd.Series:
+    """Return a signal which charges and discharges in fixed daily windows.
+
+    :param time: Date-time index of the timesteps.
+    :param charge_hours: Hours of the day in which to charge at the max charging rate.
+    :param discharge_hours: Hours of the day in which to discharge at the max discharging rate.
+    """
+    hour = time.to_series().dt.hour.to_numpy()
+    return pd.Series(
+        np.isin(hour, list(charge_hours)).astype(float) - np.isin(hour, list(discharge_hours)).astype(float), index=time
+    )
+
+
+def percentile_signal(prices: pd.Series, lower: float = 25, upper: float = 75, freq: str = "1D") -> pd.Series:
+    """Return a signal which charges in a low percentile band of each period's prices, and discharges in a high band.
+
+    Bands are taken over each whole period of prices, e.g. each day, so assume the prices of a period are known in
+    advance, as they are for day-ahead markets.
+
+    :param prices: Prices over time (£/MWh).
+    :param lower: Percentile of each period's prices below which to charge.
+    :param upper: Percentile of each period's prices above which to discharge.
+    :param freq: Length of the periods over which percentiles are taken, as a Pandas offset alias.
+    """
+    if not 0 <= lower <= upper <= 100:
+        raise ValueError("Percentiles must satisfy 0 <= lower <= upper <= 100")
+    period = pd.DatetimeIndex(prices.index.to_series().dt.floor(freq))
+    bands = prices.groupby(period).quantile([lower / 100, upper / 100]).unstack()
+    return threshold_signal(
+        prices,
+        charge_below=bands.iloc[:, 0].reindex(period).to_numpy(),
+        discharge_above=bands.iloc[:, 1].reindex(period).to_numpy(),
+    )
+
+
+def simulate_policy(
+    battery_config: dict,
+    market_data: pd.DataFrame,
+    signal: pd.Series | np.ndarray,
+    market: str = "60",
+    initial_stored_energy: float = INITIAL_STORED_ENERGY,
+    markets: Mapping[str, str | pd.Timedelta] = MARKETS,
+) -> pd.DataFrame:
+    """Dispatch the battery by a policy signal, trading into a single market.
+
+    :param battery_config: Battery configuration dictionary.
+    :param market_data: Market data dataframe.
+    :param signal: Signal over the market data index, from -1 (discharge at the max discharging rate) to 1 (charge at
+        the max charging rate). Only the signal at the start of each settlement period of the market is used. A series
+        must be indexed by the market data index; an array is taken timestep by timestep.
+    :param market: Market traded into.
+    :param initial_stored_energy: Stored energy in the battery at the start of the first timestep (MWh).
+    :param markets: Settlement interval of each market, by market name.
+    :returns: Solution dataframe, with the same columns as `Model.solution_to_dataframe()`.
+    """
+    markets = {name: pd.Timedelta(interval) for name, interval in markets.items()}
+    if market not in markets:
+        raise ValueError(f"Unknown market {market!r}, expected one of {list(markets)}")
+    time = pd.DatetimeIndex(market_data.index)
+    if isinstance(signal, pd.Series):
+        if not signal.index.equals(time):
+            raise ValueError("Signal must be indexed by the market data index")
+        signal = signal.to_numpy()
+    signal = np.asarray(signal, dtype=float)
+    if signal.shape != (len(time),):
+        raise ValueError(f"Signal must have one value per timestep, expected {len(time)} but got {signal.shape}")
+    signal = np.clip(signal, -1.0, 1.0)
+    duration = timestep_duration(markets)
+    efficiency = 1 - battery_config["Battery charging loss"]
+
+    # Settlement periods of the market, each committing its rate for its number of timesteps
+    starts = np.flatnonzero(settlement_starts(time, {market: markets[market]}).values[0])
+    lengths = np.diff(starts, append=len(time))
+    requested_charge = np.maximum(signal[starts], 0.0) * battery_config["Max charging rate"]
+    requested_discharge = np.maximum(-signal[starts], 0.0) * battery_config["Max discharging rate"]
+
+    # Limits on the committed rates per MWh of storage headroom and stored energy at the start of the period. The last
+    # timestep of the period binds: charging must fit in the storage volume left after the earlier timesteps charged,
+    # and discharging must be covered by the stored energy left after the earlier timesteps discharged.
+    charge_limit = 1 / (duration * (1 + (lengths - 1) * efficiency))
+    discharge_limit = 1 / (duration * lengths)
+
+    charge_rate = np.zeros(len(starts))
+    discharge_rate = np.zeros(len(starts))
+    stored_energy = initial_stored_energy
+    volume = battery_config["Max storage volume"]
+    for i, (charge, discharge, charge_per_mwh, discharge_per_mwh, length) in enumerate(zip(
+        requested_charge.tolist(),
+        requested_discharge.tolist(),
+        charge_limit.tolist(),
+        discharge_limit.tolist(),
+        lengths.tolist(),
+    )):
+        charge = min(charge, max(volume - stored_energy, 0.0) * charge_per_mwh)
+        discharge = min(discharge, max(stored_energy, 0.0) * discharge_per_mwh)
+        charge_rate[i], discharge_rate[i] = charge, discharge
+        stored_energy += length * duration * (charge * efficiency - discharge)
+
+    # Spread committed rates over the timesteps of each settlement period
+    columns = {column: market_data[column].to_numpy() for column in market_data.columns}
+    rates = {column: np.zeros(len(time)) for column in rate_columns(markets)}
+    rates[f"charge rate {market}"] = np.repeat(charge_rate, lengths)
+    rates[f"discharge rate {market}"] = np.repeat(discharge_rate, lengths)
+    net_energy_flow = duration * (rates[f"charge rate {market}"] * efficiency - rates[f"discharge rate {market}"])
+    columns["is charging"] = (rates[f"charge rate {market}"] > RATE_TOLERANCE).astype(float)
+    columns["is discharging"] = (rates[f"discharge rate {market}"] > RATE_TOLERANCE).astype(float)
+    columns.update(rates)
+    columns["stored energy"] = initial_stored_energy + np.concatenate([[0.0], np.cumsum(net_energy_flow)[:-1]])
+    return add_financial_columns(pd.DataFrame(columns, index=time), battery_config)
@@ -0,0 +1,204 @@
+"""Rolling-horizon Optimisation.
+
+This module splits long market data horizons into shorter windows, each solved as a separate `Model`, and stitches the
+window solutions back into a single solution.
+
+Two strategies are provided:
+- Sequential: each window is solved with a look-ahead period beyond the window, only the window itself is committed,
+    and the stored energy at the end of the committed window seeds the next window.
+- Parallel: every window starts and ends at the same fixed stored energy, so windows are independent of one another
+    and can be solved across a process pool.
+"""
+import multiprocessing
+from collections.abc import Mapping
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from chronos.lite.data import MARKETS
+from chronos.lite.model import INITIAL_STORED_ENERGY, Model, financial_summary, timestep_duration, total_rates
+from chronos.lite.plot import MAX_POINTS, plot_solution
+
+#: Default length of market data beyond each window which the sequential strategy optimises over but doesn't commit
+LOOKAHEAD = "12h"
+
+
+class RollingHorizonSolution:
+    """Solution stitched together from the windows of a rolling-horizon solve."""
+    def __init__(self, battery_config: dict, solution_df: pd.DataFrame):
+        """Setup class.
+
+        :param battery_config: Battery configuration dictionary.
+        :param solution_df: Stitched solution dataframe, with the same columns as `Model.solution_to_dataframe()`.
+        """
+        self.battery_config = battery_config
+        self.solution_df = solution_df
+
+    @property
+    def objective(self) -> float:
+        """Objective value of the stitched solution, comparable with `Model.objective.value`."""
+        return (self.solution_df["Export revenue"] - self.solution_df["Import cost"]).sum()
+
+    def plot_solution(self, max_points: int | None = MAX_POINTS):
+        """Plot the stitched solution.
+
+        :param max_points: Maximum number of points plotted per trace. If None, every timestep is plotted.
+        """
+        plot_solution(self.solution_to_dataframe(), max_points=max_points)
+
+    def solution_to_dataframe(self) -> pd.DataFrame:
+        """Output the stitched solution as a Pandas DataFrame."""
+        return self.solution_df
+
+    def financial_summary(self) -> pd.Series:
+        """Return a financial summary of the stitched solution as a Pandas Series."""
+        return financial_summary(self.solution_df, self.battery_config)
+
+
+def final_stored_energy(
+    solution_df: pd.DataFrame, battery_config: dict, markets: Mapping[str, str | pd.Timedelta] = MARKETS
+) -> float:
+    """Return the stored energy left in the battery at the end of the last timestep of a solution.
+
+    :param solution_df: Solution dataframe, as returned by `Model.solution_to_dataframe()`.
+    :param battery_config: Battery configuration dictionary.
+    :param markets: Settlement interval of each market the solution was optimised with, by market name, which set the
+        timestep duration.
+    """
+    last = solution_df.iloc[[-1]]
+    charge_rate, discharge_rate = total_rates(last)
+    return last["stored energy"].iloc[0] + timestep_duration(markets) * (
+        charge_rate.iloc[0] * (1 - battery_config["Battery charging loss"]) - discharge_rate.iloc[0]
+    )
+
+
+def solve_rolling_horizon(
+    battery_config: dict,
+    market_data: pd.DataFrame,
+    window: str | pd.Timedelta = "1D",
+    lookahead: str | pd.Timedelta | None = None,
+    processes: int | None = None,
+    fixed_stored_energy: float = INITIAL_STORED_ENERGY,
+    markets: Mapping[str, str | pd.Timedelta] = MARKETS,
+    **solver_options,
+) -> RollingHorizonSolution:
+    """Solve the battery optimisation over consecutive windows of the market data.
+
+    Windows start on the clock, at multiples of the longest settlement interval, so no settlement period is split
+    between windows even when the market data starts part way through one.
+
+    :param battery_config: Battery configuration dictionary.
+    :param market_data: Market data dataframe.
+    :param window: Length of market data committed by each window. Must be a whole number of the longest settlement
+        interval of the markets.
+    :param lookahead: Length of market data beyond each window which is optimised over but not committed. Must be a
+        whole number of the longest settlement interval of the markets. Only used by the sequential strategy, where it
+        defaults to `LOOKAHEAD`.
+    :param processes: If given, solve windows independently across a pool of this many processes, with every window
+        starting and ending at `fixed_stored_energy`. Otherwise solve windows sequentially, handing over the stored
+        energy at the end of each committed window to the next.
+    :param fixed_stored_energy: Stored energy at every window boundary when solving in parallel (MWh).
+    :param markets: Settlement interval of each market, by market name.
+    :param solver_options: Keyword arguments passed to `Model.solve()`.
+    """
+    if processes is not None and lookahead is not None:
+        raise ValueError("lookahead is only used by the sequential strategy, so cannot be given with processes")
+    markets = {market: pd.Timedelta(interval) for market, interval in markets.items()}
+    longest_interval = max(markets.values())
+    window = pd.Timedelta(window)
+    lookahead = pd.Timedelta(LOOKAHEAD if lookahead is None else lookahead)
+    if window <= pd.Timedelta(0) or window % longest_interval or lookahead % longest_interval:
+        raise ValueError(f"window and lookahead must be positive whole numbers of {longest_interval}")
+
+    time = market_data.index
+    starts = pd.date_range(time.min().floor(longest_interval), time.max(), freq=window)
+
+    if processes is None:
+        window_dfs = []
+        stored_energy = INITIAL_STORED_ENERGY
+        for start in starts:
+            window_df = _solve_window(
+                battery_config,
+                market_data[(time >= start) & (time < start + window + lookahead)],
+                initial_stored_energy=stored_energy,
+                markets=markets,
+                **solver_options,
+            )
+            window_dfs.append(window_df[window_df.index < start + window])
+            stored_energy = final_stored_energy(window_dfs[-1], battery_config, markets)
+    else:
+        # Spawn rather than fork workers, since HiGHS may already have started threads in this process
+        with ProcessPoolExecutor(max_workers=processes, mp_context=multiprocessing.get_context("spawn")) as executor:
+            futures = [
+                executor.submit(
+                    _solve_window,
+                    battery_config,
+                    market_data[(time >= start) & (time < start + window)],
+                    initial_stored_energy=fixed_stored_energy,
+                    terminal_stored_energy=fixed_stored_energy,
+                    markets=markets,
+                    **solver_options,
+                )
+                for start in starts
+            ]
+            window_dfs = [future.result() for future in futures]
+
+    solution_df = pd.concat(window_dfs)
+    solution_df.index.name = time.name
+    return RollingHorizonSolution(battery_config, solution_df)
+
+
+def compare_with_monolithic(
+    battery_config: dict,
+    market_data: pd.DataFrame,
+    **rolling_horizon_options,
+) -> pd.Series:
+    """Compare the rolling-horizon objective with the objective of a single `Model` over the whole horizon.
+
+    Only practical on horizons short enough for the monolithic model to be solved.
+
+    :param battery_config: Battery configuration dictionary.
+    :param market_data: Market data dataframe.
+    :param rolling_horizon_options: Keyword arguments passed to `solve_rolling_horizon()`, including solver options.
+    """
+    rolling_horizon_solution = solve_rolling_horizon(battery_config, market_data, **rolling_horizon_options)
+    solver_options = {
+        k: v for k, v in rolling_horizon_options.items()
+        if k not in ("window", "lookahead", "processes", "fixed_stored_energy", "markets")
+    }
+    monolithic_model = Model(battery_config, market_data, markets=rolling_horizon_options.get("markets", MARKETS))
+    monolithic_model.solve(**solver_options)
+    if monolithic_model.termination_condition != "optimal":
+        raise RuntimeError(f"Monolithic optimisation failed: {monolithic_model.termination_condition}")
+
+    comparison = pd.Series({
+        "Rolling horizon objective": rolling_horizon_solution.objective,
+        "Monolithic objective": monolithic_model.objective.value,
+    })
+    comparison["Absolute gap"] = comparison["Monolithic objective"] - comparison["Rolling horizon objective"]
+    comparison["Relative gap"] = comparison["Absolute gap"] / abs(comparison["Monolithic objective"])
+    return comparison
+
+
+def _solve_window(
+    battery_config: dict,
+    market_data: pd.DataFrame,
+    initial_stored_energy: float,
+    terminal_stored_energy: float | None = None,
+    markets: Mapping[str, str | pd.Timedelta] = MARKETS,
+    **solver_options,
+) -> pd.DataFrame:
+    model = Model(
+        battery_config,
+        market_data,
+        initial_stored_energy=initial_stored_energy,
+        terminal_stored_energy=terminal_stored_energy,
+        markets=markets,
+    )
+    model.solve(**solver_options)
+    if model.termination_condition != "optimal":
+        raise RuntimeError(
+            f"Optimisation of window starting {market_data.index.min()} failed: {model.termination_condition}"
+        )
+    return model.solution_to_dataframe()
+
@@ -0,0 +1,181 @@
+"""Scenario Optimisation.
+
+This module optimises a battery against many market price scenarios in a single model, rather than building one model
+per scenario. Market data, variables and constraints gain a "scenario" dimension, so the model is built once, with
+every constraint and the objective vectorised across scenarios.
+
+Two modes are provided:
+- Independent: with no first stage, scenarios share no variables, so each scenario is solved as if on its own, but
+    all in one pass.
+- Two-stage: the charge/discharge rates of the first stage are shared across scenarios, since they must be committed
+    before it is known which scenario occurs. The rest of each scenario adapts to its own prices, and the objective is
+    the expected profit over scenarios.
+"""
+import os
+from collections.abc import Callable, Mapping
+
+import numpy as np
+import pandas as pd
+import xarray as xr
+
+from chronos.lite.data import MARKETS, price_column
+from chronos.lite.model import (
+    INITIAL_STORED_ENERGY,
+    RATE_VARIABLES,
+    Model,
+    ModelStats,
+    add_financial_columns,
+    financial_summary,
+    solution_to_excel,
+)
+from chronos.lite.plot import MAX_POINTS, plot_solution
+
+
+def scenario_market_data(scenarios: dict[str, pd.DataFrame]) -> pd.DataFrame:
+    """Combine market data dataframes of each scenario into a single market data dataframe for `ScenarioModel`.
+
+    :param scenarios: Market data dataframes, with the same index, by scenario name.
+    :returns: Market data dataframe with the same index, and columns of each market data column by scenario.
+    """
+    market_data = pd.concat(scenarios, axis=1, names=["scenario", None]).swaplevel(axis=1)
+    return market_data.sort_index(axis=1, level=0, sort_remaining=False)
+
+
+class ScenarioModel(Model):
+    """Optimisation model over many market price scenarios, with a scenario dimension on prices and variables."""
+    def __init__(
+        self,
+        battery_config: dict,
+        market_data: pd.DataFrame,
+        probabilities: pd.Series | None = None,
+        first_stage: str | pd.Timedelta = "0h",
+        initial_stored_energy: float = INITIAL_STORED_ENERGY,
+        terminal_stored_energy: float | None = None,
+        binary_mask: pd.Series | None = None,
+        stats_hook: Callable[[str, ModelStats], None] | None = None,
+        markets: Mapping[str, str | pd.Timedelta] = MARKETS,
+    ):
+        """Setup class.
+
+        :param battery_config: Battery configuration dictionary.
+        :param market_data: Market data dataframe with columns of each market data column by scenario, as returned by
+            `scenario_market_data()`.
+        :param probabilities: Probability of each scenario, weighting its profit in the objective. Defaults to equally
+            likely scenarios.
+        :param first_stage: Length of the first stage, whose charge/discharge rates are shared across scenarios. Must
+            be a whole number of the longest settlement interval of the markets. Defaults to none, so scenarios are
+            independent.
+        :param initial_stored_energy: Stored energy in the battery at the start of the first timestep (MWh).
+        :param terminal_stored_energy: If given, stored energy in the battery at the end of the last timestep (MWh).
+        :param binary_mask: Boolean series over time, True where "is charging"/"is discharging" binaries are declared.
+        :param stats_hook: If given, called with the name of each phase and `.stats` as each phase completes.
+        :param markets: Settlement interval of each market, by market name.
+        """
+        if market_data.columns.nlevels != 2 or market_data.columns.names[1] != "scenario":
+            raise ValueError("Market data columns must be indexed by market data column and scenario")
+        self.scenario = pd.Index(market_data.columns.unique(level="scenario"), name="scenario")
+
+        if probabilities is None:
+            probabilities = pd.Series(1 / len(self.scenario), index=self.scenario)
+        probabilities = pd.Series(probabilities).reindex(self.scenario)
+        if probabilities.isna().any() or (probabilities < 0).any() or not np.isclose(probabilities.sum(), 1):
+            raise ValueError("probabilities must be non-negative, sum to 1 and be given for every scenario")
+        self.probabilities = probabilities
+
+        longest_interval = max(pd.Timedelta(interval) for interval in markets.values())
+        self.first_stage = pd.Timedelta(first_stage)
+        if self.first_stage < pd.Timedelta(0) or self.first_stage % longest_interval:
+            raise ValueError(f"first_stage must be a non-negative whole number of {longest_interval}")
+
+        super().__init__(
+            battery_config,
+            market_data,
+            initial_stored_energy=initial_stored_energy,
+            terminal_stored_energy=terminal_stored_energy,
+            binary_mask=binary_mask,
+            stats_hook=stats_hook,
+            markets=markets,
+        )
+
+    def _coords(self, *indexes: pd.Index) -> list[pd.Index]:
+        return [self.scenario, *indexes]
+
+    def _prices(self) -> xr.DataArray:
+        columns = pd.MultiIndex.from_product([[price_column(market) for market in self.market], self.scenario])
+        prices = self.market_data.reindex(columns=columns).to_numpy().reshape(
+            len(self.time), len(self.market), len(self.scenario)
+        )
+        # Weighting each scenario's prices by its probability makes the objective the expected profit
+        return xr.DataArray(
+            prices.transpose(2, 1, 0), coords=[self.scenario, self.market, self.time]
+        ) * xr.DataArray(self.probabilities)
+
+    def _init_constraints(self):
+        super()._init_constraints()
+
+        # Non-anticipativity: first stage rates are committed before the scenario is known, so are equal across
+        # scenarios. Rates are declared per settlement period, so any period starting in the first stage is shared.
+        first_stage_end = self.time[0] + self.first_stage
+        if len(self.scenario) < 2 or first_stage_end <= self.time[0]:
+            return
+        for market in self.market:
+            period = self.settlement_period[market]
+            for name in RATE_VARIABLES:
+                variable = self.variables[f"{name} {market}"].sel({period.name: period[period < first_stage_end]})
+                self.add_constraints(
+                    variable.isel(scenario=slice(1, None)) - variable.isel(scenario=0) == 0,
+                    name=f"non-anticipativity {name} {market}",
+                )
+
+    def _build_solution_dataframe(self) -> pd.DataFrame:
+        # Flatten scenario by time arrays scenario by scenario
+        columns = {
+            column: self.market_data[column].reindex(columns=self.scenario).to_numpy().T.ravel()
+            for column in self.market_data.columns.unique(level=0)
+        }
+        columns.update(self._solution_columns())
+        index = pd.MultiIndex.from_product([self.scenario, self.time])
+        return add_financial_columns(pd.DataFrame(columns, index=index), self.battery_config)
+
+    def solution_to_dataframe(self, scenario: str | None = None) -> pd.DataFrame:
+        """Output the solution as a Pandas DataFrame.
+
+        The dataframe is computed once per solve and cached, so should not be modified in place.
+
+        :param scenario: If given, only output the solution of this scenario, indexed by time. Otherwise output the
+            solutions of every scenario, indexed by scenario and time.
+        """
+        solution_df = super().solution_to_dataframe()
+        if scenario is None:
+            return solution_df
+        return solution_df.xs(scenario, level="scenario")
+
+    def financial_summary(self) -> pd.DataFrame:
+        """Return a financial summary of each scenario as a Pandas DataFrame, with the solve status and gap."""
+        solution_df = self.solution_to_dataframe()
+        summary = pd.DataFrame({
+            scenario: financial_summary(solution_df.xs(scenario, level="scenario"), self.battery_config)
+            for scenario in self.scenario
+        }).T.rename_axis("scenario")
+        summary["Probability"] = self.probabilities
+        summary["Termination condition"] = self.termination_condition
+        summary["MIP gap"] = self.mip_gap
+        return summary
+
+    def plot_solution(self, scenario: str, max_points: int | None = MAX_POINTS):
+        """Plot the solution of a scenario.
+
+        :param scenario: Scenario to plot.
+        :param max_points: Maximum number of points plotted per trace. If None, every timestep is plotted.
+        """
+        if self.solution is None:
+            raise RuntimeError("Optimisation hasn't been run. Need to run .solve() method.")
+        plot_solution(self.solution_to_dataframe(scenario), max_points=max_points)
+
+    def solution_to_excel(self, path: os.PathLike, scenario: str):
+        """Output the solution of a scenario to an Excel file."""
+        if self.solution is None:
+            raise RuntimeError("Optimisation hasn't been run. Need to run .solve() method.")
+        solution_to_excel(
+            path, self.solution_to_dataframe(scenario), self.battery_config, self.financial_summary().loc[scenario]
+        )
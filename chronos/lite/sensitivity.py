@@ -0,0 +1,100 @@
+"""Sensitivity Analysis.
+
+This module reports what an extra MWh of storage volume or MW of charging/discharging rate is worth, from the shadow
+prices of a single LP rather than from re-solving the MILP with perturbed battery configurations.
+
+The LP is the `Model` with its "is charging"/"is discharging" binaries fixed at their optimal values: the max
+charge/discharge rate constraints are scaled by the fixed binaries, so the LP has the same optimum as the MILP. Variable
+upper bounds which duplicate those constraints are removed, so each battery configuration value only appears on the
+right hand side of one family of constraints, and its marginal value is the sum of their duals over time.
+
+Marginal values hold the charge/discharge decisions fixed, so they value extra capacity used within the current
+schedule. Where the schedule sits on a kink, e.g. exactly filling the storage volume, the shadow price is one of a
+range of valid marginal values, between the value of adding capacity and the value of removing it.
+"""
+import numpy as np
+import pandas as pd
+
+from chronos.lite.model import RATE_VARIABLES, Model
+
+#: Constraints with each battery configuration value on the right hand side, by battery configuration key
+MARGINAL_VALUE_CONSTRAINTS = {
+    "Max storage volume": "available storage capacity",
+    "Max charging rate": "max charge rate",
+    "Max discharging rate": "max discharge rate",
+}
+
+#: Variable upper bounds implied by the constraints of `MARGINAL_VALUE_CONSTRAINTS`, with rates named per market
+REDUNDANT_UPPER_BOUNDS = [*RATE_VARIABLES, "stored energy"]
+
+
+def fixed_binary_model(model: Model, battery_config: dict | None = None) -> Model:
+    """Return an LP of a solved model, with its "is charging"/"is discharging" binaries fixed at their solution values.
+
+    :param model: Solved model.
+    :param battery_config: If given, battery configuration of the LP, e.g. to re-solve the fixed charge/discharge
+        decisions with perturbed values. Defaults to the battery configuration of the model.
+    """
+    if model.status != "ok":
+        raise RuntimeError("Optimisation hasn't been run. Need to run .solve() method.")
+    binaries = _fixed_binaries(model)
+    lp = Model(
+        model.battery_config if battery_config is None else battery_config,
+        model.market_data,
+        initial_stored_energy=model.initial_stored_energy,
+        terminal_stored_energy=model.terminal_stored_energy,
+        binary_mask=pd.Series(False, index=model.time),
+        markets=model.markets,
+    )
+    for name in REDUNDANT_UPPER_BOUNDS:
+        for variable in [f"{name} {market}" for market in lp.market] if name in RATE_VARIABLES else [name]:
+            lp.variables[variable].upper = np.inf
+
+    # Without binaries, the right hand sides are the max rates at every timestep: zero them where the binary was off
+    for name, binary in [("max charge rate", "is charging"), ("max discharge rate", "is discharging")]:
+        lp.constraints[name].rhs = lp.constraints[name].rhs * binaries[binary]
+    return lp
+
+
+def marginal_values(model: Model, **solver_options) -> pd.DataFrame:
+    """Return the marginal value of each battery configuration value at each timestep of a solved model.
+
+    :param model: Solved model.
+    :param solver_options: Keyword arguments passed to `Model.solve()` for the fixed binary LP.
+    :returns: Dataframe indexed by time, with a column of marginal values for each battery configuration value, in
+        £/MWh of storage volume and £/MW of charging/discharging rate. Summed over time, each column is the change in
+        objective per unit increase of the battery configuration value.
+    """
+    lp = fixed_binary_model(model)
+    lp.solve(**solver_options)
+    if lp.termination_condition != "optimal":
+        raise RuntimeError(f"Fixed binary LP failed: {lp.termination_condition}")
+
+    # Per unit of each battery configuration value, the max rate right hand sides move by the fixed binary, and the
+    # storage volume right hand sides move by one
+    binaries = _fixed_binaries(model)
+    coefficients = {
+        "Max storage volume": 1.0,
+        "Max charging rate": binaries["is charging"],
+        "Max discharging rate": binaries["is discharging"],
+    }
+    return pd.DataFrame(
+        {key: lp.constraints[name].dual.values * coefficients[key] for key, name in MARGINAL_VALUE_CONSTRAINTS.items()},
+        index=model.time,
+    )
+
+
+def sensitivity_report(model: Model, freq: str = "MS", **solver_options) -> pd.DataFrame:
+    """Return the marginal value of each battery configuration value per period of a solved model.
+
+    :param model: Solved model.
+    :param freq: Length of the reporting periods, as a Pandas offset alias, e.g. "MS" for months.
+    :param solver_options: Keyword arguments passed to `Model.solve()` for the fixed binary LP.
+    :returns: Dataframe indexed by period start, with a column of marginal values for each battery configuration value.
+    """
+    return marginal_values(model, **solver_options).resample(freq).sum()
+
+
+def _fixed_binaries(model: Model) -> dict[str, np.ndarray]:
+    solution_df = model.solution_to_dataframe()
+    return {name: (solution_df[name].to_numpy() > 0.5).astype(float) for name in ["is charging", "is discharging"]}
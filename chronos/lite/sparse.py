@@ -0,0 +1,357 @@
+"""Sparse Matrix Model.
+
+This module provides an alternative builder for the same MILP as `Model`, which assembles the constraint matrix, bounds
+and objective directly from the battery configuration and market data arrays as NumPy CSR arrays, and passes them
+straight to HiGHS, without building linopy expressions.
+
+The problem structure is fixed, so each constraint family is assembled as a block of rows with a fixed number of terms
+per row. Columns are laid out in blocks of variables, in the order of `VARIABLES`, with binaries only declared at
+timesteps in the binary mask, and charge/discharge rates laid out market by market, with a column per settlement
+period.
+"""
+import os
+import time
+from collections.abc import Mapping
+
+import highspy
+import linopy.constants
+import numpy as np
+import pandas as pd
+
+from chronos.lite.data import MARKETS, price_column
+from chronos.lite.model import (
+    INITIAL_STORED_ENERGY,
+    RATE_TOLERANCE,
+    RATE_VARIABLES,
+    Model,
+    ModelStats,
+    add_financial_columns,
+    check_timestep_spacing,
+    financial_summary,
+    settlement_periods,
+    solution_to_excel,
+    timestep_duration,
+)
+from chronos.lite.plot import MAX_POINTS, plot_solution
+
+#: Variables, in the order of their column blocks, matching the variables of `Model`
+VARIABLES = ["is charging", "is discharging", "charge rate", "discharge rate", "stored energy"]
+
+#: Termination conditions of HiGHS model statuses, as reported by linopy
+TERMINATION_CONDITIONS = {
+    highspy.HighsModelStatus.kOptimal: "optimal",
+    highspy.HighsModelStatus.kInfeasible: "infeasible",
+    highspy.HighsModelStatus.kUnboundedOrInfeasible: "infeasible_or_unbounded",
+    highspy.HighsModelStatus.kUnbounded: "unbounded",
+    highspy.HighsModelStatus.kTimeLimit: "time_limit",
+    highspy.HighsModelStatus.kIterationLimit: "iteration_limit",
+    highspy.HighsModelStatus.kSolutionLimit: "terminated_by_limit",
+    highspy.HighsModelStatus.kInterrupt: "user_interrupt",
+}
+
+
+class SparseModel:
+    """Sparse matrix model class, with the same inputs and solution outputs as `Model`."""
+    def __init__(
+        self,
+        battery_config: dict,
+        market_data: pd.DataFrame,
+        initial_stored_energy: float = INITIAL_STORED_ENERGY,
+        terminal_stored_energy: float | None = None,
+        binary_mask: pd.Series | None = None,
+        markets: Mapping[str, str | pd.Timedelta] = MARKETS,
+    ):
+        """Setup class.
+
+        :param battery_config: Battery configuration dictionary.
+        :param market_data: Market data dataframe.
+        :param initial_stored_energy: Stored energy in the battery at the start of the first timestep (MWh).
+        :param terminal_stored_energy: If given, stored energy in the battery at the end of the last timestep (MWh).
+        :param binary_mask: Boolean series over time, True where "is charging"/"is discharging" binaries are declared.
+            Defaults to binaries at every timestep.
+        :param markets: Settlement interval of each market, by market name.
+        """
+        # Internalise source data and configuration
+        self.time = market_data.index
+        self.markets = {market: pd.Timedelta(interval) for market, interval in markets.items()}
+        self.market = pd.Index(list(self.markets), name="market")
+        check_timestep_spacing(self.time, self.markets)
+        self.settlement_period = settlement_periods(self.time, self.markets)
+        self.timestep_duration = timestep_duration(self.markets)
+        self.battery_config = battery_config
+        self.market_data = market_data
+        self.initial_stored_energy = initial_stored_energy
+        self.terminal_stored_energy = terminal_stored_energy
+        self.binary_mask = pd.Series(True if binary_mask is None else binary_mask, index=self.time, dtype=bool)
+        self.status = "initialized"
+        self.termination_condition = None
+        self.solution = None
+        self.objective_value = None
+        self.solver_model = None
+        self._solution_df = None
+        self.stats = ModelStats()
+
+        # Set up model
+        start = time.perf_counter()
+        self._init_columns()
+        self._init_rows()
+        self.stats.timings["build"] = time.perf_counter() - start
+        self.stats.variables = len(self.col_cost)
+        self.stats.constraints = len(self.row_lower)
+        self.stats.nonzeros = len(self.a_value)
+        self.stats.binaries = int(self.integrality.sum())
+
+    def _init_columns(self):
+        n_time = len(self.time)
+        mask = self.binary_mask.to_numpy()
+
+        # Column index of each variable at each timestep, by market and time for charge/discharge rates. Rates have a
+        # column per settlement period of each market, which every timestep of the period shares.
+        self.n_binaries = int(mask.sum())
+        n_periods = [len(self.settlement_period[market]) for market in self.market]
+        sizes = dict(zip(VARIABLES, [self.n_binaries] * 2 + [sum(n_periods)] * 2 + [n_time]))
+        offsets = dict(zip(VARIABLES, np.cumsum([0, *sizes.values()])[:-1].tolist()))
+        binary_position = np.cumsum(mask, dtype=np.int32) - 1
+        market_time_position = np.stack([
+            period_offset + self.settlement_period[market].searchsorted(self.time.floor(self.markets[market]))
+            for market, period_offset in zip(self.market, np.cumsum([0, *n_periods[:-1]]))
+        ]).astype(np.int32)
+        self.columns = {
+            "is charging": offsets["is charging"] + binary_position,
+            "is discharging": offsets["is discharging"] + binary_position,
+            "charge rate": offsets["charge rate"] + market_time_position,
+            "discharge rate": offsets["discharge rate"] + market_time_position,
+            "stored energy": offsets["stored energy"] + np.arange(n_time, dtype=np.int32),
+        }
+        self.offsets = offsets
+        self.sizes = sizes
+
+        # Bounds and integrality
+        upper = {
+            "is charging": 1.0,
+            "is discharging": 1.0,
+            "charge rate": self.battery_config["Max charging rate"],
+            "discharge rate": self.battery_config["Max discharging rate"],
+            "stored energy": self.battery_config["Max storage volume"],
+        }
+        n_columns = sum(sizes.values())
+        self.col_lower = np.zeros(n_columns)
+        self.col_upper = np.repeat([float(upper[name]) for name in VARIABLES], list(sizes.values()))
+        self.integrality = np.zeros(n_columns, dtype=np.int32)
+        self.integrality[:2 * self.n_binaries] = int(highspy.HighsVarType.kInteger)
+
+        # Objective: profit = price * (discharge rate * discharge efficiency - charge rate / charge efficiency)
+        discharge_efficiency = 1 - self.battery_config["Battery discharging loss"]
+        charge_efficiency = 1 - self.battery_config["Battery charging loss"]
+        prices = self.market_data[[price_column(market) for market in self.market]].to_numpy(dtype=float).T
+        self.col_cost = np.zeros(n_columns)
+        for name, cost in [
+            ("charge rate", -prices / charge_efficiency),
+            ("discharge rate", prices * discharge_efficiency),
+        ]:
+            np.add.at(self.col_cost, self.columns[name].ravel(), cost.ravel())
+
+    def _init_rows(self):
+        n_time = len(self.time)
+        n_market = len(self.market)
+        mask = self.binary_mask.to_numpy()
+        c = self.columns
+        charge_efficiency = 1 - self.battery_config["Battery charging loss"]
+        max_charging_rate = self.battery_config["Max charging rate"]
+        max_discharging_rate = self.battery_config["Max discharging rate"]
+        inf = highspy.kHighsInf
+
+        # Each block is (column indices, values, row lower bounds, row upper bounds), with one row per timestep and a
+        # fixed number of terms per row. Terms with a negative column index are missing from that row.
+        blocks = []
+        missing = np.full(n_time, -1, dtype=np.int32)
+        stored_energy = c["stored energy"][:, None]
+        rates = {name: c[name].T for name in RATE_VARIABLES}
+        market_terms = np.ones(n_market)
+
+        # Charging cannot occur at the same time as discharging, where binaries are declared
+        blocks.append((
+            np.stack([c["is charging"][mask], c["is discharging"][mask]], axis=1),
+            np.ones((self.n_binaries, 2)),
+            np.full(self.n_binaries, -inf),
+            np.ones(self.n_binaries),
+        ))
+
+        # Cannot discharge more in a given timestep than the remaining available stored energy
+        blocks.append((
+            np.concatenate([rates["discharge rate"], stored_energy], axis=1),
+            np.tile([*self.timestep_duration * market_terms, -1.0], (n_time, 1)),
+            np.full(n_time, -inf),
+            np.zeros(n_time),
+        ))
+
+        # Energy balance: stored energy at the start of each timestep is the stored energy at the start of the previous
+        # timestep plus the net energy flow during it. The first row pins the stored energy to its initial value.
+        net_energy_flow_columns = np.concatenate([rates["charge rate"], rates["discharge rate"]], axis=1)
+        net_energy_flow_values = self.timestep_duration * np.concatenate(
+            [charge_efficiency * market_terms, -market_terms]
+        )
+        previous = np.roll(np.concatenate([stored_energy, net_energy_flow_columns], axis=1), 1, axis=0)
+        previous[0] = -1
+        rhs = np.zeros(n_time)
+        rhs[0] = self.initial_stored_energy
+        blocks.append((
+            np.concatenate([stored_energy, previous], axis=1),
+            np.tile([1.0, -1.0, *-net_energy_flow_values], (n_time, 1)),
+            rhs,
+            rhs,
+        ))
+
+        # Optionally pin the stored energy left in the battery at the end of the horizon
+        if self.terminal_stored_energy is not None:
+            blocks.append((
+                np.concatenate([stored_energy[-1], net_energy_flow_columns[-1]])[None, :],
+                np.array([[1.0, *net_energy_flow_values]]),
+                np.array([self.terminal_stored_energy]),
+                np.array([self.terminal_stored_energy]),
+            ))
+
+        # Combined charging/discharging rate across all markets cannot exceed the max rate. Where binaries are
+        # declared, the rate is also zero unless the binary is set.
+        for rate, binary, max_rate in [
+            ("charge rate", "is charging", max_charging_rate),
+            ("discharge rate", "is discharging", max_discharging_rate),
+        ]:
+            blocks.append((
+                np.concatenate([rates[rate], np.where(mask, c[binary], missing)[:, None]], axis=1),
+                np.tile([*market_terms, -max_rate], (n_time, 1)),
+                np.full(n_time, -inf),
+                np.where(mask, 0.0, max_rate),
+            ))
+
+        # Cannot charge more in a given timestep than the remaining available storage capacity
+        blocks.append((
+            np.concatenate([rates["charge rate"], stored_energy], axis=1),
+            np.tile([*self.timestep_duration * market_terms, 1.0], (n_time, 1)),
+            np.full(n_time, -inf),
+            np.full(n_time, self.battery_config["Max storage volume"]),
+        ))
+
+        # Assemble CSR arrays, dropping missing terms
+        index = np.concatenate([block[0].ravel() for block in blocks])
+        value = np.concatenate([block[1].ravel() for block in blocks])
+        row_length = np.concatenate([(block[0] >= 0).sum(axis=1) for block in blocks])
+        present = index >= 0
+        self.a_index = index[present].astype(np.int32)
+        self.a_value = value[present]
+        self.a_start = np.concatenate([[0], np.cumsum(row_length)]).astype(np.int32)
+        self.row_lower = np.concatenate([block[2] for block in blocks])
+        self.row_upper = np.concatenate([block[3] for block in blocks])
+
+    def to_highspy(self) -> highspy.Highs:
+        """Pass the model to HiGHS."""
+        h = highspy.Highs()
+        h.passModel(
+            len(self.col_cost),
+            len(self.row_lower),
+            len(self.a_value),
+            int(highspy.MatrixFormat.kRowwise),
+            int(highspy.ObjSense.kMaximize),
+            0.0,
+            self.col_cost,
+            self.col_lower,
+            self.col_upper,
+            self.row_lower,
+            self.row_upper,
+            self.a_start,
+            self.a_index,
+            self.a_value,
+            self.integrality,
+        )
+        return h
+
+    def solve(self, **solver_options) -> tuple[str, str]:
+        """Solve the model with HiGHS.
+
+        :param solver_options: HiGHS options, e.g. time_limit, mip_rel_gap or threads.
+        """
+        h = self.to_highspy()
+        for option, value in solver_options.items():
+            h.setOptionValue(option, value)
+        h.run()
+        self.solver_model = h
+        self.stats.timings["highs_run"] = h.getRunTime()
+
+        self.termination_condition = TERMINATION_CONDITIONS.get(h.getModelStatus(), "unknown")
+        self.status = linopy.constants.Status.from_termination_condition(
+            linopy.constants.TerminationCondition(self.termination_condition)
+        ).status.value
+        self.solution = None
+        self.objective_value = None
+        self._solution_df = None
+        if h.getInfo().primal_solution_status == highspy.SolutionStatus.kSolutionStatusFeasible:
+            self.objective_value = h.getInfo().objective_function_value
+            self.solution = self._solution(np.asarray(h.getSolution().col_value))
+        return self.status, self.termination_condition
+
+    def _solution(self, col_value: np.ndarray) -> pd.DataFrame:
+        mask = self.binary_mask.to_numpy()
+        solution = {}
+        for name in ["is charging", "is discharging"]:
+            solution[name] = np.full(len(self.time), np.nan)
+            solution[name][mask] = col_value[self.columns[name][mask]]
+        for i, market in enumerate(self.market):
+            for name in RATE_VARIABLES:
+                solution[f"{name} {market}"] = col_value[self.columns[name][i]]
+        solution["stored energy"] = col_value[self.columns["stored energy"]]
+
+        # Timesteps without binaries report whether the battery charged or discharged
+        for binary, rate in [("is charging", "charge rate"), ("is discharging", "discharge rate")]:
+            flowing = np.sum([solution[f"{rate} {market}"] for market in self.market], axis=0) > RATE_TOLERANCE
+            solution[binary] = np.where(mask, solution[binary], flowing.astype(float))
+        return pd.DataFrame(solution, index=self.time)
+
+    @property
+    def mip_gap(self) -> float:
+        """Relative gap between the objective and the bound proven by HiGHS, zero for an optimal LP."""
+        if self.solver_model is None:
+            raise RuntimeError("Optimisation hasn't been run. Need to run .solve() method.")
+        info = self.solver_model.getInfo()
+        if info.mip_node_count < 0 and self.termination_condition == "optimal":
+            return 0.0
+        return info.mip_gap
+
+    def plot_solution(self, max_points: int | None = MAX_POINTS):
+        """Plot the solution of the model.
+
+        :param max_points: Maximum number of points plotted per trace. If None, every timestep is plotted.
+        """
+        if self.solution is None:
+            raise RuntimeError("Optimisation hasn't been run. Need to run .solve() method.")
+        plot_solution(self.solution_to_dataframe(), max_points=max_points)
+
+    def solution_to_dataframe(self) -> pd.DataFrame:
+        """Output the solution as a Pandas DataFrame.
+
+        The dataframe is computed once per solve and cached, so should not be modified in place.
+        """
+        if self.solution is None:
+            raise RuntimeError("Optimisation hasn't been run. Need to run .solve() method.")
+        if self._solution_df is None:
+            start = time.perf_counter()
+            df = pd.concat([self.market_data, self.solution], axis=1)
+            self._solution_df = add_financial_columns(df, self.battery_config)
+            self.stats.timings["solution_to_dataframe"] = time.perf_counter() - start
+        return self._solution_df
+
+    def financial_summary(self) -> pd.Series:
+        """Return a financial summary of the model solution as a Pandas Series, with the solve status and gap."""
+        summary = financial_summary(self.solution_to_dataframe(), self.battery_config)
+        summary["Termination condition"] = self.termination_condition
+        summary["MIP gap"] = self.mip_gap
+        return summary
+
+    def solution_to_excel(self, path: os.PathLike):
+        """Output the solution to an Excel file."""
+        if self.solution is None:
+            raise RuntimeError("Optimisation hasn't been run. Need to run .solve() method.")
+        solution_to_excel(path, self.solution_to_dataframe(), self.battery_config, self.financial_summary())
+
+
+#: Model builders of the same MILP, by name
+BUILDERS = {"linopy": Model, "sparse": SparseModel}
@@ -0,0 +1,134 @@
+"""Battery Sizing Sweeps.
+
+This module solves `Model` across grids of battery configuration values, for example to size the storage volume and
+charge/discharge rates of an asset, and collects the financial summary of every grid point. Grid points may instead be
+simulated over the battery lifetime with `simulate_lifetime()`, to account for degradation.
+
+Market data is saved once as memory-mapped NumPy arrays, which every worker process maps rather than copies, and
+grid points are solved across a process pool.
+"""
+import itertools
+import multiprocessing
+import tempfile
+from collections.abc import Iterator
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+import pandas as pd
+
+from chronos.lite.data import load_market_data_arrays, save_market_data_arrays
+from chronos.lite.degradation import simulate_lifetime
+from chronos.lite.model import Model
+
+#: Market data shared by each worker process, memory-mapped by the pool initializer
+_worker_market_data: pd.DataFrame | None = None
+
+
+def sweep_grid(grids: dict[str, list]) -> list[dict]:
+    """Return every combination of battery configuration values in the grids.
+
+    :param grids: Values to sweep, by battery configuration key.
+    """
+    return [dict(zip(grids, values)) for values in itertools.product(*grids.values())]
+
+
+def iter_sweep(
+    battery_config: dict,
+    market_data: pd.DataFrame,
+    grids: dict[str, list],
+    processes: int | None = None,
+    threads: int = 1,
+    lifetime_period: str | None = None,
+    **solver_options,
+) -> Iterator[pd.Series]:
+    """Solve every grid point, yielding each result as soon as its worker finishes.
+
+    :param battery_config: Base battery configuration dictionary, which grid values override.
+    :param market_data: Market data dataframe.
+    :param grids: Values to sweep, by battery configuration key.
+    :param processes: Number of worker processes. Defaults to the number of CPUs.
+    :param threads: Number of threads used by each HiGHS instance.
+    :param lifetime_period: If given, simulate each grid point over the battery lifetime with periods starting at this
+        frequency, as a Pandas offset alias, rather than solving a single model.
+    :param solver_options: Keyword arguments passed to `Model.solve()`, or to `simulate_lifetime()` if
+        `lifetime_period` is given.
+    :returns: Results, each a series named by the position of its grid point in `sweep_grid()`, of the grid point
+        values and termination condition, with the financial summary of the best solution found, if any. A grid point
+        which raises an error has termination condition "error", with the error in an "Error" column.
+    """
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        market_data_path = Path(tmp_dir)
+        save_market_data_arrays(market_data, market_data_path)
+        # Spawn rather than fork workers, since HiGHS may already have started threads in this process
+        with ProcessPoolExecutor(
+            max_workers=processes,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(market_data_path,),
+        ) as executor:
+            points = dict(enumerate(sweep_grid(grids)))
+            futures = {
+                executor.submit(_solve_point, battery_config, point, threads, lifetime_period, **solver_options): i
+                for i, point in points.items()
+            }
+            for future in as_completed(futures):
+                i = futures[future]
+                try:
+                    result = future.result()
+                except Exception as error:
+                    result = pd.Series(
+                        {**points[i], "Termination condition": "error", "Error": repr(error)}, dtype=object
+                    )
+                result.name = i
+                yield result
+
+
+def sweep(
+    battery_config: dict,
+    market_data: pd.DataFrame,
+    grids: dict[str, list],
+    processes: int | None = None,
+    threads: int = 1,
+    lifetime_period: str | None = None,
+    **solver_options,
+) -> pd.DataFrame:
+    """Solve every grid point, returning one row of results per grid point, indexed by position in `sweep_grid()`.
+
+    :param battery_config: Base battery configuration dictionary, which grid values override.
+    :param market_data: Market data dataframe.
+    :param grids: Values to sweep, by battery configuration key.
+    :param processes: Number of worker processes. Defaults to the number of CPUs.
+    :param threads: Number of threads used by each HiGHS instance.
+    :param lifetime_period: If given, simulate each grid point over the battery lifetime with periods starting at this
+        frequency, as a Pandas offset alias, rather than solving a single model.
+    :param solver_options: Keyword arguments passed to `Model.solve()`, or to `simulate_lifetime()` if
+        `lifetime_period` is given.
+    """
+    results = list(
+        iter_sweep(battery_config, market_data, grids, processes, threads, lifetime_period, **solver_options)
+    )
+    return pd.DataFrame(results).sort_index()
+
+
+def _init_worker(market_data_path: Path):
+    global _worker_market_data
+    _worker_market_data = load_market_data_arrays(market_data_path)
+
+
+def _solve_point(
+    battery_config: dict, point: dict, threads: int, lifetime_period: str | None, **solver_options
+) -> pd.Series:
+    market_data = _worker_market_data
+    if market_data is None:
+        raise RuntimeError("Worker market data hasn't been loaded. Need to run _init_worker() first.")
+    if lifetime_period is not None:
+        solution = simulate_lifetime(
+            {**battery_config, **point}, market_data, period=lifetime_period, threads=threads, **solver_options
+        )
+        return pd.Series({**point, **solution.financial_summary().to_dict()}, dtype=object)
+
+    model = Model({**battery_config, **point}, market_data)
+    model.solve(threads=threads, **solver_options)
+    if model.status != "ok":
+        return pd.Series({**point, "Termination condition": model.termination_condition}, dtype=object)
+    return pd.Series({**point, **model.financial_summary().to_dict()}, dtype=object)
@@ -0,0 +1,61 @@
+"""Shared test fixtures."""
+
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from chronos.lite.data import load_battery_config, load_market_data
+
+TEST_DATA_DIR = Path(__file__).parent / "test_files"
+
+
+@pytest.fixture
+def battery_config():
+    """Simple battery config fixture used to validate setup."""
+    return load_battery_config(TEST_DATA_DIR / "test_battery_config.csv")
+
+
+@pytest.fixture
+def realistic_battery_config():
+    """Realistic battery config fixture used to validate behaviour."""
+    return load_battery_config(TEST_DATA_DIR / "realistic_battery_config.csv")
+
+
+@pytest.fixture
+def market_data():
+    """Market data fixture used to validate setup."""
+    return load_market_data(
+        half_hourly_csv=TEST_DATA_DIR / "test_30min_market_data.csv",
+        hourly_csv=TEST_DATA_DIR / "test_60min_market_data.csv",
+    )
+
+
+@pytest.fixture
+def make_daily_market_data():
+    """Factory of daily-cycling market data over a number of days."""
+    def make(days: int, start: str = "2018-01-01") -> pd.DataFrame:
+        periods = 48 * days
+        time = pd.Index(pd.date_range(start, periods=periods, freq="30min"), name="time")
+        daily_cycle = 50.0 + 20.0 * np.sin(2 * np.pi * np.arange(periods) / 48)
+        return pd.DataFrame(
+            data={
+                "Price 30 min (£/MWh)": daily_cycle + np.tile([0.0, 3.0], periods // 2),
+                "Price 60 min (£/MWh)": np.repeat(daily_cycle[::2], 2),
+            },
+            index=time,
+        )
+    return make
+
+
+@pytest.fixture
+def daily_market_data(make_daily_market_data):
+    """One day of market data with a price cycle."""
+    return make_daily_market_data(1)
+
+
+@pytest.fixture
+def two_day_market_data(make_daily_market_data):
+    """Two days of daily-cycling market data."""
+    return make_daily_market_data(2)
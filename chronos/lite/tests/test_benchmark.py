@@ -0,0 +1,52 @@
+"""Test benchmark module."""
+
+import json
+
+import pytest
+
+from chronos.lite.benchmark import main, run_benchmark, write_synthetic_market_data
+from chronos.lite.data import load_market_data
+
+
+class TestBenchmark:
+    """Validate benchmark cases and results."""
+
+    def test_synthetic_market_data_loads(self, tmp_path):
+        """Synthetic market data is written in the same format as the raw market data."""
+        market_data = load_market_data(*write_synthetic_market_data(tmp_path, periods=96))
+        assert len(market_data) == 96
+        assert market_data.notna().all().all()
+
+    def test_run_benchmark(self):
+        """Each case records every phase and the problem size."""
+        results = run_benchmark(horizons=["1D"], sources=["synthetic"], progress=False, output_flag=False)
+        (case,) = results["cases"]
+        assert case["timesteps"] == 48
+        assert case["termination_condition"] == "optimal"
+        assert list(case["phases"]) == [
+            "load_market_data",
+            "Model.__init__",
+            "solve",
+            "solution_to_dataframe",
+            "financial_summary",
+            "solution_to_excel",
+        ]
+        assert case["matrix"]["binaries"] == 96
+
+    def test_unknown_source(self):
+        """Market data sources are validated."""
+        with pytest.raises(ValueError):
+            run_benchmark(sources=["unknown"])
+
+    def test_main_writes_json(self, tmp_path):
+        """Results are written to JSON from the command line."""
+        output = tmp_path / "benchmark.json"
+        main(["--horizons", "1D", "--sources", "raw", "--output", str(output)])
+        assert json.loads(output.read_text())["cases"][0]["source"] == "raw"
+
+    def test_sparse_builder(self):
+        """Cases can be built with the sparse matrix builder."""
+        results = run_benchmark(horizons=["1D"], sources=["synthetic"], builder="sparse", output_flag=False)
+        (case,) = results["cases"]
+        assert "SparseModel.__init__" in case["phases"]
+        assert case["matrix"]["binaries"] == 96
@@ -0,0 +1,78 @@
+"""Test cache module."""
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+import pytest
+
+from chronos.lite.cache import RunCache, run_key, solve_cached
+
+
+class TestRunCache:
+    """Validate cached runs against freshly solved runs."""
+
+    def test_repeat_run_is_cached(self, realistic_battery_config, daily_market_data, tmp_path):
+        """A repeated run is loaded from the cache, with the same solution and financial summary."""
+        run = solve_cached(realistic_battery_config, daily_market_data, tmp_path)
+        cached_run = solve_cached(realistic_battery_config, daily_market_data, tmp_path, output_flag=False)
+        assert not run.hit
+        assert cached_run.hit
+        pd.testing.assert_frame_equal(cached_run.solution_to_dataframe(), run.solution_to_dataframe(), check_freq=False)
+        pd.testing.assert_series_equal(cached_run.financial_summary(), run.financial_summary(), check_dtype=False)
+
+    def test_key_depends_on_inputs(self, realistic_battery_config, daily_market_data):
+        """Keys change with the battery configuration, prices and solver options, except those ignored."""
+        key = run_key(realistic_battery_config, daily_market_data, {}, {})
+        assert run_key(realistic_battery_config, daily_market_data, {}, {"progress": False}) == key
+        assert run_key({**realistic_battery_config, "Max storage volume": 1.0}, daily_market_data, {}, {}) != key
+        assert run_key(realistic_battery_config, daily_market_data * 1.01, {}, {}) != key
+        assert run_key(realistic_battery_config, daily_market_data, {}, {"mip_rel_gap": 0.01}) != key
+        assert run_key(realistic_battery_config, daily_market_data, {"terminal_stored_energy": 1.0}, {}) != key
+
+    def test_least_recently_used_evicted(self, daily_market_data, tmp_path):
+        """Runs are evicted least recently used first once the cache exceeds its size limit."""
+        cache = RunCache(tmp_path)
+        summary = pd.Series({"Total Profit": 1.0})
+        for i, key in enumerate(["a", "b", "c"]):
+            cache.put(key, daily_market_data, summary)
+            os.utime(cache.path(key), ns=(i * 10 ** 9, i * 10 ** 9))
+        assert cache.get("a") is not None
+        cache.max_bytes = 2 * cache.path("a").stat().st_size
+        cache.evict()
+        assert [cache.get(key) is not None for key in ["a", "b", "c"]] == [True, False, True]
+
+    def test_corrupt_run_is_a_miss(self, realistic_battery_config, daily_market_data, tmp_path):
+        """A truncated archive is deleted and re-solved rather than raising."""
+        run = solve_cached(realistic_battery_config, daily_market_data, tmp_path)
+        (path,) = tmp_path.glob("run-*.npz")
+        path.write_bytes(path.read_bytes()[:100])
+        assert RunCache(tmp_path).get(path.stem.removeprefix("run-")) is None
+        assert not path.exists()
+        rerun = solve_cached(realistic_battery_config, daily_market_data, tmp_path)
+        assert not rerun.hit
+        assert rerun.objective == pytest.approx(run.objective)
+
+    def test_stale_temporary_files_evicted(self, daily_market_data, tmp_path):
+        """Temporary files left by interrupted writers are deleted on eviction, but not those still being written."""
+        cache = RunCache(tmp_path)
+        stale, fresh = tmp_path / "stale.tmp", tmp_path / "fresh.tmp"
+        stale.write_bytes(b"partial")
+        fresh.write_bytes(b"partial")
+        os.utime(stale, ns=(0, 0))
+        cache.put("key", daily_market_data, pd.Series({"Total Profit": 1.0}))
+        assert not stale.exists()
+        assert fresh.exists()
+
+    def test_concurrent_writers(self, daily_market_data, tmp_path):
+        """Concurrent writers of the same run leave a single complete run."""
+        cache = RunCache(tmp_path)
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            list(executor.map(
+                lambda _: cache.put("key", daily_market_data, pd.Series({"Total Profit": 1.0})), range(8)
+            ))
+        cached = cache.get("key")
+        assert cached is not None
+        solution_df, _ = cached
+        pd.testing.assert_frame_equal(solution_df, daily_market_data, check_freq=False)
+        assert [path.name for path in tmp_path.iterdir()] == [cache.path("key").name]
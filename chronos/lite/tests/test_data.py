@@ -1,10 +1,14 @@
 """Test data module."""
 
+import os
+import shutil
 from pathlib import Path
 
+import numpy as np
 import pandas as pd
+import pytest
 
-from chronos.lite.data import load_battery_config, load_market_data
+from chronos.lite.data import ingest_market_data, load_battery_config, load_market_data
 
 TEST_DATA_DIR = Path(__file__).parent / "test_files"
 
@@ -56,3 +60,88 @@ def test_load_market_data():
         index=pd.Index(pd.date_range("2018-01-01", periods=6, freq="30min"), name="time")
     )
     pd.testing.assert_frame_equal(actual_df, expected_df, check_freq=False)
+
+
+def test_load_market_data_start_end():
+    """Market data can be sliced by start (inclusive) and end (exclusive) time."""
+    actual_df = load_market_data(
+        half_hourly_csv=TEST_DATA_DIR / "test_30min_market_data.csv",
+        hourly_csv=TEST_DATA_DIR / "test_60min_market_data.csv",
+        start="2018-01-01 01:00",
+        end="2018-01-01 02:30",
+    )
+    pd.testing.assert_index_equal(
+        actual_df.index,
+        pd.Index(pd.date_range("2018-01-01 01:00", periods=3, freq="30min"), name="time"),
+        exact=False,
+    )
+
+
+class TestMarketDataCache:
+    """Validate memory-mapped market data cache."""
+
+    @pytest.fixture
+    def csvs(self, tmp_path):
+        """Copies of the test market data CSV files by market, which can be modified."""
+        half_hourly_csv = tmp_path / "half-hourly.csv"
+        hourly_csv = tmp_path / "hourly.csv"
+        shutil.copy(TEST_DATA_DIR / "test_30min_market_data.csv", half_hourly_csv)
+        shutil.copy(TEST_DATA_DIR / "test_60min_market_data.csv", hourly_csv)
+        return {"30": half_hourly_csv, "60": hourly_csv}
+
+    def test_cached_matches_csv(self, csvs, tmp_path):
+        """Market data loaded via the cache matches market data loaded from CSV."""
+        for kwargs in [{}, {"nrows": 4}, {"start": "2018-01-01 00:30", "end": "2018-01-01 02:00"}]:
+            pd.testing.assert_frame_equal(
+                load_market_data(csvs=csvs, cache_dir=tmp_path / "cache", **kwargs),
+                load_market_data(csvs=csvs, **kwargs),
+                check_freq=False,
+            )
+
+    def test_cached_prices_are_read_only_views(self, csvs, tmp_path):
+        """Market data loaded via the cache is not copied into memory."""
+        df = load_market_data(csvs=csvs, cache_dir=tmp_path / "cache")
+        prices = df["Price 30 min (£/MWh)"].to_numpy()
+        assert not prices.flags.writeable
+        while not isinstance(prices, np.memmap) and prices.base is not None:
+            prices = prices.base
+        assert isinstance(prices, np.memmap)
+
+    def test_cache_not_reingested_when_unchanged(self, csvs, tmp_path):
+        """Touching a CSV file without changing its contents keeps the cache."""
+        cache_path = ingest_market_data(csvs, cache_dir=tmp_path / "cache")
+        cached_mtime = (cache_path / "prices.npy").stat().st_mtime_ns
+        os.utime(csvs["30"], ns=(0, 0))
+        assert ingest_market_data(csvs, cache_dir=tmp_path / "cache") == cache_path
+        assert (cache_path / "prices.npy").stat().st_mtime_ns == cached_mtime
+
+    def test_cache_reingested_when_changed(self, csvs, tmp_path):
+        """Changing the contents of a CSV file invalidates the cache."""
+        load_market_data(csvs=csvs, cache_dir=tmp_path / "cache")
+        csvs["30"].write_text(csvs["30"].read_text().replace("48.47", "99.99"))
+        os.utime(csvs["30"], ns=(0, 0))
+        df = load_market_data(csvs=csvs, cache_dir=tmp_path / "cache")
+        assert df["Price 30 min (£/MWh)"].iloc[0] == 99.99
+
+
+def test_load_market_data_markets(tmp_path):
+    """Market data of any markets loads from a mapping of market to CSV file, with timesteps of the shortest market."""
+    csvs = {"15": tmp_path / "15min.csv", "240": tmp_path / "4h.csv"}
+    pd.Series(
+        np.arange(32.0), index=pd.date_range("2018-01-01", periods=32, freq="15min").strftime("%d/%m/%Y %H:%M")
+    ).to_csv(csvs["15"])
+    pd.Series(
+        [40.0, 60.0], index=pd.date_range("2018-01-01", periods=2, freq="4h").strftime("%d/%m/%Y %H:%M")
+    ).to_csv(csvs["240"])
+    markets = {"15": "15min", "240": "4h"}
+    df = load_market_data(csvs=csvs, markets=markets)
+    pd.testing.assert_index_equal(
+        df.index, pd.Index(pd.date_range("2018-01-01", periods=32, freq="15min"), name="time"), exact=False
+    )
+    np.testing.assert_array_equal(df["Price 15 min (£/MWh)"], np.arange(32.0))
+    np.testing.assert_array_equal(df["Price 240 min (£/MWh)"], np.repeat([40.0, 60.0], 16))
+    pd.testing.assert_frame_equal(df.iloc[:16], load_market_data(csvs=csvs, markets=markets, nrows=16))
+    with pytest.raises(ValueError):
+        load_market_data(csvs=csvs, markets=markets, nrows=8)
+    with pytest.raises(ValueError):
+        load_market_data(csvs=csvs)
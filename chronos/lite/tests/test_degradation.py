@@ -0,0 +1,106 @@
+"""Test degradation module."""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from chronos.lite.degradation import count_cycles, degraded_storage_volume, simulate_lifetime, throughput_cycles
+from chronos.lite.model import Model
+
+
+@pytest.fixture
+def four_day_market_data(make_daily_market_data):
+    """Four days of daily-cycling market data."""
+    return make_daily_market_data(4)
+
+
+class TestCycleCounting:
+    """Validate equivalent full cycle counts."""
+
+    def test_partial_cycles_add_up(self):
+        """Charging to 75%, discharging, charging to 25% and discharging counts as one cycle."""
+        cycles = throughput_cycles(np.array([0.0, 3.0, 0.0, 1.0, 0.0]), 4.0)
+        assert cycles.sum() == pytest.approx(1.0)
+
+    def test_vectorised_over_profiles(self):
+        """Leading axes are counted as separate profiles."""
+        stored_energy = np.array([[0.0, 4.0, 0.0], [0.0, 2.0, 2.0]])
+        np.testing.assert_allclose(throughput_cycles(stored_energy, 4.0), [[0.5, 0.5], [0.25, 0.0]])
+
+    def test_count_cycles_includes_final_timestep(self, realistic_battery_config, four_day_market_data):
+        """Cycles include the stored energy change over the last timestep."""
+        model = Model(realistic_battery_config, four_day_market_data)
+        model.solve()
+        cycles = count_cycles(model.solution_to_dataframe(), realistic_battery_config)
+        assert len(cycles) == len(four_day_market_data)
+        assert cycles.sum() > 0
+
+    def test_degraded_storage_volume(self, realistic_battery_config):
+        """Storage volume is lost linearly with cycles, down to nothing."""
+        config = {**realistic_battery_config, "Max storage volume": 4.0, "Storage volume degradation rate": 0.01}
+        assert degraded_storage_volume(config, 1000) == pytest.approx(3.6)
+        assert degraded_storage_volume(config, 20000) == 0.0
+
+
+class TestLifetimeSimulation:
+    """Validate degradation-aware lifetime simulations."""
+
+    def test_without_degradation_matches_single_period(self, realistic_battery_config, four_day_market_data):
+        """A single period without degradation reproduces the model solution."""
+        config = {**realistic_battery_config, "Storage volume degradation rate": 0.0}
+        solution = simulate_lifetime(config, four_day_market_data, period="7D")
+        model = Model(config, four_day_market_data)
+        model.solve()
+        assert solution.objective == pytest.approx(model.objective.value)
+        assert solution.end_of_life is None
+
+    @pytest.mark.parametrize("builder", ["linopy", "sparse"])
+    def test_storage_volume_degrades_between_periods(self, realistic_battery_config, four_day_market_data, builder):
+        """Each period is solved with the storage volume left after the cycles of previous periods."""
+        config = {**realistic_battery_config, "Storage volume degradation rate": 1.0}
+        solution = simulate_lifetime(config, four_day_market_data, period="1D", builder=builder)
+        periods = solution.periods
+        assert len(periods) == 4
+        previous_cycles = periods["Cycles"].cumsum().shift(fill_value=0.0)
+        expected_volumes = [degraded_storage_volume(config, cycles) for cycles in previous_cycles]
+        np.testing.assert_allclose(periods["Max storage volume"], expected_volumes)
+        assert periods["Max storage volume"].is_monotonic_decreasing
+        df = solution.solution_to_dataframe()
+        for start, volume in periods["Max storage volume"].items():
+            assert (df.loc[start:start + pd.Timedelta("1D"), "stored energy"] <= volume + 1e-6).all()
+
+    def test_cycles_counted_against_original_volume(self, realistic_battery_config, four_day_market_data):
+        """Cycles of degraded periods are counted against the original max storage volume."""
+        config = {**realistic_battery_config, "Storage volume degradation rate": 1.0}
+        solution = simulate_lifetime(config, four_day_market_data, period="1D")
+        df = solution.solution_to_dataframe()
+        for start, cycles in solution.periods["Cycles"].items():
+            period_df = df[(df.index >= start) & (df.index < start + pd.Timedelta("1D"))]
+            assert cycles == pytest.approx(count_cycles(period_df, config).sum())
+        assert solution.periods["Max storage volume"].iloc[-1] < config["Max storage volume"]
+
+    def test_stops_at_cycle_end_of_life(self, realistic_battery_config, four_day_market_data):
+        """The simulation stops at the timestep reaching the lifetime in cycles."""
+        config = {**realistic_battery_config, "Lifetime (2)": 1.5}
+        solution = simulate_lifetime(config, four_day_market_data, period="1D")
+        assert solution.end_of_life == solution.solution_to_dataframe().index[-1]
+        assert solution.end_of_life < four_day_market_data.index[-1]
+        assert solution.cycles == pytest.approx(1.5, abs=0.5)
+        assert solution.financial_summary()["End of life"] == solution.end_of_life
+
+    def test_stops_at_calendar_end_of_life(self, realistic_battery_config, four_day_market_data):
+        """The simulation stops after the lifetime in years."""
+        config = {**realistic_battery_config, "Lifetime (1)": 2 / 365.25}
+        solution = simulate_lifetime(config, four_day_market_data, period="1D")
+        assert solution.end_of_life == pd.Timestamp("2018-01-03")
+        assert solution.solution_to_dataframe().index[-1] < solution.end_of_life
+
+    def test_end_of_life_before_market_data(self, realistic_battery_config, four_day_market_data):
+        """A battery without any lifetime left has nothing to simulate."""
+        with pytest.raises(ValueError):
+            simulate_lifetime({**realistic_battery_config, "Lifetime (1)": 0.0}, four_day_market_data)
+
+    def test_periods_must_start_on_the_hour(self, realistic_battery_config, four_day_market_data):
+        """Periods starting part way through an hour are rejected."""
+        with pytest.raises(ValueError):
+            simulate_lifetime(realistic_battery_config, four_day_market_data, period="90min")
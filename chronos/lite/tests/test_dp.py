@@ -0,0 +1,112 @@
+"""Test dp module."""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from chronos.lite.dp import DynamicProgrammingModel
+from chronos.lite.model import Model
+
+
+class TestDynamicProgrammingModel:
+    """Validate dynamic programming model against the MILP."""
+
+    def test_solution_columns_match_model(self, realistic_battery_config, market_data):
+        """Solution dataframe has the same columns and index as `Model.solution_to_dataframe()`."""
+        dp_model = DynamicProgrammingModel(realistic_battery_config, market_data)
+        dp_model.solve()
+        model = Model(realistic_battery_config, market_data)
+        model.solve()
+        pd.testing.assert_index_equal(dp_model.solution_to_dataframe().columns, model.solution_to_dataframe().columns)
+        pd.testing.assert_index_equal(dp_model.solution_to_dataframe().index, model.solution_to_dataframe().index)
+
+    def test_unsolved_model_raises(self, realistic_battery_config, market_data):
+        """Solution is unavailable before solving."""
+        with pytest.raises(RuntimeError):
+            DynamicProgrammingModel(realistic_battery_config, market_data).solution_to_dataframe()
+
+    def test_charge_discharge_30min(self, realistic_battery_config):
+        """Battery can charge and discharge with half-hourly market."""
+        time = pd.Index(pd.date_range("2018-01-01", periods=2, freq="30min"), name="time")
+        market_data = pd.DataFrame(
+            data={
+                "Price 30 min (£/MWh)": [40.0, 50.0],
+                "Price 60 min (£/MWh)": [45.0, 45.0],
+            },
+            index=time,
+        )
+        dp_model = DynamicProgrammingModel(realistic_battery_config, market_data, soc_resolution=81)
+        dp_model.solve()
+        df = dp_model.solution_to_dataframe()
+        np.testing.assert_allclose(df["charge rate 30"], [2.0, 0.0])
+        np.testing.assert_allclose(df["discharge rate 30"], [0.0, 1.9])
+        np.testing.assert_allclose(df["stored energy"], [0.0, 0.95])
+
+    def test_charge_discharge_60min(self, realistic_battery_config):
+        """Battery can charge and discharge with hourly market."""
+        time = pd.Index(pd.date_range("2018-01-01", periods=4, freq="30min"), name="time")
+        market_data = pd.DataFrame(
+            data={
+                "Price 30 min (£/MWh)": [45.0, 50.0, 50.0, 50.0],
+                "Price 60 min (£/MWh)": [40.0, 40.0, 55.0, 55.0],
+            },
+            index=time,
+        )
+        dp_model = DynamicProgrammingModel(
+            realistic_battery_config, market_data, soc_resolution=81, rate_resolution=21
+        )
+        dp_model.solve()
+        df = dp_model.solution_to_dataframe()
+        np.testing.assert_allclose(df["charge rate 60"], [2.0, 2.0, 0.0, 0.0])
+        np.testing.assert_allclose(df["discharge rate 60"], [0.0, 0.0, 1.9, 1.9])
+
+    def test_hourly_commitment(self, realistic_battery_config, daily_market_data):
+        """Hourly market rates are constant within each hour."""
+        dp_model = DynamicProgrammingModel(realistic_battery_config, daily_market_data)
+        dp_model.solve()
+        df = dp_model.solution_to_dataframe()
+        for column in ["charge rate 60", "discharge rate 60"]:
+            np.testing.assert_allclose(df[column].to_numpy()[::2], df[column].to_numpy()[1::2])
+
+    def test_objective_bounded_by_milp(self, realistic_battery_config, daily_market_data):
+        """Dynamic programming objective is a lower bound on the MILP optimum, within the LP relaxation gap bound."""
+        dp_model = DynamicProgrammingModel(realistic_battery_config, daily_market_data)
+        assert dp_model.solve() == ("ok", "approximate")
+        model = Model(realistic_battery_config, daily_market_data)
+        model.solve()
+        bound = dp_model.mip_gap_bound()
+        assert dp_model.objective_value <= model.objective.value + 1e-6
+        assert model.objective.value <= bound["LP relaxation bound"] + 1e-6
+        assert dp_model.objective_value == pytest.approx(
+            dp_model.financial_summary()["Export revenue"] - dp_model.financial_summary()["Import cost"]
+        )
+
+    def test_finer_grid_does_not_reduce_objective(self, realistic_battery_config, daily_market_data):
+        """Refining the stored energy grid, which contains the coarser grid, cannot reduce the objective."""
+        coarse = DynamicProgrammingModel(realistic_battery_config, daily_market_data, soc_resolution=21)
+        coarse.solve()
+        fine = DynamicProgrammingModel(realistic_battery_config, daily_market_data, soc_resolution=41)
+        fine.solve()
+        assert fine.objective_value is not None and coarse.objective_value is not None
+        assert fine.objective_value >= coarse.objective_value - 1e-9
+
+    def test_off_grid_initial_stored_energy(self, realistic_battery_config, daily_market_data):
+        """An initial stored energy between grid points is solved from exactly, still bounded by the MILP optimum."""
+        initial_stored_energy = 0.3 * realistic_battery_config["Max storage volume"] / 40
+        dp_model = DynamicProgrammingModel(
+            realistic_battery_config, daily_market_data, initial_stored_energy=initial_stored_energy
+        )
+        dp_model.solve()
+        model = Model(realistic_battery_config, daily_market_data, initial_stored_energy=initial_stored_energy)
+        model.solve()
+        assert dp_model.solution_to_dataframe()["stored energy"].iloc[0] == initial_stored_energy
+        assert dp_model.objective_value is not None and model.objective.value is not None
+        assert dp_model.objective_value <= model.objective.value + 1e-6
+
+    def test_initial_stored_energy_within_storage_volume(self, realistic_battery_config, daily_market_data):
+        """Initial stored energy outside the storage volume is rejected."""
+        with pytest.raises(ValueError):
+            DynamicProgrammingModel(
+                realistic_battery_config, daily_market_data,
+                initial_stored_energy=realistic_battery_config["Max storage volume"] + 1.0,
+            )
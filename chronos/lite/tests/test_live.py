@@ -0,0 +1,72 @@
+"""Test live module."""
+
+import pandas as pd
+import pytest
+
+from chronos.lite.live import LiveModel
+from chronos.lite.rolling import solve_rolling_horizon
+
+
+class TestLiveModel:
+    """Validate receding-horizon updates against rolling-horizon solves."""
+
+    def test_matches_rolling_horizon(self, realistic_battery_config, two_day_market_data):
+        """Executing 12h at a time, with 12h of prices arriving each time, matches a rolling-horizon solve."""
+        live = LiveModel(realistic_battery_config, two_day_market_data.iloc[:24], window="12h")
+        for start in pd.date_range("2018-01-01", periods=8, freq="6h"):
+            live.solve()
+            live.execute(start + pd.Timedelta("6h"))
+            live.append_market_data(two_day_market_data[(two_day_market_data.index >= start + pd.Timedelta("12h"))
+                                                & (two_day_market_data.index < start + pd.Timedelta("18h"))])
+        history = live.history()
+        rolling = solve_rolling_horizon(realistic_battery_config, two_day_market_data, window="6h", lookahead="6h")
+        pd.testing.assert_index_equal(history.index, two_day_market_data.index)
+        assert (history["Export revenue"] - history["Import cost"]).sum() == pytest.approx(rolling.objective, rel=1e-4)
+        # The window model is only rebuilt once the window is truncated by the end of the market data
+        assert live.model_builds == 2
+
+    def test_realised_dispatch(self, realistic_battery_config, two_day_market_data):
+        """Executed timesteps are fixed at their realised dispatch and stored energy."""
+        live = LiveModel(realistic_battery_config, two_day_market_data, window="12h", initial_stored_energy=1.0)
+        live.solve()
+        realised = pd.DataFrame(0.0, index=two_day_market_data.index, columns=live.schedule().columns)
+        realised["charge rate 30"] = 1.0
+        live.execute("2018-01-01 02:00", realised=realised)
+        history = live.history()
+        assert history["stored energy"].iloc[0] == pytest.approx(1.0)
+        charging_loss = realistic_battery_config["Battery charging loss"]
+        assert live.stored_energy == pytest.approx(1.0 + 4 * 0.5 * (1 - charging_loss))
+        live.solve()
+        assert live.schedule()["stored energy"].iloc[0] == pytest.approx(live.stored_energy)
+        live.execute("2018-01-01 03:00", stored_energy=0.5)
+        assert live.stored_energy == 0.5
+        assert len(live.history()) == 6
+
+    def test_execute_on_the_hour(self, realistic_battery_config, two_day_market_data):
+        """Hourly market commitments cannot be split by execution."""
+        live = LiveModel(realistic_battery_config, two_day_market_data, window="12h")
+        live.solve()
+        with pytest.raises(ValueError):
+            live.execute("2018-01-01 00:30")
+
+    def test_append_earlier_market_data(self, realistic_battery_config, two_day_market_data):
+        """New prices must be later than the prices known so far."""
+        live = LiveModel(realistic_battery_config, two_day_market_data, window="12h")
+        with pytest.raises(ValueError):
+            live.append_market_data(two_day_market_data.iloc[-2:])
+
+    @pytest.mark.parametrize("window, markets", [
+        ("3h", {"30": "30min", "60": "1h", "120": "2h"}),
+        ("30min", {"30": "30min", "60": "1h"}),
+    ])
+    def test_window_of_longest_interval(self, realistic_battery_config, two_day_market_data, window, markets):
+        """The window must be a whole number of the longest settlement interval of the markets."""
+        with pytest.raises(ValueError):
+            LiveModel(realistic_battery_config, two_day_market_data, window=window, markets=markets)
+
+    def test_half_hourly_window(self, realistic_battery_config, two_day_market_data):
+        """With only a half-hourly market, the window can be any whole number of half hours."""
+        live = LiveModel(realistic_battery_config, two_day_market_data[["Price 30 min (£/MWh)"]], window="90min",
+                         markets={"30": "30min"})
+        live.solve()
+        assert len(live.schedule()) == 3
@@ -1,33 +1,25 @@
 """Test model module."""
 
-from pathlib import Path
+import re
+import zipfile
 
 import linopy
+import numpy as np
 import pandas as pd
 import pytest
 
-from chronos.lite.data import load_battery_config, load_market_data
-from chronos.lite.model import Model
+from chronos.lite.model import Model, settlement_starts, simultaneous_charge_discharge, solve_lazy_binaries
 
-TEST_DATA_DIR = Path(__file__).parent / "test_files"
-
-@pytest.fixture
-def battery_config():
-    """Simple battery config fixture used to validate setup."""
-    return load_battery_config(TEST_DATA_DIR / "test_battery_config.csv")
-
-@pytest.fixture
-def realistic_battery_config():
-    """Realistic battery config fixture used to validate behaviour."""
-    return load_battery_config(TEST_DATA_DIR / "realistic_battery_config.csv")
-
-@pytest.fixture
-def market_data():
-    """Market data fixture used to validate setup."""
-    return load_market_data(
-        half_hourly_csv=TEST_DATA_DIR / "test_30min_market_data.csv",
-        hourly_csv=TEST_DATA_DIR / "test_60min_market_data.csv",
-    )
+#: Solution dataframe columns of the model variables, with the default markets
+SOLUTION_VARIABLE_COLUMNS = [
+    "is charging",
+    "is discharging",
+    "charge rate 30",
+    "discharge rate 30",
+    "charge rate 60",
+    "discharge rate 60",
+    "stored energy",
+]
 
 @pytest.fixture
 def model(battery_config, market_data):
@@ -54,10 +46,39 @@ class TestModel:
     def test_model_coords(self, model):
         """Model sets variable coordinates from date-time index in market data."""
         pd.testing.assert_index_equal(
-            model.variables.coords.to_index(),
+            model.variables.indexes["time"],
             pd.Index(pd.date_range("2018-01-01", periods=6, freq="30min"), name="time")
         )
 
+    def test_model_hourly_coords(self, model):
+        """Model sets hourly market variable coordinates from the hours of the date-time index in market data."""
+        pd.testing.assert_index_equal(
+            model.variables.indexes["period 60"],
+            pd.Index(pd.date_range("2018-01-01", periods=3, freq="h"), name="period 60")
+        )
+        assert model.variables["charge rate 60"].dims == ("period 60",)
+        assert model.variables["discharge rate 60"].dims == ("period 60",)
+
+    def test_model_market_coords(self, model):
+        """Model declares rates into each market over its settlement periods, without commitment constraints."""
+        pd.testing.assert_index_equal(model.market, pd.Index(["30", "60"], name="market"))
+        pd.testing.assert_index_equal(model.variables.indexes["period 30"], model.time.rename("period 30"))
+        np.testing.assert_array_equal(
+            settlement_starts(model.time, model.markets).values,
+            [[True] * 6, [True, False, True, False, True, False]],
+        )
+        assert not any("commitment" in name for name in model.constraints)
+
+    def test_model_missing_market_prices(self, battery_config, market_data):
+        """Market data must have a price column of every market."""
+        with pytest.raises(ValueError):
+            Model(battery_config, market_data, markets={"30": "30min", "60": "1h", "240": "4h"})
+
+    def test_model_timesteps_spaced_at_shortest_interval(self, battery_config, market_data):
+        """Market data must have timesteps of the shortest settlement interval, which sets the timestep duration."""
+        with pytest.raises(ValueError):
+            Model(battery_config, market_data[["Price 60 min (£/MWh)"]], markets={"60": "1h"})
+
     def test_model_variable_is_charging(self, model):
         """Charging decision variable is boolean."""
         assert (model.variables["is charging"].type == "Binary Variable")
@@ -94,6 +115,34 @@ class TestModel:
         assert (model.variables["discharge rate 60"].lower == 0.0).all()
         assert (model.variables["discharge rate 60"].upper == 2.0).all()
 
+    def test_model_variable_rates_other_markets(self, battery_config, market_data):
+        """Rates into any other market are continuous, bounded between 0 and the max charge/discharge rates."""
+        market_data = market_data.assign(**{"Price 120 min (£/MWh)": market_data["Price 60 min (£/MWh)"]})
+        model = Model(battery_config, market_data, markets={"30": "30min", "60": "1h", "120": "2h"})
+        for name, upper in [("charge rate 120", 1.0), ("discharge rate 120", 2.0)]:
+            assert (model.variables[name].type == "Continuous Variable")
+            assert (model.variables[name].lower == 0.0).all()
+            assert (model.variables[name].upper == upper).all()
+
+    def test_model_variable_stored_energy(self, model):
+        """Stored energy is continuous, bounded between 0 and max storage volume."""
+        assert (model.variables["stored energy"].type == "Continuous Variable")
+        assert (model.variables["stored energy"].lower == 0.0).all()
+        assert (model.variables["stored energy"].upper == 3.0).all()
+
+    def test_model_constraints_linear_in_time(self, battery_config):
+        """Constraint rows only refer to a bounded number of variables, however long the horizon."""
+        time = pd.Index(pd.date_range("2018-01-01", periods=17520, freq="30min"), name="time")
+        market_data = pd.DataFrame(
+            data={"Price 30 min (£/MWh)": 50.0, "Price 60 min (£/MWh)": 50.0},
+            index=time,
+        )
+        model = Model(battery_config, market_data)
+        assert model.constraints["energy balance"].lhs.nterm <= 6
+        assert model.constraints["available stored energy"].lhs.nterm <= 3
+        assert model.constraints["available storage capacity"].lhs.nterm <= 3
+
+
 class TestBehaviour:
     """Validate battery behaviour and constraints under different scenarios."""
 
@@ -110,7 +159,7 @@ class TestBehaviour:
         model = Model(realistic_battery_config, market_data)
         model.solve()
         pd.testing.assert_frame_equal(
-            model.variables.solution.to_dataframe(),
+            model.solution_to_dataframe()[SOLUTION_VARIABLE_COLUMNS],
             pd.DataFrame(
                 data={
                     "is charging": [1.0, 0.0],
@@ -119,6 +168,7 @@ class TestBehaviour:
                     "discharge rate 30": [0.0, 1.9],  # second half-hour discharges all of stored energy = 2x0.95=1.9MW
                     "charge rate 60": [0.0, 0.0],
                     "discharge rate 60": [0.0, 0.0],
+                    "stored energy": [0.0, 0.95],
                 },
                 index=time,
             )
@@ -137,7 +187,7 @@ class TestBehaviour:
         model = Model(realistic_battery_config, market_data)
         model.solve()
         pd.testing.assert_frame_equal(
-            model.variables.solution.to_dataframe(),
+            model.solution_to_dataframe()[SOLUTION_VARIABLE_COLUMNS],
             pd.DataFrame(
                 data={
                     "is charging": [1.0, 1.0, 0.0, 0.0],
@@ -146,7 +196,308 @@ class TestBehaviour:
                     "discharge rate 30": [0.0, 0.0, 0.0, 0.0],
                     "charge rate 60": [2.0, 2.0, 0.0, 0.0],  # hour 1 subject to charging losses, 1.9MWh stored
                     "discharge rate 60": [0.0, 0.0, 1.9, 1.9],  # hour 2 discharges all of stored energy,
+                    "stored energy": [0.0, 0.95, 1.9, 0.95],
+                },
+                index=time,
+            )
+        )
+
+
+    def test_hourly_commitment_aligned_by_timestamp(self, realistic_battery_config):
+        """Hourly market commitment follows the clock hour when data starts at a second half-hour."""
+        time = pd.Index(pd.date_range("2018-01-01 00:30", periods=3, freq="30min"), name="time")
+        market_data = pd.DataFrame(
+            data={
+                "Price 30 min (£/MWh)": [50.0, 50.0, 50.0],
+                "Price 60 min (£/MWh)": [40.0, 55.0, 55.0],
+            },
+            index=time,
+        )
+        model = Model(realistic_battery_config, market_data)
+        model.solve()
+        pd.testing.assert_frame_equal(
+            model.solution_to_dataframe()[["charge rate 60", "discharge rate 60", "stored energy"]],
+            pd.DataFrame(
+                data={
+                    "charge rate 60": [2.0, 0.0, 0.0],  # 00:00 hour only has its second half-hour in the data
+                    "discharge rate 60": [0.0, 0.95, 0.95],  # 01:00 hour discharges stored energy over both halves
+                    "stored energy": [0.0, 0.95, 0.475],
                 },
                 index=time,
             )
         )
+
+
+class TestMarkets:
+    """Validate markets with arbitrary settlement intervals."""
+
+    @pytest.fixture
+    def markets(self):
+        """15 minute, half-hourly and 4 hour markets."""
+        return {"15": "15min", "30": "30min", "240": "4h"}
+
+    @pytest.fixture
+    def market_data(self):
+        """Eight hours of 15 minute market data, with prices cycling at different phases in each market."""
+        time = pd.Index(pd.date_range("2018-01-01", periods=32, freq="15min"), name="time")
+        cycle = 50.0 + 20.0 * np.sin(2 * np.pi * np.arange(32) / 32)
+        return pd.DataFrame(
+            data={
+                "Price 15 min (£/MWh)": cycle + np.tile([0.0, 4.0, -4.0, 0.0], 8),
+                "Price 30 min (£/MWh)": np.repeat(cycle[::2] + np.tile([2.0, -2.0], 8), 2),
+                "Price 240 min (£/MWh)": np.repeat([45.0, 60.0], 16),
+            },
+            index=time,
+        )
+
+    def test_rates_committed_for_settlement_period(self, realistic_battery_config, market_data, markets):
+        """Rates into each market are constant over its settlement periods, with 15 minute timesteps."""
+        model = Model(realistic_battery_config, market_data, markets=markets)
+        assert model.timestep_duration == 0.25
+        model.solve()
+        df = model.solution_to_dataframe()
+        for market, interval in markets.items():
+            rates = df[[f"charge rate {market}", f"discharge rate {market}"]].resample(interval)
+            np.testing.assert_allclose(rates.max() - rates.min(), 0.0, atol=1e-9)
+        assert df["charge rate 240"].iloc[0] > 0.0 and df["discharge rate 240"].iloc[-1] > 0.0
+
+        # Stored energy follows the net energy flow across all markets over each 15 minute timestep
+        charge_rate = df[["charge rate 15", "charge rate 30", "charge rate 240"]].sum(axis=1)
+        discharge_rate = df[["discharge rate 15", "discharge rate 30", "discharge rate 240"]].sum(axis=1)
+        charging_loss = realistic_battery_config["Battery charging loss"]
+        net_energy_flow = 0.25 * (charge_rate * (1 - charging_loss) - discharge_rate)
+        np.testing.assert_allclose(df["stored energy"].diff().iloc[1:], net_energy_flow.iloc[:-1], atol=1e-9)
+        assert (df["Export revenue"] - df["Import cost"]).sum() == pytest.approx(model.objective.value)
+
+
+class TestLazyBinaries:
+    """Validate LP-first solve with binaries only where they matter."""
+
+    def test_benign_prices_need_no_binaries(self, realistic_battery_config):
+        """Positive prices are solved as a pure LP with the same result as the full MILP."""
+        time = pd.Index(pd.date_range("2018-01-01", periods=4, freq="30min"), name="time")
+        market_data = pd.DataFrame(
+            data={
+                "Price 30 min (£/MWh)": [45.0, 50.0, 50.0, 50.0],
+                "Price 60 min (£/MWh)": [40.0, 40.0, 55.0, 55.0],
+            },
+            index=time,
+        )
+        lazy_model = solve_lazy_binaries(realistic_battery_config, market_data)
+        model = Model(realistic_battery_config, market_data)
+        model.solve()
+        assert not lazy_model.binary_mask.any()
+        assert lazy_model.objective.value == pytest.approx(model.objective.value)
+        pd.testing.assert_series_equal(
+            lazy_model.solution_to_dataframe()["is charging"], model.solution_to_dataframe()["is charging"]
+        )
+
+    def test_divergent_prices_add_binaries(self, realistic_battery_config):
+        """Binaries are added where the LP would charge and discharge at once, recovering the full MILP optimum."""
+        time = pd.Index(pd.date_range("2018-01-01", periods=6, freq="30min"), name="time")
+        market_data = pd.DataFrame(
+            data={
+                "Price 30 min (£/MWh)": [10.0, 10.0, -80.0, -80.0, 50.0, 50.0],
+                "Price 60 min (£/MWh)": [20.0, 20.0, 150.0, 150.0, 50.0, 50.0],
+            },
+            index=time,
+        )
+        lazy_model = solve_lazy_binaries(realistic_battery_config, market_data)
+        model = Model(realistic_battery_config, market_data)
+        model.solve()
+        assert lazy_model.binary_mask.any()
+        assert not lazy_model.binary_mask.all()
+        assert not simultaneous_charge_discharge(lazy_model.solution_to_dataframe()).any()
+        assert lazy_model.objective.value == pytest.approx(model.objective.value)
+
+
+class TestParametricResolve:
+    """Validate in-place updates and warm-started re-solves against freshly built models."""
+
+    @pytest.mark.parametrize("changes", [
+        {"Max storage volume": 2.5},
+        {"Max charging rate": 1.0},
+        {"Max discharging rate": 1.5},
+        {"Battery charging loss": 0.1},
+        {"Battery discharging loss": 0.1},
+    ])
+    def test_update_battery_config(self, realistic_battery_config, daily_market_data, changes):
+        """Re-solving an updated model matches a model built with the updated battery configuration."""
+        model = Model(realistic_battery_config, daily_market_data)
+        model.solve()
+        model.update_battery_config(changes)
+        model.resolve()
+        fresh_model = Model({**realistic_battery_config, **changes}, daily_market_data)
+        fresh_model.solve()
+        assert model.objective.value == pytest.approx(fresh_model.objective.value, rel=1e-4)
+
+    def test_update_battery_config_bounds(self, model):
+        """Variable bounds follow the updated battery configuration."""
+        model.update_battery_config({"Max charging rate": 1.5, "Max storage volume": 5.0})
+        assert (model.variables["charge rate 30"].upper == 1.5).all()
+        assert (model.variables["charge rate 60"].upper == 1.5).all()
+        assert (model.variables["stored energy"].upper == 5.0).all()
+
+    def test_update_market_data(self, realistic_battery_config, daily_market_data):
+        """Re-solving with updated prices matches a model built with the updated prices."""
+        model = Model(realistic_battery_config, daily_market_data)
+        model.solve()
+        updated_market_data = daily_market_data.iloc[::-1].set_axis(daily_market_data.index)
+        model.update_market_data(updated_market_data)
+        model.resolve()
+        fresh_model = Model(realistic_battery_config, updated_market_data)
+        fresh_model.solve()
+        assert model.objective.value == pytest.approx(fresh_model.objective.value, rel=1e-4)
+
+    def test_resolve_lp_reuses_basis(self, realistic_battery_config, daily_market_data):
+        """Repeated re-solves of an LP match a freshly built LP."""
+        binary_mask = pd.Series(False, index=daily_market_data.index)
+        model = Model(realistic_battery_config, daily_market_data, binary_mask=binary_mask)
+        model.solve()
+        for max_storage_volume in [3.0, 3.5]:
+            model.update_battery_config({"Max storage volume": max_storage_volume})
+            model.resolve()
+        fresh_model = Model(
+            {**realistic_battery_config, "Max storage volume": 3.5}, daily_market_data, binary_mask=binary_mask
+        )
+        fresh_model.solve()
+        assert model.objective.value == pytest.approx(fresh_model.objective.value)
+
+    def test_update_market_data_index_mismatch(self, model, market_data):
+        """Updated prices must cover the same timesteps."""
+        with pytest.raises(ValueError):
+            model.update_market_data(market_data.iloc[:4])
+
+    def test_resolve_before_solve(self, model):
+        """Re-solving requires a previous solution."""
+        with pytest.raises(RuntimeError):
+            model.resolve()
+
+
+class TestAnytimeSolve:
+    """Validate solve settings, progress reporting and gap reporting."""
+
+    def test_progress_callback(self, realistic_battery_config, daily_market_data):
+        """Progress is reported while HiGHS runs, and the final gap alongside the financial summary."""
+        progress = []
+        model = Model(realistic_battery_config, daily_market_data)
+        model.solve(mip_rel_gap=1e-6, threads=1, progress_callback=progress.append)
+        assert progress
+        assert set(progress[-1]) == {"Running time", "Objective", "Bound", "Gap"}
+        summary = model.financial_summary()
+        assert summary["Termination condition"] == "optimal"
+        assert summary["MIP gap"] <= 1e-6
+
+    def test_time_limit_keeps_incumbent(self, realistic_battery_config, daily_market_data):
+        """Reaching the time limit keeps the best solution found so far."""
+        model = Model(realistic_battery_config, daily_market_data)
+        status, termination_condition = model.solve(time_limit=0.0)
+        assert (status, termination_condition) == ("ok", "time_limit")
+        assert model.financial_summary()["Termination condition"] == "time_limit"
+
+    def test_deterministic(self, realistic_battery_config, daily_market_data):
+        """Deterministic solves of the same model return the same solution."""
+        solutions = []
+        for _ in range(2):
+            model = Model(realistic_battery_config, daily_market_data)
+            model.solve(deterministic=True)
+            solutions.append(model.solution_to_dataframe())
+        pd.testing.assert_frame_equal(*solutions)
+
+    def test_lp_gap(self, realistic_battery_config, daily_market_data):
+        """An optimal LP has no gap."""
+        model = Model(realistic_battery_config, daily_market_data)
+        model.solve(solve_relaxation=True)
+        assert model.mip_gap == 0.0
+
+    def test_gap_without_highs(self, realistic_battery_config, daily_market_data):
+        """Solvers other than HiGHS report no gap."""
+        model = Model(realistic_battery_config, daily_market_data)
+        model.solve()
+        model.solver_model = None
+        assert np.isnan(model.mip_gap)
+        assert np.isnan(model.financial_summary()["MIP gap"])
+
+
+class TestStats:
+    """Validate phase timings and problem size."""
+
+    def test_stats(self, battery_config, market_data):
+        """Each phase is timed and reported to the hook, and problem size matches HiGHS."""
+        phases = []
+        model = Model(battery_config, market_data, stats_hook=lambda phase, stats: phases.append(phase))
+        model.solve(io_api="direct")
+        model.solution_to_dataframe()
+        assert phases == [
+            "init_variables",
+            "init_constraints",
+            "init_objective",
+            "to_highspy",
+            "solve",
+            "highs_run",
+            "solution_to_dataframe",
+        ]
+        assert set(model.stats.timings) == set(phases)
+        h = model.solver_model
+        assert model.stats.variables == h.getNumCol()
+        assert model.stats.constraints == h.getNumRow()
+        assert model.stats.nonzeros == h.getNumNz()
+        assert model.stats.binaries == 2 * len(market_data)
+        assert model.stats.to_dict()["timings"] == model.stats.timings
+
+    def test_stats_without_highs(self, battery_config, market_data, monkeypatch):
+        """Solvers other than HiGHS, which have no solver model to report its run time, are still timed."""
+        solve = linopy.Model.solve
+
+        def solve_without_solver_model(self, *args, **kwargs):
+            status = solve(self, *args, **kwargs)
+            self.solver_model = None
+            return status
+
+        monkeypatch.setattr(linopy.Model, "solve", solve_without_solver_model)
+        model = Model(battery_config, market_data)
+        model.solve()
+        assert "solve" in model.stats.timings
+        assert "highs_run" not in model.stats.timings
+
+
+class TestSolutionExport:
+    """Validate the cached solution dataframe and streaming Excel export."""
+
+    def test_solution_dataframe_cached_until_resolve(self, realistic_battery_config, daily_market_data):
+        """The solution dataframe is computed once per solve."""
+        model = Model(realistic_battery_config, daily_market_data)
+        model.solve()
+        df = model.solution_to_dataframe()
+        assert model.solution_to_dataframe() is df
+        model.update_battery_config({"Max storage volume": 2.0})
+        model.resolve()
+        assert model.solution_to_dataframe() is not df
+        assert model.solution_to_dataframe()["stored energy"].max() <= 2.0 + 1e-9
+
+    def test_solution_dataframe_rates_by_market(self, realistic_battery_config, daily_market_data):
+        """Each market's rates are a column of the solution, constant over each hourly settlement period."""
+        model = Model(realistic_battery_config, daily_market_data)
+        model.solve()
+        df = model.solution_to_dataframe()
+        np.testing.assert_allclose(df["charge rate 30"], model.solution["charge rate 30"])
+        np.testing.assert_allclose(df["charge rate 60"], model.solution["charge rate 60"].values.repeat(2))
+        hourly_rates = df[["charge rate 60", "discharge rate 60"]].resample("h")
+        np.testing.assert_allclose(hourly_rates.max() - hourly_rates.min(), 0.0, atol=1e-9)
+
+    def test_solution_to_excel(self, realistic_battery_config, daily_market_data, tmp_path):
+        """Every solution row and financial summary entry is written to Excel."""
+        model = Model(realistic_battery_config, daily_market_data)
+        model.solve()
+        path = tmp_path / "solution.xlsx"
+        model.solution_to_excel(path)
+        with zipfile.ZipFile(path) as xlsx:
+            assert re.findall(r'<sheet name="([^"]+)"', xlsx.read("xl/workbook.xml").decode()) == [
+                "Battery Configuration", "Run Data", "Financial Summary"
+            ]
+            n_rows = [
+                len(re.findall(r"<row ", xlsx.read(f"xl/worksheets/sheet{i}.xml").decode())) for i in (1, 2, 3)
+            ]
+        assert n_rows == [
+            len(realistic_battery_config) + 1, len(daily_market_data) + 1, len(model.financial_summary()) + 1
+        ]
@@ -0,0 +1,63 @@
+"""Test plot module."""
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+import pytest
+
+from chronos.lite.plot import minmax_decimate, plot_solution
+
+
+@pytest.fixture
+def solution_df():
+    """Long solution dataframe, with a single peak in each column."""
+    time = pd.Index(pd.date_range("2018-01-01", periods=52608, freq="30min"), name="time")
+    columns = [
+        "Price 30 min (£/MWh)",
+        "Price 60 min (£/MWh)",
+        "stored energy",
+        "charge rate 30",
+        "discharge rate 30",
+        "charge rate 60",
+        "discharge rate 60",
+    ]
+    values = np.zeros((len(time), len(columns)))
+    values[12345] = 9.0
+    return pd.DataFrame(values, index=time, columns=columns)
+
+
+@pytest.fixture(autouse=True)
+def no_show(monkeypatch):
+    """Don't render figures during tests."""
+    monkeypatch.setattr(go.Figure, "show", lambda self: None)
+
+
+class TestPlot:
+    """Validate decimated plotting of long solutions."""
+
+    def test_minmax_decimate_keeps_extremes(self):
+        """Decimation keeps the first, last, minimum and maximum points, in order."""
+        y = np.sin(np.arange(10_000) / 100)
+        y[5000] = 10.0
+        y[7000] = np.nan
+        indices = minmax_decimate(y, max_points=100)
+        assert len(indices) <= 102
+        assert np.all(np.diff(indices) > 0)
+        assert {0, 5000, 9999} <= set(indices)
+        assert np.nanmin(y[indices]) == pytest.approx(np.nanmin(y))
+
+    def test_minmax_decimate_short_series(self):
+        """Series no longer than max points are not decimated."""
+        np.testing.assert_array_equal(minmax_decimate(np.ones(10), max_points=10), np.arange(10))
+
+    def test_plot_solution_decimated(self, solution_df):
+        """Long solutions are plotted with decimated WebGL traces, which keep peaks."""
+        fig = plot_solution(solution_df, max_points=1000)
+        assert all(isinstance(trace, go.Scattergl) for trace in fig.data)
+        assert all(len(trace.x) <= 1002 for trace in fig.data)
+        assert max(fig.data[2].y) == 9.0
+
+    def test_plot_solution_full_resolution(self, solution_df):
+        """Solutions can still be plotted at full resolution."""
+        fig = plot_solution(solution_df.iloc[:100], max_points=None)
+        assert all(isinstance(trace, go.Scatter) and len(trace.x) == 100 for trace in fig.data)
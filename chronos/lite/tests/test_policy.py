@@ -0,0 +1,109 @@
+"""Test policy module."""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from chronos.lite.data import price_column
+from chronos.lite.model import TIMESTEP_DURATION, Model, financial_summary
+from chronos.lite.policy import percentile_signal, simulate_policy, threshold_signal, time_of_day_signal
+
+
+class TestSignals:
+    """Validate policy signals."""
+
+    def test_threshold_signal(self):
+        """Charge below the low threshold, discharge above the high threshold, otherwise idle."""
+        prices = pd.Series([10.0, 50.0, 90.0])
+        signal = threshold_signal(prices, charge_below=30.0, discharge_above=70.0)
+        np.testing.assert_array_equal(signal, [1.0, 0.0, -1.0])
+
+    def test_time_of_day_signal(self, two_day_market_data):
+        """Charge and discharge in the given hours of every day."""
+        signal = time_of_day_signal(two_day_market_data.index, charge_hours=[2, 3], discharge_hours=[18])
+        hour = signal.index.to_series().dt.hour
+        assert (signal[hour.isin([2, 3])] == 1.0).all()
+        assert (signal[hour == 18] == -1.0).all()
+        assert (signal == 1.0).sum() == 8
+        assert (signal == -1.0).sum() == 4
+
+    def test_percentile_signal(self, two_day_market_data):
+        """Each day charges in its lowest prices and discharges in its highest prices."""
+        prices = two_day_market_data[price_column("30")]
+        signal = percentile_signal(prices, lower=25, upper=75)
+        for _, day in signal.resample("1D"):
+            assert (day == 1.0).sum() == 12
+            assert (day == -1.0).sum() == 12
+        assert prices[signal == 1.0].max() < prices[signal == -1.0].min()
+
+    def test_percentile_signal_bands_must_be_ordered(self, two_day_market_data):
+        """Lower percentiles above upper percentiles are rejected."""
+        with pytest.raises(ValueError):
+            percentile_signal(two_day_market_data[price_column("30")], lower=80, upper=20)
+
+
+class TestSimulatePolicy:
+    """Validate policy dispatch against the constraints and outputs of `Model`."""
+
+    @pytest.mark.parametrize("market", ["30", "60"])
+    def test_dispatch_is_feasible(self, realistic_battery_config, two_day_market_data, market):
+        """Dispatch respects rate limits, storage volume, stored energy, losses and settlement periods."""
+        config = realistic_battery_config
+        signal = threshold_signal(two_day_market_data[price_column(market)], charge_below=45.0, discharge_above=55.0)
+        df = simulate_policy(config, two_day_market_data, signal, market=market)
+        charge_rate, discharge_rate = df[f"charge rate {market}"], df[f"discharge rate {market}"]
+        assert (charge_rate <= config["Max charging rate"] + 1e-9).all()
+        assert (discharge_rate <= config["Max discharging rate"] + 1e-9).all()
+        assert (TIMESTEP_DURATION * charge_rate <= config["Max storage volume"] - df["stored energy"] + 1e-9).all()
+        assert (TIMESTEP_DURATION * discharge_rate <= df["stored energy"] + 1e-9).all()
+        net_energy_flow = TIMESTEP_DURATION * (charge_rate * (1 - config["Battery charging loss"]) - discharge_rate)
+        np.testing.assert_allclose(df["stored energy"].diff().iloc[1:], net_energy_flow.iloc[:-1], atol=1e-9)
+        other_market = {"30": "60", "60": "30"}[market]
+        assert (df[[f"charge rate {other_market}", f"discharge rate {other_market}"]] == 0.0).all().all()
+        if market == "60":
+            hourly = df.resample("1h")
+            assert (hourly[f"charge rate {market}"].nunique() == 1).all()
+            assert (hourly[f"discharge rate {market}"].nunique() == 1).all()
+
+    def test_hourly_commitment_limits_rate(self, realistic_battery_config, two_day_market_data):
+        """An hourly commitment charges only as fast as the storage volume allows over the whole hour."""
+        config = {**realistic_battery_config, "Max storage volume": 1.0}
+        signal = pd.Series(1.0, index=two_day_market_data.index)
+        df = simulate_policy(config, two_day_market_data, signal, market="60")
+        efficiency = 1 - config["Battery charging loss"]
+        assert df["charge rate 60"].iloc[0] == pytest.approx(1.0 / (TIMESTEP_DURATION * (1 + efficiency)))
+        assert df["stored energy"].max() <= 1.0 + 1e-9
+
+    def test_matches_model_outputs(self, realistic_battery_config, two_day_market_data):
+        """Dispatch has the same columns as the model solution, and profits no more than the optimum."""
+        signal = percentile_signal(two_day_market_data[price_column("60")])
+        df = simulate_policy(realistic_battery_config, two_day_market_data, signal)
+        model = Model(realistic_battery_config, two_day_market_data)
+        model.solve()
+        assert df.columns.tolist() == model.solution_to_dataframe().columns.tolist()
+        summary = financial_summary(df, realistic_battery_config)
+        assert summary["Export revenue"] - summary["Import cost"] <= model.objective.value + 1e-6
+
+    def test_array_signal_taken_by_timestep(self, realistic_battery_config, two_day_market_data):
+        """An array signal dispatches the same as a series of the same values over the market data index."""
+        signal = threshold_signal(two_day_market_data[price_column("60")], charge_below=45.0, discharge_above=55.0)
+        pd.testing.assert_frame_equal(
+            simulate_policy(realistic_battery_config, two_day_market_data, signal.to_numpy()),
+            simulate_policy(realistic_battery_config, two_day_market_data, signal),
+        )
+
+    @pytest.mark.parametrize("signal", [
+        pd.Series(1.0, index=pd.date_range("2019-01-01", periods=96, freq="30min")),
+        np.ones(95),
+    ])
+    def test_misaligned_signal(self, realistic_battery_config, two_day_market_data, signal):
+        """Signals which don't line up with the market data are rejected rather than treated as idle."""
+        with pytest.raises(ValueError):
+            simulate_policy(realistic_battery_config, two_day_market_data, signal)
+
+    def test_unknown_market(self, realistic_battery_config, two_day_market_data):
+        """Trading into a market without prices is rejected."""
+        with pytest.raises(ValueError):
+            simulate_policy(
+                realistic_battery_config, two_day_market_data, pd.Series(0.0, index=two_day_market_data.index), "15"
+            )
@@ -0,0 +1,82 @@
+"""Test rolling module."""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from chronos.lite.model import Model
+from chronos.lite.rolling import compare_with_monolithic, final_stored_energy, solve_rolling_horizon
+
+
+class TestRollingHorizon:
+    """Validate rolling-horizon solves against the monolithic model."""
+
+    def test_single_window_matches_monolithic(self, realistic_battery_config, two_day_market_data):
+        """A window covering the whole horizon reproduces the monolithic solution."""
+        solution = solve_rolling_horizon(realistic_battery_config, two_day_market_data, window="2D", lookahead="0h")
+        model = Model(realistic_battery_config, two_day_market_data)
+        model.solve()
+        assert solution.objective == pytest.approx(model.objective.value)
+        pd.testing.assert_index_equal(solution.solution_to_dataframe().index, two_day_market_data.index)
+
+    def test_sequential_windows_hand_over_stored_energy(self, realistic_battery_config, two_day_market_data):
+        """Each committed window starts with the stored energy left at the end of the previous one."""
+        df = solve_rolling_horizon(
+            realistic_battery_config, two_day_market_data, window="12h", lookahead="12h"
+        ).solution_to_dataframe()
+        for boundary in pd.date_range("2018-01-01 12:00", periods=3, freq="12h"):
+            assert df.loc[boundary, "stored energy"] == pytest.approx(
+                final_stored_energy(df[df.index < boundary], realistic_battery_config), abs=1e-6
+            )
+
+    def test_parallel_windows_fix_boundary_stored_energy(self, realistic_battery_config, two_day_market_data):
+        """Parallel windows start and end at the fixed stored energy."""
+        solution = solve_rolling_horizon(
+            realistic_battery_config, two_day_market_data, window="1D", processes=2, fixed_stored_energy=1.0
+        )
+        df = solution.solution_to_dataframe()
+        assert df.loc["2018-01-02 00:00", "stored energy"] == pytest.approx(1.0)
+        assert final_stored_energy(df, realistic_battery_config) == pytest.approx(1.0)
+        assert solution.financial_summary()["End"] == two_day_market_data.index.max()
+
+    def test_compare_with_monolithic(self, realistic_battery_config, two_day_market_data):
+        """Rolling-horizon objective cannot exceed the monolithic objective."""
+        comparison = compare_with_monolithic(
+            realistic_battery_config, two_day_market_data, window="12h", lookahead="6h"
+        )
+        assert comparison["Absolute gap"] >= -1e-6
+        assert comparison["Relative gap"] == pytest.approx(
+            comparison["Absolute gap"] / comparison["Monolithic objective"]
+        )
+
+    def test_window_must_be_whole_hours(self, realistic_battery_config, two_day_market_data):
+        """Windows that would split an hourly market commitment are rejected."""
+        with pytest.raises(ValueError):
+            solve_rolling_horizon(realistic_battery_config, two_day_market_data, window="90min")
+
+    def test_windows_start_on_settlement_periods(self, realistic_battery_config, two_day_market_data):
+        """Windows of data starting part way through an hour start on the hour, keeping hourly commitments whole."""
+        market_data = two_day_market_data.iloc[1:]
+        df = solve_rolling_horizon(
+            realistic_battery_config, market_data, window="3h", lookahead="3h"
+        ).solution_to_dataframe()
+        pd.testing.assert_index_equal(df.index, market_data.index)
+        hourly_rates = df[["charge rate 60", "discharge rate 60"]].resample("h")
+        np.testing.assert_allclose(hourly_rates.max() - hourly_rates.min(), 0.0, atol=1e-9)
+
+    def test_markets_set_window_lengths(self, realistic_battery_config, two_day_market_data):
+        """Windows need only be whole settlement periods of the markets traded into."""
+        solution = solve_rolling_horizon(
+            realistic_battery_config, two_day_market_data[["Price 30 min (£/MWh)"]], window="90min", lookahead="0h",
+            markets={"30": "30min"},
+        )
+        df = solution.solution_to_dataframe()
+        assert "charge rate 60" not in df.columns
+        assert df.loc["2018-01-01 01:30", "stored energy"] == pytest.approx(
+            final_stored_energy(df[df.index < "2018-01-01 01:30"], realistic_battery_config, {"30": "30min"}), abs=1e-6
+        )
+
+    def test_parallel_rejects_lookahead(self, realistic_battery_config, two_day_market_data):
+        """Parallel windows have no look-ahead, so giving one is rejected rather than ignored."""
+        with pytest.raises(ValueError):
+            solve_rolling_horizon(realistic_battery_config, two_day_market_data, lookahead="12h", processes=2)
@@ -0,0 +1,90 @@
+"""Test scenario module."""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from chronos.lite.model import Model
+from chronos.lite.scenario import ScenarioModel, scenario_market_data
+
+
+@pytest.fixture
+def scenarios():
+    """Half a day of market data in each of three price scenarios, with the price cycle shifted between them."""
+    time = pd.Index(pd.date_range("2018-01-01", periods=24, freq="30min"), name="time")
+    scenarios = {}
+    for i, scenario in enumerate(["low", "mid", "high"]):
+        cycle = 50.0 + 20.0 * np.sin(2 * np.pi * np.arange(24) / 24 + i)
+        scenarios[scenario] = pd.DataFrame(
+            data={
+                "Price 30 min (£/MWh)": cycle + np.tile([0.0, 3.0], 12),
+                "Price 60 min (£/MWh)": np.repeat(cycle[::2], 2),
+            },
+            index=time,
+        )
+    return scenarios
+
+
+class TestScenarioModel:
+    """Validate solving many price scenarios in one model."""
+
+    def test_independent_matches_separate_models(self, realistic_battery_config, scenarios):
+        """Without a first stage, each scenario has the solution of a separate model of its prices."""
+        model = ScenarioModel(realistic_battery_config, scenario_market_data(scenarios))
+        model.solve()
+        summary = model.financial_summary()
+        for scenario, market_data in scenarios.items():
+            separate_model = Model(realistic_battery_config, market_data)
+            separate_model.solve()
+            profit = summary.loc[scenario, "Export revenue"] - summary.loc[scenario, "Import cost"]
+            assert profit == pytest.approx(separate_model.objective.value, abs=1e-4)
+            pd.testing.assert_index_equal(model.solution_to_dataframe(scenario).index, market_data.index)
+        assert model.objective.value == pytest.approx(
+            (summary["Probability"] * (summary["Export revenue"] - summary["Import cost"])).sum(), abs=1e-4
+        )
+
+    def test_two_stage_shares_first_stage(self, realistic_battery_config, scenarios):
+        """First stage rates are equal across scenarios, at a cost to the expected profit."""
+        market_data = scenario_market_data(scenarios)
+        independent_model = ScenarioModel(realistic_battery_config, market_data)
+        independent_model.solve()
+        model = ScenarioModel(realistic_battery_config, market_data, first_stage="4h")
+        model.solve()
+        solution_df = model.solution_to_dataframe()
+        for column in ["charge rate 30", "discharge rate 30", "charge rate 60", "discharge rate 60"]:
+            rates = solution_df[column].unstack("scenario")
+            first_stage = rates[rates.index < "2018-01-01 04:00"]
+            np.testing.assert_allclose(first_stage.to_numpy(), first_stage[["low"]].to_numpy().repeat(3, axis=1))
+        assert model.objective.value <= independent_model.objective.value + 1e-6
+
+    def test_probabilities_weight_objective(self, realistic_battery_config, scenarios):
+        """A scenario with probability 1 is solved as if it were the only scenario."""
+        probabilities = pd.Series({"low": 0.0, "mid": 1.0, "high": 0.0})
+        model = ScenarioModel(
+            realistic_battery_config, scenario_market_data(scenarios), probabilities=probabilities, first_stage="12h"
+        )
+        model.solve()
+        separate_model = Model(realistic_battery_config, scenarios["mid"])
+        separate_model.solve()
+        assert model.objective.value == pytest.approx(separate_model.objective.value, abs=1e-4)
+
+    @pytest.mark.parametrize("options", [
+        {"probabilities": pd.Series({"low": 0.5, "mid": 0.5})},
+        {"probabilities": pd.Series({"low": 0.5, "mid": 0.5, "high": 0.5})},
+        {"first_stage": "30min"},
+    ])
+    def test_invalid_options(self, realistic_battery_config, scenarios, options):
+        """Probabilities must be given for every scenario and sum to 1, and the first stage must be whole hours."""
+        with pytest.raises(ValueError):
+            ScenarioModel(realistic_battery_config, scenario_market_data(scenarios), **options)
+
+    def test_first_stage_of_half_hourly_market(self, realistic_battery_config, scenarios):
+        """With only a half-hourly market, the first stage can be any whole number of half hours."""
+        market_data = scenario_market_data({name: df[["Price 30 min (£/MWh)"]] for name, df in scenarios.items()})
+        model = ScenarioModel(realistic_battery_config, market_data, first_stage="90min", markets={"30": "30min"})
+        assert model.constraints["non-anticipativity charge rate 30"].shape == (2, 3)
+
+    def test_market_data_without_scenarios(self, realistic_battery_config, scenarios):
+        """Market data must have a scenario dimension."""
+        with pytest.raises(ValueError):
+            ScenarioModel(realistic_battery_config, scenarios["low"])
@@ -0,0 +1,71 @@
+"""Test sensitivity module."""
+
+import pandas as pd
+import pytest
+
+from chronos.lite.model import Model
+from chronos.lite.sensitivity import (
+    MARGINAL_VALUE_CONSTRAINTS,
+    fixed_binary_model,
+    marginal_values,
+    sensitivity_report,
+)
+
+
+@pytest.fixture
+def solved_model(realistic_battery_config, two_day_market_data):
+    """Model solved with binaries."""
+    model = Model(realistic_battery_config, two_day_market_data)
+    model.solve()
+    return model
+
+
+def _fixed_binary_objective(model: Model, battery_config: dict) -> float:
+    lp = fixed_binary_model(model, battery_config)
+    lp.solve()
+    return lp.objective.value
+
+
+class TestSensitivity:
+    """Validate marginal values against re-solves with perturbed battery configurations."""
+
+    def test_fixed_binary_model_matches_optimum(self, solved_model):
+        """Fixing binaries at their optimal values keeps the optimum of the model."""
+        lp = fixed_binary_model(solved_model)
+        lp.solve()
+        assert (lp.variables["is charging"].labels == -1).all()
+        assert lp.objective.value == pytest.approx(solved_model.objective.value)
+
+    def test_marginal_values_bracketed_by_finite_differences(self, realistic_battery_config, solved_model):
+        """Each marginal value lies between the objective change from removing and from adding capacity."""
+        values = marginal_values(solved_model).sum()
+        objective = solved_model.objective.value
+        delta = 0.01
+        for key in MARGINAL_VALUE_CONSTRAINTS:
+            increased = _fixed_binary_objective(
+                solved_model, {**realistic_battery_config, key: realistic_battery_config[key] + delta}
+            )
+            decreased = _fixed_binary_objective(
+                solved_model, {**realistic_battery_config, key: realistic_battery_config[key] - delta}
+            )
+            assert (increased - objective) / delta - 1e-6 <= values[key] <= (objective - decreased) / delta + 1e-6
+
+    def test_charging_rate_matches_finite_difference(self, realistic_battery_config, solved_model):
+        """Away from kinks, the marginal value is the objective change per unit of capacity."""
+        value = marginal_values(solved_model).sum()["Max charging rate"]
+        max_charging_rate = realistic_battery_config["Max charging rate"]
+        increased = _fixed_binary_objective(
+            solved_model, {**realistic_battery_config, "Max charging rate": max_charging_rate + 0.01}
+        )
+        assert value == pytest.approx((increased - solved_model.objective.value) / 0.01, rel=1e-6)
+
+    def test_report_aggregates_periods(self, solved_model):
+        """Periods of the report sum the marginal values of their timesteps."""
+        report = sensitivity_report(solved_model, freq="1D")
+        assert list(report.index) == list(pd.date_range("2018-01-01", periods=2, freq="1D"))
+        pd.testing.assert_series_equal(report.sum(), marginal_values(solved_model).sum())
+
+    def test_requires_solved_model(self, realistic_battery_config, two_day_market_data):
+        """Marginal values need the solution of the model."""
+        with pytest.raises(RuntimeError):
+            marginal_values(Model(realistic_battery_config, two_day_market_data))
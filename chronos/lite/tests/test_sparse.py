@@ -0,0 +1,82 @@
+"""Test sparse module."""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from chronos.lite.model import Model
+from chronos.lite.sparse import SparseModel
+
+
+@pytest.fixture
+def offset_daily_market_data(make_daily_market_data):
+    """One day of market data with a price cycle, starting at a second half-hour."""
+    return make_daily_market_data(1, start="2018-01-01 00:30")
+
+
+class TestSparseModel:
+    """Validate sparse matrix model against `Model`."""
+
+    @pytest.mark.parametrize("options", [
+        {},
+        {"initial_stored_energy": 1.0, "terminal_stored_energy": 2.0},
+        {"binary_mask": np.arange(48) % 4 == 0},
+    ])
+    def test_matches_model(self, realistic_battery_config, offset_daily_market_data, options):
+        """Problem size, objective and solution match `Model`."""
+        if "binary_mask" in options:
+            options = {"binary_mask": pd.Series(options["binary_mask"], index=offset_daily_market_data.index)}
+        model = Model(realistic_battery_config, offset_daily_market_data, **options)
+        model.solve(mip_rel_gap=0)
+        sparse_model = SparseModel(realistic_battery_config, offset_daily_market_data, **options)
+        assert sparse_model.solve(mip_rel_gap=0) == ("ok", "optimal")
+        for size in ["variables", "constraints", "nonzeros", "binaries"]:
+            assert getattr(sparse_model.stats, size) == getattr(model.stats, size)
+        assert sparse_model.objective_value == pytest.approx(model.objective.value)
+        df = sparse_model.solution_to_dataframe()
+        pd.testing.assert_index_equal(df.columns, model.solution_to_dataframe().columns)
+        assert (df["Export revenue"] - df["Import cost"]).sum() == pytest.approx(sparse_model.objective_value)
+        assert sparse_model.financial_summary()["MIP gap"] <= 1e-9
+
+    def test_matches_model_markets(self, realistic_battery_config, offset_daily_market_data):
+        """Problem size and objective match `Model` with other markets and settlement intervals."""
+        markets = {"30": "30min", "60": "1h", "240": "4h"}
+        market_data = offset_daily_market_data.assign(
+            **{"Price 240 min (£/MWh)": offset_daily_market_data["Price 60 min (£/MWh)"]}
+        )
+        model = Model(realistic_battery_config, market_data, markets=markets)
+        model.solve(mip_rel_gap=0)
+        sparse_model = SparseModel(realistic_battery_config, market_data, markets=markets)
+        assert sparse_model.solve(mip_rel_gap=0) == ("ok", "optimal")
+        for size in ["variables", "constraints", "nonzeros", "binaries"]:
+            assert getattr(sparse_model.stats, size) == getattr(model.stats, size)
+        assert sparse_model.objective_value == pytest.approx(model.objective.value)
+        pd.testing.assert_index_equal(
+            sparse_model.solution_to_dataframe().columns, model.solution_to_dataframe().columns
+        )
+
+    def test_charge_discharge_60min(self, realistic_battery_config):
+        """Battery commits hourly market rates to the full hour."""
+        time = pd.Index(pd.date_range("2018-01-01", periods=4, freq="30min"), name="time")
+        market_data = pd.DataFrame(
+            data={
+                "Price 30 min (£/MWh)": [45.0, 50.0, 50.0, 50.0],
+                "Price 60 min (£/MWh)": [40.0, 40.0, 55.0, 55.0],
+            },
+            index=time,
+        )
+        sparse_model = SparseModel(realistic_battery_config, market_data)
+        sparse_model.solve()
+        df = sparse_model.solution_to_dataframe()
+        np.testing.assert_allclose(df["charge rate 60"], [2.0, 2.0, 0.0, 0.0], atol=1e-9)
+        np.testing.assert_allclose(df["discharge rate 60"], [0.0, 0.0, 1.9, 1.9], atol=1e-9)
+
+    def test_unsolved_model_raises(self, realistic_battery_config, market_data):
+        """Solution is unavailable before solving."""
+        with pytest.raises(RuntimeError):
+            SparseModel(realistic_battery_config, market_data).solution_to_dataframe()
+
+    def test_timesteps_spaced_at_shortest_interval(self, realistic_battery_config, market_data):
+        """Market data must have timesteps of the shortest settlement interval, as for `Model`."""
+        with pytest.raises(ValueError):
+            SparseModel(realistic_battery_config, market_data[["Price 60 min (£/MWh)"]], markets={"60": "1h"})
@@ -0,0 +1,62 @@
+"""Test sweep module."""
+
+import pandas as pd
+import pytest
+
+from chronos.lite.model import Model
+from chronos.lite.sweep import iter_sweep, sweep, sweep_grid
+
+
+class TestSweep:
+    """Validate battery sizing sweeps against individual models."""
+
+    def test_sweep_grid(self):
+        """Grid points cover every combination of values."""
+        points = sweep_grid({"Max storage volume": [1.0, 2.0], "Max charging rate": [1.0, 2.0, 3.0]})
+        assert len(points) == 6
+        assert {"Max storage volume": 2.0, "Max charging rate": 3.0} in points
+
+    def test_sweep_matches_models(self, realistic_battery_config, daily_market_data):
+        """Each sweep row matches the financial summary of a model solved at that grid point."""
+        grids = {"Max storage volume": [2.0, 4.0], "Battery charging loss": [0.05, 0.1]}
+        results = sweep(realistic_battery_config, daily_market_data, grids, processes=2)
+        assert len(results) == 4
+        assert (results["Termination condition"] == "optimal").all()
+        for _, row in results.iterrows():
+            model = Model({**realistic_battery_config, **row[list(grids)].to_dict()}, daily_market_data)
+            model.solve()
+            assert row["Total Profit"] == pytest.approx(model.financial_summary()["Total Profit"])
+
+    def test_iter_sweep_streams_results(self, realistic_battery_config, daily_market_data):
+        """Results are yielded one grid point at a time."""
+        results = iter_sweep(
+            realistic_battery_config, daily_market_data, {"Max storage volume": [2.0, 4.0]}, processes=2
+        )
+        assert isinstance(next(results), pd.Series)
+        assert len(list(results)) == 1
+
+    def test_sweep_lifetime(self, realistic_battery_config, daily_market_data):
+        """Lifetime sweeps simulate each grid point period by period, reporting cycles."""
+        results = sweep(
+            realistic_battery_config, daily_market_data, {"Max storage volume": [2.0, 4.0]}, processes=2,
+            lifetime_period="6h"
+        )
+        assert (results["Cycles"] > 0).all()
+        assert (results["Final storage volume"] < results["Max storage volume"]).all()
+
+    def test_sweep_in_grid_order(self, realistic_battery_config, daily_market_data):
+        """Rows follow the order of the grid points, not the order of their values."""
+        grids = {"Max storage volume": [4.0, 2.0], "Max charging rate": [2.0, 1.0]}
+        results = sweep(realistic_battery_config, daily_market_data, grids, processes=2)
+        assert results[list(grids)].to_dict("records") == sweep_grid(grids)
+        assert list(results.index) == [0, 1, 2, 3]
+
+    def test_failed_points_recorded(self, realistic_battery_config, daily_market_data):
+        """A grid point which raises an error is recorded in its row without stopping the sweep."""
+        results = sweep(
+            realistic_battery_config, daily_market_data, {"Lifetime (1)": [0.0, 10.0]}, processes=2,
+            lifetime_period="6h"
+        )
+        assert results.loc[0, "Termination condition"] == "error"
+        assert "end of life" in results.loc[0, "Error"]
+        assert results.loc[1, "Cycles"] > 0